@@ -4,11 +4,13 @@ NoneBot2 DST 服务器管理插件
 通过 DMP API 管理 Don't Starve Together 服务器。
 """
 
+import httpx
 from nonebot import get_driver
 from nonebot.plugin import PluginMetadata
 
 from .config import DSTConfig, Config, get_dst_config
 from .client.api_client import DSTApiClient
+from .client.resilience import RetryPolicy, get_circuit_breaker
 from .ai.client import AIClient
 
 
@@ -149,14 +151,53 @@ async def init_client():
     config = get_dst_config()
 
     # Ensure sqlite tables exist before any command touches the database.
-    from .database import init_db
+    from .database import (
+        configure_last_room_buffer,
+        configure_query_profiler,
+        init_db,
+        start_sign_retention,
+    )
 
+    configure_query_profiler(config.dst_db_profiling, config.dst_db_slow_query_ms)
     await init_db()
+    configure_last_room_buffer(config.dst_last_room_flush_interval)
+    # 签到记录归档（可选）：会删除超过保留天数的明细，需显式开启
+    if config.dst_sign_retention_days > 0:
+        start_sign_retention(
+            config.dst_sign_retention_days,
+            interval=config.dst_sign_retention_interval,
+            batch_size=config.dst_sign_retention_batch_size,
+        )
 
     _api_client = DSTApiClient(
         base_url=config.dst_api_url,
         token=config.dst_api_token,
-        timeout=config.dst_timeout
+        timeout=config.dst_timeout,
+        enable_cache=config.dst_api_cache_enabled,
+        cache_ttls=config.dst_api_cache_ttls,
+        cache_max_entries=config.dst_api_cache_max_entries,
+        limits=httpx.Limits(
+            max_connections=config.dst_http_max_connections,
+            max_keepalive_connections=config.dst_http_max_keepalive_connections,
+            keepalive_expiry=config.dst_http_keepalive_expiry,
+        ),
+        http2=config.dst_http2,
+        players_ttl=config.dst_players_cache_ttl,
+        retry_policy=RetryPolicy(
+            retries=max(1, config.dst_api_retries),
+            backoff=config.dst_api_retry_backoff,
+            max_backoff=config.dst_api_retry_max_backoff,
+        ),
+        # 阈值为 0 时不启用熔断
+        circuit_breaker=(
+            get_circuit_breaker(
+                httpx.URL(config.dst_api_url).host,
+                failure_threshold=config.dst_api_breaker_threshold,
+                recovery_timeout=config.dst_api_breaker_recovery,
+            )
+            if config.dst_api_breaker_threshold > 0
+            else None
+        ),
     )
 
     _ai_client = AIClient(config.get_ai_config())
@@ -176,10 +217,37 @@ async def init_client():
         ai_qa,
     )
 
-    # 初始化签到监视器（触发式，无后台任务）
+    # 初始化签到监视器（触发式）
     from .services.monitors import sign_monitor
 
-    sign_monitor.init_sign_monitor(_api_client)
+    monitor = sign_monitor.init_sign_monitor(
+        _api_client,
+        max_command_length=config.dst_sign_delivery_max_command_length,
+        claim_timeout=config.dst_sign_claim_timeout,
+    )
+
+    # 待发放奖励后台巡检（可选）
+    if config.dst_sign_sweeper_enabled:
+        sign_monitor.init_reward_sweeper(
+            monitor,
+            interval=config.dst_sign_sweep_interval,
+            max_interval=config.dst_sign_sweep_max_interval,
+            concurrency=config.dst_sign_sweep_concurrency,
+        ).start()
+
+    # 房间状态后台轮询（可选），轮询到在线玩家时顺带检查待发放奖励
+    if config.dst_room_poller_enabled:
+        from .services.monitors import room_poller
+
+        room_poller.init_room_poller(
+            _api_client,
+            active_interval=config.dst_room_poll_active_interval,
+            idle_interval=config.dst_room_poll_idle_interval,
+            room_list_interval=config.dst_room_poll_list_interval,
+            metrics_interval=config.dst_room_poll_metrics_interval,
+            concurrency=config.dst_room_poll_concurrency,
+            on_players=monitor.schedule_room_check,
+        ).start()
 
     # 旧版命令初始化
     mod.init(_api_client, _ai_client)
@@ -194,11 +262,24 @@ async def close_client():
     """关闭 API 客户端"""
     global _api_client
     global _ai_client
+    from .services.monitors.room_poller import shutdown_room_poller
+    from .services.monitors.sign_monitor import drain_sign_monitor, shutdown_reward_sweeper
+
+    await shutdown_reward_sweeper()
+    await shutdown_room_poller()
+    # 已认领的签到奖励需在关闭客户端与数据库前完成发放与标记
+    await drain_sign_monitor()
     if _api_client:
         await _api_client.close()
     if _ai_client:
         await _ai_client.close()
 
+    from .database import close_db, flush_last_room_writes, stop_sign_retention
+
+    await stop_sign_retention()
+    await flush_last_room_writes()
+    await close_db()
+
 
 def get_api_client() -> DSTApiClient:
     """
@@ -6,14 +6,13 @@ AI 基础抽象与通用工具
 
 from __future__ import annotations
 
-import asyncio
-import random
-from dataclasses import dataclass
 from typing import Any, Awaitable, Callable, Literal, Optional, Sequence, Tuple, TypeVar, TypedDict
 
 import httpx
 from loguru import logger
 
+from ..client.resilience import RetryPolicy, run_with_retry as _run_with_retry
+
 
 ChatRole = Literal["system", "user", "assistant"]
 
@@ -57,15 +56,6 @@ class AIProviderError(AIError):
         self.status_code = status_code
 
 
-@dataclass(frozen=True)
-class RetryPolicy:
-    """重试策略"""
-
-    retries: int = 3
-    backoff: float = 0.5
-    max_backoff: float = 4.0
-
-
 T = TypeVar("T")
 
 
@@ -108,30 +98,9 @@ async def run_with_retry(
     policy: RetryPolicy,
     retry_on: Tuple[type[Exception], ...],
 ) -> T:
-    """统一的重试执行器"""
+    """统一的重试执行器（AI 调用）"""
 
-    last_error: Optional[Exception] = None
-    for attempt in range(1, policy.retries + 1):
-        try:
-            return await func()
-        except retry_on as exc:
-            last_error = exc
-            if attempt >= policy.retries:
-                break
-            delay = min(policy.max_backoff, policy.backoff * (2 ** (attempt - 1)))
-            # 加入随机抖动，避免多个客户端同时重试导致惊群效应
-            delay = delay * (0.8 + random.random() * 0.4)
-            logger.warning("AI 调用失败，{attempt}/{total} 次重试，{delay:.2f}s 后重试：{err}",
-                           attempt=attempt,
-                           total=policy.retries,
-                           delay=delay,
-                           err=exc)
-            await asyncio.sleep(delay)
-        except Exception:
-            raise
-    if last_error is not None:
-        raise last_error
-    raise AIError("AI 调用失败")
+    return await _run_with_retry(func, policy, retry_on, label="AI 调用", error_type=AIError)
 
 
 class AIProvider:
@@ -9,12 +9,12 @@ from __future__ import annotations
 import io
 import json
 import re
+import tempfile
 import time
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 from zipfile import ZipFile
 
-import httpx
 from loguru import logger
 
 from .base import AIError, format_ai_error
@@ -39,14 +39,27 @@ class ModConfigParser:
     Attributes:
         api_client: DMP API 客户端
         ai_client: AI 客户端
+        max_bytes: 存档下载大小上限（字节），0 表示不限制
     """
 
     _shared_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
     _cache: Dict[str, Tuple[float, Dict[str, Any]]]
 
-    def __init__(self, api_client: DSTApiClient, ai_client: AIClient) -> None:
+    def __init__(
+        self,
+        api_client: DSTApiClient,
+        ai_client: AIClient,
+        max_bytes: Optional[int] = None,
+    ) -> None:
         self.api_client = api_client
         self.ai_client = ai_client
+        if max_bytes is None:
+            # 延迟导入：config 模块在加载时会导入 ai 包
+            from ..config import get_dst_config
+
+            max_bytes = int(get_dst_config().dst_archive_max_bytes)
+        # 存档下载大小上限（字节），0 表示不限制
+        self.max_bytes = max_bytes
         self._cache = ModConfigParser._shared_cache
 
     async def parse_mod_config(self, room_id: int, world_id: str) -> Dict[str, Any]:
@@ -126,35 +139,64 @@ class ModConfigParser:
 
     async def _fetch_modoverrides(self, room_id: int, world_id: str) -> str:
         """通过存档下载获取 modoverrides.lua 内容。"""
+        if hasattr(self.api_client, "download_archive_to_file"):
+            # 存档流式写入临时目录，解析后随目录一并删除，不在内存中保留整包
+            with tempfile.TemporaryDirectory(prefix="dst_mod_") as temp_dir:
+                result = await self.api_client.download_archive_to_file(
+                    room_id, temp_dir, max_bytes=self.max_bytes or None
+                )
+                return await self._extract_from_download_result(result, world_id, temp_dir)
+
         if not hasattr(self.api_client, "download_archive"):
             raise RuntimeError("当前 API 客户端未实现存档下载")
 
         result = await self.api_client.download_archive(room_id)
+        return await self._extract_from_download_result(result, world_id, None)
+
+    async def _extract_from_download_result(
+        self,
+        result: Dict[str, Any],
+        world_id: str,
+        temp_dir: Optional[str],
+    ) -> str:
         if not result.get("success"):
             error = result.get("error") or "未知错误"
             raise RuntimeError(f"存档下载失败：{error}")
 
         data = result.get("data") or {}
-        content = data.get("content")
+        source: Union[bytes, str, None] = data.get("path") or data.get("content")
         url = data.get("url") or data.get("downloadUrl") or data.get("download_url")
 
-        if content is None and url:
-            content = await self._download_zip(url)
+        if source is None and url:
+            if temp_dir is not None:
+                source = await self._download_zip_to_file(url, temp_dir)
+            else:
+                with tempfile.TemporaryDirectory(prefix="dst_mod_") as own_dir:
+                    path = await self._download_zip_to_file(url, own_dir)
+                    return self._extract_modoverrides_from_zip(path, world_id)
 
-        if content is None:
+        if source is None:
             raise RuntimeError("存档内容为空")
 
-        return self._extract_modoverrides_from_zip(content, world_id)
+        return self._extract_modoverrides_from_zip(source, world_id)
 
-    async def _download_zip(self, url: str) -> bytes:
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            return response.content
+    async def _download_zip_to_file(self, url: str, temp_dir: str) -> str:
+        """经 API 客户端的连接池下载存档链接，受 max_bytes 限制。"""
+        if not hasattr(self.api_client, "download_url_to_file"):
+            raise RuntimeError("当前 API 客户端未实现链接下载")
+        path = f"{temp_dir}/archive.zip"
+        result = await self.api_client.download_url_to_file(
+            url, path, max_bytes=self.max_bytes or None
+        )
+        if not result.get("success"):
+            raise RuntimeError(f"存档下载失败：{result.get('error') or '未知错误'}")
+        return path
 
-    def _extract_modoverrides_from_zip(self, content: bytes, world_id: str) -> str:
+    def _extract_modoverrides_from_zip(self, content: Union[bytes, str], world_id: str) -> str:
+        """从存档中提取 modoverrides.lua（content 为 ZIP 字节或本地文件路径）。"""
         world_name = self._normalize_world_id(world_id)
-        with ZipFile(io.BytesIO(content)) as zf:
+        source = io.BytesIO(content) if isinstance(content, bytes) else content
+        with ZipFile(source) as zf:
             candidates = [
                 name
                 for name in zf.namelist()
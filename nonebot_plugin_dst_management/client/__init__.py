@@ -5,5 +5,16 @@ DMP API 客户端模块
 """
 
 from .api_client import DSTApiClient
+from .cache import DEFAULT_CACHE_TTLS, ResponseCache
+from .coalesce import RequestCoalescer
+from .resilience import CircuitBreaker, RetryPolicy, get_circuit_breaker_states
 
-__all__ = ["DSTApiClient"]
+__all__ = [
+    "DSTApiClient",
+    "DEFAULT_CACHE_TTLS",
+    "ResponseCache",
+    "RequestCoalescer",
+    "CircuitBreaker",
+    "RetryPolicy",
+    "get_circuit_breaker_states",
+]
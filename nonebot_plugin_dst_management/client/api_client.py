@@ -5,12 +5,60 @@ DMP API 客户端
 """
 
 import os
+import copy
 import json
 import re
-from typing import Any, Dict, List, Optional, Tuple
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from loguru import logger
 import httpx
 
+from .cache import ResponseCache, extract_room_id, make_cache_key
+from .coalesce import RequestCoalescer
+from .metrics import ApiMetrics
+from .resilience import CircuitBreaker, RetryPolicy, run_with_retry
+from .transfer import (
+    DEFAULT_CHUNK_SIZE,
+    MultipartFileStream,
+    ProgressCallback,
+    TransferTooLargeError,
+    parse_content_disposition,
+    write_chunks,
+)
+
+
+# 可安全重试的 POST 接口（重复执行结果相同）
+IDEMPOTENT_POST_PATHS = frozenset({
+    "/mod/download",
+    "/room/player/update",
+    "/room/mod/setting/update",
+    "/room/mod/enable",
+})
+
+# 不改变在线玩家列表的写接口，调用后保留在线玩家快照
+PLAYER_NEUTRAL_PATHS = frozenset({
+    "/dashboard/console",
+})
+
+# 网关类错误视为 DMP 暂时不可用
+TRANSIENT_STATUS_CODES = frozenset({502, 503, 504})
+
+
+class _TransientStatusError(Exception):
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def _h2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
 
 class DSTApiClient:
     """
@@ -22,6 +70,7 @@ class DSTApiClient:
         base_url: API 基础 URL
         token: JWT 认证令牌
         timeout: 请求超时时间（秒）
+        cache: GET 响应缓存（未启用时为 None）
     """
 
     def __init__(
@@ -29,6 +78,14 @@ class DSTApiClient:
         base_url: str,
         token: str,
         timeout: int = 10,
+        enable_cache: bool = False,
+        cache_ttls: Optional[Dict[str, float]] = None,
+        cache_max_entries: int = 1024,
+        limits: Optional[httpx.Limits] = None,
+        http2: bool = False,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        players_ttl: float = 0.0,
     ):
         """
         初始化 API 客户端
@@ -37,19 +94,50 @@ class DSTApiClient:
             base_url: DMP API 基础 URL（如 http://285k.mc5173.cn:35555）
             token: JWT 认证令牌
             timeout: 请求超时时间（秒），默认 10
+            enable_cache: 是否启用 GET 响应缓存，默认关闭
+            cache_ttls: 按端点覆盖缓存 TTL（秒），如 {"/room/player/online": 2}
+            cache_max_entries: 缓存最大条目数
+            limits: 连接池限制（最大连接数、keep-alive 连接数与过期时间）
+            http2: 是否启用 HTTP/2（需要安装 h2）
+            retry_policy: 超时/连接错误的重试策略，默认不重试
+            circuit_breaker: 熔断器，DMP 持续不可用时快速失败，默认不启用
+            players_ttl: 在线玩家列表按房间复用的时间（秒），0 表示不复用
         """
         self.base_url = base_url.rstrip("/")
         self.token = token
         self.timeout = timeout
-
-        # 初始化 httpx 异步客户端
+        self.cache: Optional[ResponseCache] = (
+            ResponseCache(cache_ttls, max_entries=cache_max_entries) if enable_cache else None
+        )
+        # 并发的相同 GET 请求共享一次 HTTP 调用
+        self._coalescer: RequestCoalescer[Dict[str, Any]] = RequestCoalescer()
+        self._mutation_epoch = 0
+        # 在线玩家短时快照：房间 -> (获取时间, 响应)；签到高峰时同一房间只请求一次 DMP
+        self.players_ttl = players_ttl
+        self._players: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+        self._players_hits = 0
+        self._players_epoch = 0
+        self._players_coalescer: RequestCoalescer[Dict[str, Any]] = RequestCoalescer()
+        # 写操作回调：参数为受影响的房间 ID（无法确定时为 None）
+        self._mutation_listeners: List[Callable[[Optional[int]], Any]] = []
+        self.retry_policy = retry_policy or RetryPolicy(retries=1)
+        self.circuit_breaker = circuit_breaker
+        # 按端点的延迟/状态码/字节数统计
+        self.metrics = ApiMetrics()
+
+        if http2 and not _h2_available():
+            logger.warning("未安装 h2，DMP 客户端回退为 HTTP/1.1")
+            http2 = False
+
+        # 初始化 httpx 异步客户端；存档上传/下载同样复用该连接池。
+        # Content-Type 由 json=/files= 按请求自动设置，不放入默认请求头，
+        # 否则会覆盖 multipart 上传的 boundary。
         self.client = httpx.AsyncClient(
             base_url=f"{self.base_url}/v3",
-            headers={
-                "X-DMP-TOKEN": token,
-                "Content-Type": "application/json"
-            },
-            timeout=timeout
+            headers={"X-DMP-TOKEN": token},
+            timeout=timeout,
+            limits=limits or httpx.Limits(),
+            http2=http2,
         )
 
     async def _request(
@@ -71,14 +159,149 @@ class DSTApiClient:
         Returns:
             响应数据字典：{ success: bool, data: Any, message: str }
         """
-        try:
-            request_path = (path or "").lstrip("/")
-            response = await self.client.request(
-                method=method,
-                url=request_path,
-                json=data,
-                params=params
+        method = method.upper()
+        if method != "GET":
+            room_id = extract_room_id(path, params, data)
+            self._mark_mutation(room_id, path)
+            try:
+                return await self._send(method, path, data, params)
+            finally:
+                # 写操作进行期间发起的读取可能拿到写之前的状态，完成后再失效一次
+                self._mark_mutation(room_id, path)
+
+        cache_key = make_cache_key(path, params)
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        # 以写操作纪元区分飞行中请求，写操作之后发起的读取不会复用写之前的结果
+        epoch = self._mutation_epoch
+        result = await self._coalescer.run(
+            (epoch, cache_key),
+            lambda: self._fetch(path, params, cache_key, epoch),
+        )
+        # 合并的调用方共享同一响应，各自拿到独立副本
+        return copy.deepcopy(result)
+
+    async def _fetch(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        cache_key: Any,
+        epoch: int,
+    ) -> Dict[str, Any]:
+        result = await self._send("GET", path, None, params)
+        if self.cache is not None and epoch == self._mutation_epoch:
+            self.cache.set(cache_key, result, room_id=extract_room_id(path, params))
+        return result
+
+    def get_request_stats(self) -> Dict[str, Any]:
+        """获取请求合并与缓存统计。"""
+        stats: Dict[str, Any] = dict(self._coalescer.stats())
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        if self.circuit_breaker is not None:
+            stats["breaker"] = self.circuit_breaker.snapshot()
+        if self.players_ttl > 0:
+            stats["players"] = {
+                "hits": self._players_hits,
+                "coalesced": self._players_coalescer.coalesced,
+                "rooms": len(self._players),
+            }
+        return stats
+
+    def get_breaker_state(self) -> Optional[Dict[str, Any]]:
+        """获取熔断器状态（未启用时返回 None）。"""
+        if self.circuit_breaker is None:
+            return None
+        return self.circuit_breaker.snapshot()
+
+    def invalidate_room_cache(self, room_id: Optional[int]) -> None:
+        """失效指定房间的缓存条目与在线玩家快照（room_id 为 None 时全部失效）。"""
+        if self.cache is not None:
+            self.cache.invalidate_room(room_id)
+        if room_id is None:
+            self._players.clear()
+        else:
+            self._players.pop(room_id, None)
+
+    def add_mutation_listener(self, listener: Callable[[Optional[int]], Any]) -> None:
+        """注册写操作回调（如房间快照失效），控制台命令不触发。"""
+        if listener not in self._mutation_listeners:
+            self._mutation_listeners.append(listener)
+
+    def remove_mutation_listener(self, listener: Callable[[Optional[int]], Any]) -> None:
+        if listener in self._mutation_listeners:
+            self._mutation_listeners.remove(listener)
+
+    def _mark_mutation(self, room_id: Optional[int], path: Optional[str] = None) -> None:
+        """
+        失效受写操作影响的缓存与在线玩家快照
+
+        写操作发出前与完成后各调用一次：递增的纪元使写进行期间发起的读取与
+        在线玩家合并请求不会被缓存或在写完成后被复用。
+        """
+        # 写操作会改变房间状态，无论成功与否都失效该房间的缓存
+        self._mutation_epoch += 1
+        if self.cache is not None:
+            self.cache.invalidate_room(room_id)
+        # 控制台命令（发放奖励、公告等）通常不改变在线玩家，快照只在其他写操作后失效
+        if path is not None and "/" + path.strip("/") in PLAYER_NEUTRAL_PATHS:
+            return
+        self._players_epoch += 1
+        if room_id is None:
+            self._players.clear()
+        else:
+            self._players.pop(room_id, None)
+        for listener in list(self._mutation_listeners):
+            try:
+                listener(room_id)
+            except Exception as e:
+                logger.warning(f"写操作回调失败: {e}")
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        data: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """实际发出 HTTP 请求并转换为统一响应结构。"""
+        breaker = self.circuit_breaker
+        if breaker is not None and not breaker.allow():
+            logger.warning(f"DMP 熔断中，拒绝请求: {path}")
+            return {"success": False, "error": "DMP 服务暂时不可用，请稍后再试", "code": 503}
+
+        request_path = (path or "").lstrip("/")
+
+        async def attempt() -> httpx.Response:
+            response = await self._timed_request(
+                method, request_path, json=data, params=params
             )
+            if response.status_code in TRANSIENT_STATUS_CODES:
+                raise _TransientStatusError(response.status_code)
+            return response
+
+        # 幂等请求在超时、网络错误与网关错误时重试；
+        # 其他写操作只在连接未建立（请求未送达）时重试
+        if method == "GET" or "/" + request_path.rstrip("/") in IDEMPOTENT_POST_PATHS:
+            retry_on: Tuple[type[Exception], ...] = (httpx.TransportError, _TransientStatusError)
+        else:
+            retry_on = (httpx.ConnectError, httpx.ConnectTimeout)
+
+        try:
+            try:
+                response = await run_with_retry(
+                    attempt, self.retry_policy, retry_on, label=f"DMP 请求 {path} "
+                )
+            except (httpx.TransportError, _TransientStatusError):
+                if breaker is not None:
+                    breaker.record_failure()
+                raise
+            if breaker is not None:
+                breaker.record_success()
+
             result = response.json()
 
             # 检查响应状态码
@@ -95,6 +318,15 @@ class DSTApiClient:
                     "code": result.get("code")
                 }
 
+        # uncertain：请求可能已送达 DMP 并执行，但未收到明确结果（调用方不应视为未执行）
+        except _TransientStatusError as e:
+            logger.error(f"HTTP 状态错误: {e.status_code}")
+            return {
+                "success": False,
+                "error": f"HTTP 错误: {e.status_code}",
+                "code": e.status_code,
+                "uncertain": True,
+            }
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP 状态错误: {e.response.status_code}")
             return {
@@ -102,28 +334,56 @@ class DSTApiClient:
                 "error": f"HTTP 错误: {e.response.status_code}",
                 "code": e.response.status_code
             }
-        except httpx.TimeoutException:
+        except httpx.TimeoutException as e:
             logger.error(f"请求超时: {path}")
             return {
                 "success": False,
                 "error": "请求超时",
-                "code": 408
+                "code": 408,
+                "uncertain": not isinstance(e, httpx.ConnectTimeout),
             }
         except httpx.RequestError as e:
             logger.error(f"请求错误: {e}")
             return {
                 "success": False,
                 "error": str(e),
-                "code": 500
+                "code": 500,
+                "uncertain": not isinstance(e, httpx.ConnectError),
             }
         except Exception as e:
             logger.exception(f"未知错误: {e}")
             return {
                 "success": False,
                 "error": str(e),
-                "code": 500
+                "code": 500,
+                "uncertain": True,
             }
 
+    async def _timed_request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        """发出请求并记录端点延迟、状态码与字节数。"""
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method=method, url=path, **kwargs)
+        except httpx.TimeoutException:
+            self.metrics.record(method, path, time.perf_counter() - started, timeout=True)
+            raise
+        except httpx.TransportError:
+            self.metrics.record(method, path, time.perf_counter() - started)
+            raise
+        self.metrics.record(
+            method,
+            path,
+            time.perf_counter() - started,
+            response.status_code,
+            bytes_in=len(response.content),
+            bytes_out=len(response.request.content),
+        )
+        return response
+
+    def get_api_metrics(self) -> List[Dict[str, Any]]:
+        """获取按端点聚合的请求指标（p50/p95/p99 等）。"""
+        return self.metrics.snapshot()
+
     async def close(self):
         """关闭客户端连接"""
         await self.client.aclose()
@@ -362,13 +622,38 @@ class DSTApiClient:
     # ========== 玩家管理 ==========
 
     async def get_online_players(self, room_id: int) -> Dict[str, Any]:
-        """获取在线玩家列表"""
+        """获取在线玩家列表（players_ttl 内复用同一房间的上次结果）"""
+        if self.players_ttl > 0:
+            entry = self._players.get(room_id)
+            if entry is not None and time.monotonic() - entry[0] <= self.players_ttl:
+                self._players_hits += 1
+                return copy.deepcopy(entry[1])
+
+            # 在合并的请求内写入快照，请求完成后到达的调用方直接命中快照
+            epoch = self._players_epoch
+            result = await self._players_coalescer.run(
+                (room_id, epoch),
+                lambda: self._fetch_players(room_id, epoch),
+            )
+            return copy.deepcopy(result)
+
         return await self._request(
             "GET",
             "/room/player/online",
             params={"roomID": room_id}
         )
 
+    async def _fetch_players(self, room_id: int, epoch: int) -> Dict[str, Any]:
+        result = await self._request(
+            "GET",
+            "/room/player/online",
+            params={"roomID": room_id}
+        )
+        # 期间发生过写操作（如踢人）时不保存，避免复用写之前的列表
+        if result.get("success") and epoch == self._players_epoch:
+            self._players[room_id] = (time.monotonic(), copy.deepcopy(result))
+        return result
+
     async def get_room_players(self, room_id: int) -> Dict[str, Any]:
         """获取房间玩家列表（当前实现等同在线玩家）"""
         return await self.get_online_players(room_id)
@@ -506,23 +791,50 @@ class DSTApiClient:
 
     # ========== 存档管理 ==========
 
-    async def upload_archive(self, room_id: int, archive_path: str) -> Dict[str, Any]:
-        """上传房间存档"""
-        return await self._upload_archive("/tools/archive/upload", room_id, archive_path)
+    async def upload_archive(
+        self,
+        room_id: int,
+        archive_path: str,
+        *,
+        progress: Optional[ProgressCallback] = None,
+        rate_limit: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Dict[str, Any]:
+        """上传房间存档（流式发送，可选进度回调与限速，单位字节/秒）"""
+        return await self._upload_archive(
+            "/tools/archive/upload",
+            room_id,
+            archive_path,
+            progress=progress,
+            rate_limit=rate_limit,
+            chunk_size=chunk_size,
+        )
 
-    async def replace_archive(self, room_id: int, archive_path: str) -> Dict[str, Any]:
-        """替换房间存档"""
-        return await self._upload_archive("/tools/archive/replace", room_id, archive_path)
+    async def replace_archive(
+        self,
+        room_id: int,
+        archive_path: str,
+        *,
+        progress: Optional[ProgressCallback] = None,
+        rate_limit: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Dict[str, Any]:
+        """替换房间存档（流式发送，可选进度回调与限速，单位字节/秒）"""
+        return await self._upload_archive(
+            "/tools/archive/replace",
+            room_id,
+            archive_path,
+            progress=progress,
+            rate_limit=rate_limit,
+            chunk_size=chunk_size,
+        )
 
     async def download_archive(self, room_id: int) -> Dict[str, Any]:
         """下载房间存档"""
         try:
-            async with httpx.AsyncClient(
-                base_url=f"{self.base_url}/v3",
-                headers={"X-DMP-TOKEN": self.token},
-                timeout=self.timeout,
-            ) as client:
-                response = await client.get("/tools/archive/download", params={"roomID": room_id})
+            response = await self._timed_request(
+                "GET", "tools/archive/download", params={"roomID": room_id}
+            )
 
             content_type = response.headers.get("content-type", "")
             if "application/json" in content_type:
@@ -557,18 +869,210 @@ class DSTApiClient:
             logger.exception(f"未知错误: {e}")
             return {"success": False, "error": str(e), "code": 500}
 
-    async def _upload_archive(self, path: str, room_id: int, archive_path: str) -> Dict[str, Any]:
+    async def download_archive_to_file(
+        self,
+        room_id: int,
+        dest_dir: Union[str, Path],
+        *,
+        max_bytes: Optional[int] = None,
+        progress: Optional[ProgressCallback] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Dict[str, Any]:
+        """
+        流式下载房间存档到本地文件
+
+        响应体按块写入 dest_dir 下的临时文件，完成后再重命名为最终文件，
+        内存占用与存档大小无关。
+
+        Args:
+            room_id: 房间 ID
+            dest_dir: 保存目录
+            max_bytes: 大小上限（字节），超出时中止下载并删除临时文件
+            progress: 进度回调 (已下载字节, 总字节或 None)
+            chunk_size: 单次读取块大小
+
+        Returns:
+            成功时 data 为 {"path": str, "filename": str, "size": int}；
+            若 DMP 返回 JSON（如下载链接），data 原样透传
+        """
+        dest = Path(dest_dir)
+        temp_path: Optional[str] = None
+        started = time.perf_counter()
+        status: Optional[int] = None
+        timed_out = False
+        written = 0
+        try:
+            dest.mkdir(parents=True, exist_ok=True)
+            async with self.client.stream(
+                "GET", "tools/archive/download", params={"roomID": room_id}
+            ) as response:
+                status = response.status_code
+                content_type = response.headers.get("content-type", "")
+                if "application/json" in content_type:
+                    written = len(await response.aread())
+                    result = response.json()
+                    if result.get("code") == 200:
+                        return {
+                            "success": True,
+                            "data": result.get("data"),
+                            "message": result.get("message", "success"),
+                        }
+                    return {
+                        "success": False,
+                        "error": result.get("message", "Unknown error"),
+                        "code": result.get("code"),
+                    }
+
+                total: Optional[int] = None
+                length = response.headers.get("content-length")
+                if length and length.isdigit():
+                    total = int(length)
+                    if max_bytes is not None and total > max_bytes:
+                        raise TransferTooLargeError(max_bytes)
+
+                filename = parse_content_disposition(
+                    response.headers.get("content-disposition", "")
+                ) or f"archive_{room_id}.zip"
+
+                fd, temp_path = tempfile.mkstemp(prefix=".download_", suffix=".part", dir=dest)
+                os.close(fd)
+                written = await write_chunks(
+                    response.aiter_bytes(chunk_size),
+                    temp_path,
+                    max_bytes=max_bytes,
+                    progress=progress,
+                    total=total,
+                )
+
+            final_path = dest / filename
+            os.replace(temp_path, final_path)
+            temp_path = None
+            return {
+                "success": True,
+                "data": {"path": str(final_path), "filename": filename, "size": written},
+                "message": "success",
+            }
+        except TransferTooLargeError as e:
+            logger.warning(f"存档下载中止: {e}")
+            return {"success": False, "error": str(e), "code": 413}
+        except httpx.TimeoutException:
+            timed_out = True
+            logger.error("请求超时: /tools/archive/download")
+            return {"success": False, "error": "请求超时", "code": 408}
+        except httpx.RequestError as e:
+            logger.error(f"请求错误: {e}")
+            return {"success": False, "error": str(e), "code": 500}
+        except Exception as e:
+            logger.exception(f"未知错误: {e}")
+            return {"success": False, "error": str(e), "code": 500}
+        finally:
+            self.metrics.record(
+                "GET",
+                "tools/archive/download",
+                time.perf_counter() - started,
+                status,
+                timeout=timed_out,
+                bytes_in=written,
+            )
+            if temp_path is not None:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    async def download_url_to_file(
+        self,
+        url: str,
+        dest_path: Union[str, Path],
+        *,
+        max_bytes: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Dict[str, Any]:
+        """
+        通过共享连接池流式下载 DMP 返回的下载链接
+
+        链接指向其他站点时不携带 X-DMP-TOKEN。
+
+        Args:
+            url: 下载地址（绝对地址或相对 /v3 的路径）
+            dest_path: 保存路径，失败时删除已写入的部分
+            max_bytes: 大小上限（字节）
+            chunk_size: 单次读取块大小
+
+        Returns:
+            成功时 data 为 {"path": str, "size": int}
+        """
+        request = self.client.build_request("GET", url)
+        if request.url.host != self.client.base_url.host:
+            request.headers.pop("X-DMP-TOKEN", None)
+        completed = False
         try:
-            filename = os.path.basename(archive_path)
-            async with httpx.AsyncClient(
-                base_url=f"{self.base_url}/v3",
-                headers={"X-DMP-TOKEN": self.token},
-                timeout=self.timeout,
-            ) as client:
-                with open(archive_path, "rb") as file_handle:
-                    files = {"file": (filename, file_handle, "application/zip")}
-                    data = {"roomID": str(room_id)}
-                    response = await client.post(path, data=data, files=files)
+            response = await self.client.send(request, stream=True)
+            try:
+                response.raise_for_status()
+                length = response.headers.get("content-length")
+                total = int(length) if length and length.isdigit() else None
+                if max_bytes is not None and total is not None and total > max_bytes:
+                    raise TransferTooLargeError(max_bytes)
+                written = await write_chunks(
+                    response.aiter_bytes(chunk_size), dest_path, max_bytes=max_bytes, total=total
+                )
+            finally:
+                await response.aclose()
+            completed = True
+            return {"success": True, "data": {"path": str(dest_path), "size": written}}
+        except TransferTooLargeError as e:
+            logger.warning(f"下载中止: {e}")
+            return {"success": False, "error": str(e), "code": 413}
+        except httpx.TimeoutException:
+            logger.error(f"请求超时: {url}")
+            return {"success": False, "error": "请求超时", "code": 408}
+        except httpx.HTTPStatusError as e:
+            return {"success": False, "error": str(e), "code": e.response.status_code}
+        except httpx.RequestError as e:
+            logger.error(f"请求错误: {e}")
+            return {"success": False, "error": str(e), "code": 500}
+        finally:
+            if not completed:
+                try:
+                    os.remove(dest_path)
+                except OSError:
+                    pass
+
+    async def _upload_archive(
+        self,
+        path: str,
+        room_id: int,
+        archive_path: str,
+        *,
+        progress: Optional[ProgressCallback] = None,
+        rate_limit: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Dict[str, Any]:
+        self._mark_mutation(room_id)
+        started = time.perf_counter()
+        status: Optional[int] = None
+        timed_out = False
+        body: Optional[MultipartFileStream] = None
+        try:
+            body = MultipartFileStream(
+                archive_path,
+                {"roomID": str(room_id)},
+                chunk_size=chunk_size,
+                rate_limit=rate_limit,
+                progress=progress,
+            )
+            # 上传耗时取决于文件大小与限速，不受普通请求超时中的写入超时限制
+            response = await self.client.post(
+                path.lstrip("/"),
+                content=body,
+                headers={
+                    "Content-Type": body.content_type,
+                    "Content-Length": str(body.content_length),
+                },
+                timeout=httpx.Timeout(self.timeout, write=None),
+            )
+            status = response.status_code
 
             result = response.json()
             if result.get("code") == 200:
@@ -586,6 +1090,7 @@ class DSTApiClient:
         except FileNotFoundError:
             return {"success": False, "error": "存档文件不存在", "code": 404}
         except httpx.TimeoutException:
+            timed_out = True
             logger.error(f"请求超时: {path}")
             return {"success": False, "error": "请求超时", "code": 408}
         except httpx.RequestError as e:
@@ -594,6 +1099,19 @@ class DSTApiClient:
         except Exception as e:
             logger.exception(f"未知错误: {e}")
             return {"success": False, "error": str(e), "code": 500}
+        finally:
+            # 上传期间发起的读取可能拿到上传前的状态，完成后再失效一次
+            self._mark_mutation(room_id)
+            # 文件不存在时请求未发出，不计入指标
+            if body is not None:
+                self.metrics.record(
+                    "POST",
+                    path,
+                    time.perf_counter() - started,
+                    status,
+                    timeout=timed_out,
+                    bytes_out=body.content_length if status is not None else 0,
+                )
 
     # ========== 控制台命令 ==========
 
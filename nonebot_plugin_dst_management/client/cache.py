@@ -0,0 +1,155 @@
+"""
+DMP API 响应缓存
+
+为幂等 GET 接口提供按端点 TTL 的读穿缓存，并支持按房间失效。
+"""
+
+from __future__ import annotations
+
+import copy
+import re
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+# 端点默认 TTL（秒），键为归一化后的路径（数字段替换为 {id}）
+DEFAULT_CACHE_TTLS: Dict[str, float] = {
+    "/room/list": 5.0,
+    "/room/{id}": 10.0,
+    "/room/world/list": 30.0,
+    "/room/player/online": 2.0,
+    "/tools/backup/list": 10.0,
+    "/mod/search": 300.0,
+    "/mod/setting/struct": 300.0,
+    "/platform/overview": 5.0,
+    "/platform/metrics": 10.0,
+}
+
+# 与具体房间无关、但房间状态变化时同样需要失效的端点
+ROOM_AGNOSTIC_ENDPOINTS = frozenset({"/room/list", "/platform/overview"})
+
+CacheKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def normalize_endpoint(path: str) -> str:
+    """将请求路径归一化为端点模板（如 /room/12 -> /room/{id}）。"""
+    normalized = "/" + (path or "").strip("/")
+    return _ID_SEGMENT.sub("/{id}", normalized)
+
+
+def make_cache_key(path: str, params: Optional[Mapping[str, Any]] = None) -> CacheKey:
+    """由路径与查询参数生成缓存键。"""
+    normalized_path = "/" + (path or "").strip("/")
+    items = tuple(sorted((str(key), str(value)) for key, value in (params or {}).items()))
+    return normalized_path, items
+
+
+def extract_room_id(
+    path: str,
+    params: Optional[Mapping[str, Any]] = None,
+    data: Optional[Mapping[str, Any]] = None,
+) -> Optional[int]:
+    """从路径、查询参数或请求体中提取房间 ID。"""
+    for source in (params, data):
+        if source and source.get("roomID") is not None:
+            try:
+                return int(source["roomID"])
+            except (TypeError, ValueError):
+                return None
+    match = re.fullmatch(r"/?room/(\d+)/?", path or "")
+    if match:
+        return int(match.group(1))
+    return None
+
+
+class ResponseCache:
+    """
+    按端点 TTL 的内存响应缓存
+
+    仅缓存成功响应；条目记录所属房间，便于写操作后按房间失效。
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Mapping[str, float]] = None,
+        max_entries: int = 1024,
+    ) -> None:
+        self.ttls: Dict[str, float] = dict(DEFAULT_CACHE_TTLS)
+        if ttls:
+            self.ttls.update({normalize_endpoint(key): float(value) for key, value in ttls.items()})
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[CacheKey, Tuple[float, Optional[int], Dict[str, Any]]] = {}
+
+    def ttl_for(self, path: str) -> float:
+        """获取端点的 TTL，未配置的端点返回 0（不缓存）。"""
+        return self.ttls.get(normalize_endpoint(path), 0.0)
+
+    def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        cached = self._entries.get(key)
+        if cached is None:
+            self.misses += 1
+            return None
+        expires_at, _, value = cached
+        if time.monotonic() >= expires_at:
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        # 返回深拷贝：调用方改写 data 中的列表/字典不会影响后续命中
+        return copy.deepcopy(value)
+
+    def set(
+        self,
+        key: CacheKey,
+        value: Dict[str, Any],
+        room_id: Optional[int] = None,
+    ) -> None:
+        if not value.get("success"):
+            return
+        ttl = self.ttl_for(key[0])
+        if ttl <= 0:
+            return
+        now = time.monotonic()
+        self._entries[key] = (now + ttl, room_id, copy.deepcopy(value))
+        if self.max_entries > 0 and len(self._entries) > self.max_entries:
+            self._prune(now)
+
+    def invalidate_room(self, room_id: Optional[int]) -> int:
+        """失效指定房间相关的条目（含房间列表等全局视图），返回移除数量。"""
+        stale = [
+            key
+            for key, (_, entry_room, _) in self._entries.items()
+            if (room_id is not None and entry_room == room_id)
+            or normalize_endpoint(key[0]) in ROOM_AGNOSTIC_ENDPOINTS
+        ]
+        for key in stale:
+            self._entries.pop(key, None)
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _prune(self, now: float) -> None:
+        expired = [key for key, (expires_at, _, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            self._entries.pop(key, None)
+        excess = len(self._entries) - self.max_entries
+        if excess > 0:
+            oldest = sorted(self._entries.items(), key=lambda item: item[1][0])[:excess]
+            for key, _ in oldest:
+                self._entries.pop(key, None)
+
+
+__all__ = [
+    "DEFAULT_CACHE_TTLS",
+    "ResponseCache",
+    "extract_room_id",
+    "make_cache_key",
+    "normalize_endpoint",
+]
@@ -0,0 +1,54 @@
+"""
+并发请求合并（singleflight）
+
+相同键的并发请求共享同一次底层调用，所有等待方获得同一结果。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from functools import partial
+from typing import Awaitable, Callable, Dict, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class RequestCoalescer(Generic[T]):
+    """
+    飞行中请求表
+
+    Attributes:
+        issued: 实际发出的底层调用次数
+        coalesced: 被合并（复用他人结果）的调用次数
+    """
+
+    def __init__(self) -> None:
+        self.issued = 0
+        self.coalesced = 0
+        self._inflight: Dict[Hashable, "asyncio.Future[T]"] = {}
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        """执行或加入键为 key 的飞行中请求。"""
+        future = self._inflight.get(key)
+        if future is None:
+            self.issued += 1
+            future = asyncio.ensure_future(factory())
+            self._inflight[key] = future
+            future.add_done_callback(partial(self._forget, key))
+        else:
+            self.coalesced += 1
+        # shield：单个等待方被取消时不影响其他等待方
+        return await asyncio.shield(future)
+
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, int]:
+        return {"issued": self.issued, "coalesced": self.coalesced, "inflight": len(self._inflight)}
+
+    def _forget(self, key: Hashable, future: "asyncio.Future[T]") -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+
+__all__ = ["RequestCoalescer"]
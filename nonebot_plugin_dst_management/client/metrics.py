@@ -0,0 +1,173 @@
+"""
+DMP API 请求指标
+
+按归一化端点记录固定分桶的延迟直方图、状态码计数、超时次数与传输字节数，
+全部为进程内计数器，记录一次请求只做若干整数累加。
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cache import normalize_endpoint
+
+# 延迟分桶上界（毫秒），最后一个桶收纳超过最大上界的请求
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000,
+)
+# 原始路径 -> 端点计数器的缓存上限，超出后每次按归一化端点查找
+MAX_CACHED_PATHS = 1024
+
+# 状态码标签缓存，记录请求时不再格式化字符串
+_STATUS_LABELS: Dict[int, str] = {}
+
+
+def _status_label(status: int) -> str:
+    label = _STATUS_LABELS.get(status)
+    if label is None:
+        label = _STATUS_LABELS[status] = str(status)
+    return label
+
+
+class EndpointMetrics:
+    """单个端点的计数器"""
+
+    __slots__ = (
+        "buckets",
+        "count",
+        "total_ms",
+        "max_ms",
+        "statuses",
+        "timeouts",
+        "errors",
+        "bytes_in",
+        "bytes_out",
+    )
+
+    def __init__(self) -> None:
+        self.buckets: List[int] = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.statuses: Dict[str, int] = {}
+        self.timeouts = 0
+        self.errors = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def percentile(self, quantile: float) -> float:
+        """按分桶估算分位数（毫秒），桶内线性插值。"""
+        if self.count == 0:
+            return 0.0
+        rank = quantile * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            if bucket_count == 0:
+                continue
+            if seen + bucket_count >= rank:
+                lower = LATENCY_BUCKETS_MS[index - 1] if index > 0 else 0.0
+                if index < len(LATENCY_BUCKETS_MS):
+                    upper = LATENCY_BUCKETS_MS[index]
+                else:
+                    upper = self.max_ms
+                # 不超过实际观测到的最大值
+                upper = min(upper, self.max_ms)
+                lower = min(lower, upper)
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max_ms
+
+
+class ApiMetrics:
+    """按端点聚合的请求指标"""
+
+    def __init__(self) -> None:
+        self._endpoints: Dict[Tuple[str, str], EndpointMetrics] = {}
+        # 方法 -> 原始路径 -> 计数器，同一路径只归一化一次
+        self._paths: Dict[str, Dict[str, EndpointMetrics]] = {}
+
+    def record(
+        self,
+        method: str,
+        path: str,
+        elapsed: float,
+        status: Optional[int] = None,
+        *,
+        timeout: bool = False,
+        bytes_in: int = 0,
+        bytes_out: int = 0,
+    ) -> None:
+        """
+        记录一次请求
+
+        Args:
+            method: HTTP 方法
+            path: 请求路径（会归一化为端点模板）
+            elapsed: 耗时（秒）
+            status: HTTP 状态码，未收到响应时为 None
+            timeout: 是否超时
+            bytes_in: 响应体字节数
+            bytes_out: 请求体字节数
+        """
+        paths = self._paths.get(method)
+        metrics = paths.get(path) if paths is not None else None
+        if metrics is None:
+            metrics = self._lookup(method, path)
+        elapsed_ms = elapsed * 1000
+        metrics.buckets[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        metrics.count += 1
+        metrics.total_ms += elapsed_ms
+        if elapsed_ms > metrics.max_ms:
+            metrics.max_ms = elapsed_ms
+        if timeout:
+            metrics.timeouts += 1
+            label = "timeout"
+        elif status is None:
+            metrics.errors += 1
+            label = "error"
+        else:
+            label = _status_label(status)
+        metrics.statuses[label] = metrics.statuses.get(label, 0) + 1
+        metrics.bytes_in += bytes_in
+        metrics.bytes_out += bytes_out
+
+    def _lookup(self, method: str, path: str) -> EndpointMetrics:
+        """按归一化端点获取计数器，并缓存原始路径以便下次直接命中。"""
+        key = (method, normalize_endpoint(path))
+        metrics = self._endpoints.get(key)
+        if metrics is None:
+            metrics = self._endpoints[key] = EndpointMetrics()
+        paths = self._paths.setdefault(method, {})
+        if len(paths) < MAX_CACHED_PATHS:
+            paths[path] = metrics
+        return metrics
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """导出各端点统计（按请求次数降序）。"""
+        rows: List[Dict[str, Any]] = []
+        for (method, endpoint), metrics in self._endpoints.items():
+            rows.append({
+                "method": method,
+                "endpoint": endpoint,
+                "count": metrics.count,
+                "avg_ms": metrics.total_ms / metrics.count if metrics.count else 0.0,
+                "p50_ms": metrics.percentile(0.50),
+                "p95_ms": metrics.percentile(0.95),
+                "p99_ms": metrics.percentile(0.99),
+                "max_ms": metrics.max_ms,
+                "statuses": dict(metrics.statuses),
+                "timeouts": metrics.timeouts,
+                "errors": metrics.errors,
+                "bytes_in": metrics.bytes_in,
+                "bytes_out": metrics.bytes_out,
+            })
+        rows.sort(key=lambda row: row["count"], reverse=True)
+        return rows
+
+    def reset(self) -> None:
+        self._endpoints.clear()
+        self._paths.clear()
+
+
+__all__ = ["ApiMetrics", "EndpointMetrics", "LATENCY_BUCKETS_MS"]
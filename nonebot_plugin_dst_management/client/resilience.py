@@ -0,0 +1,168 @@
+"""
+调用韧性工具
+
+提供带抖动退避的重试执行器与按主机划分的熔断器，DMP 客户端与 AI 调用共用。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from loguru import logger
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """重试策略"""
+
+    retries: int = 3
+    backoff: float = 0.5
+    max_backoff: float = 4.0
+
+
+T = TypeVar("T")
+
+
+async def run_with_retry(
+    func: Callable[[], Awaitable[T]],
+    policy: RetryPolicy,
+    retry_on: Tuple[type[Exception], ...],
+    *,
+    label: str = "调用",
+    error_type: type[Exception] = RuntimeError,
+) -> T:
+    """统一的重试执行器"""
+
+    last_error: Optional[Exception] = None
+    for attempt in range(1, policy.retries + 1):
+        try:
+            return await func()
+        except retry_on as exc:
+            last_error = exc
+            if attempt >= policy.retries:
+                break
+            delay = min(policy.max_backoff, policy.backoff * (2 ** (attempt - 1)))
+            # 加入随机抖动，避免多个客户端同时重试导致惊群效应
+            delay = delay * (0.8 + random.random() * 0.4)
+            logger.warning("{label}失败，{attempt}/{total} 次重试，{delay:.2f}s 后重试：{err}",
+                           label=label,
+                           attempt=attempt,
+                           total=policy.retries,
+                           delay=delay,
+                           err=exc)
+            await asyncio.sleep(delay)
+        except Exception:
+            raise
+    if last_error is not None:
+        raise last_error
+    raise error_type(f"{label}失败")
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    连续失败达到阈值后进入 open 状态，在恢复时间内直接拒绝请求；
+    恢复时间过后进入 half_open，仅放行一个探测请求，成功则恢复、失败则重新熔断。
+
+    Attributes:
+        failure_threshold: 触发熔断的连续失败次数
+        recovery_timeout: 熔断持续时间（秒）
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout = recovery_timeout
+        self.failures = 0
+        self.rejected = 0
+        self.opened_count = 0
+        self._opened_at: Optional[float] = None
+        self._probe_started: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.recovery_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        """判断当前是否放行请求（half_open 时只放行一个探测请求）。"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN:
+            now = time.monotonic()
+            # 探测请求被取消而未上报结果时，超过恢复时间后允许新的探测
+            if self._probe_started is None or now - self._probe_started >= self.recovery_timeout:
+                self._probe_started = now
+                return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+        self._probe_started = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        probing = self._probe_started is not None
+        if probing or self.failures >= self.failure_threshold:
+            if self._opened_at is None or probing:
+                self.opened_count += 1
+            self._opened_at = time.monotonic()
+            self._probe_started = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取熔断器状态快照（用于诊断）。"""
+        state = self.state
+        retry_in = 0.0
+        if state == self.OPEN and self._opened_at is not None:
+            retry_in = max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+        return {
+            "state": state,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "opened_count": self.opened_count,
+            "retry_in": round(retry_in, 1),
+        }
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(
+    host: str,
+    failure_threshold: int = 5,
+    recovery_timeout: float = 30.0,
+) -> CircuitBreaker:
+    """获取（或创建）指定主机的熔断器，同一主机的客户端共享状态。"""
+    breaker = _BREAKERS.get(host)
+    if breaker is None:
+        breaker = CircuitBreaker(failure_threshold, recovery_timeout)
+        _BREAKERS[host] = breaker
+    return breaker
+
+
+def get_circuit_breaker_states() -> Dict[str, Dict[str, Any]]:
+    """获取所有主机的熔断器状态。"""
+    return {host: breaker.snapshot() for host, breaker in _BREAKERS.items()}
+
+
+__all__ = [
+    "CircuitBreaker",
+    "RetryPolicy",
+    "get_circuit_breaker",
+    "get_circuit_breaker_states",
+    "run_with_retry",
+]
@@ -0,0 +1,204 @@
+"""
+存档传输辅助
+
+提供流式下载/上传共用的进度回调、大小限制与文件名解析工具。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import os
+import re
+import time
+import uuid
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Union
+from urllib.parse import unquote
+
+# 进度回调：(已传输字节数, 总字节数或 None) -> None / Awaitable[None]
+ProgressCallback = Callable[[int, Optional[int]], Union[None, Awaitable[None]]]
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# multipart 头部参数转义（与 httpx 相同的 HTML5 表单编码）：引号、反斜杠与控制字符
+_FORM_PARAM_REPLACEMENTS = {'"': "%22", "\\": "\\\\"}
+_FORM_PARAM_REPLACEMENTS.update(
+    {chr(c): f"%{c:02X}" for c in range(0x20) if c != 0x1B}
+)
+_FORM_PARAM_PATTERN = re.compile(
+    "|".join(re.escape(char) for char in _FORM_PARAM_REPLACEMENTS)
+)
+
+
+def quote_form_param(value: str) -> str:
+    """转义 Content-Disposition 中的 name/filename 参数，避免引号或换行破坏头部。"""
+    return _FORM_PARAM_PATTERN.sub(lambda match: _FORM_PARAM_REPLACEMENTS[match.group(0)], value)
+
+
+class TransferTooLargeError(Exception):
+    """传输内容超过大小上限"""
+
+    def __init__(self, limit: int) -> None:
+        super().__init__(f"文件超过大小上限（{format_bytes(limit)}）")
+        self.limit = limit
+
+
+async def notify_progress(
+    callback: Optional[ProgressCallback],
+    transferred: int,
+    total: Optional[int],
+) -> None:
+    """调用进度回调（兼容同步与异步回调），回调异常不影响传输。"""
+    if callback is None:
+        return
+    try:
+        result = callback(transferred, total)
+        if inspect.isawaitable(result):
+            await result
+    except Exception:
+        pass
+
+
+class MultipartFileStream:
+    """
+    流式 multipart/form-data 请求体
+
+    依次产出表单字段与文件头、按块读取的文件内容、结尾分隔符；
+    内存中最多只保留一个块。请求体长度预先计算，便于发送 Content-Length。
+
+    Attributes:
+        content_type: 含 boundary 的 Content-Type 头
+        content_length: 请求体总字节数
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        fields: Optional[Dict[str, str]] = None,
+        *,
+        field_name: str = "file",
+        filename: Optional[str] = None,
+        file_content_type: str = "application/zip",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        rate_limit: Optional[int] = None,
+        progress: Optional[ProgressCallback] = None,
+    ) -> None:
+        self.file_path = file_path
+        self.file_size = os.path.getsize(file_path)
+        self.chunk_size = max(1, chunk_size)
+        self.rate_limit = rate_limit if rate_limit and rate_limit > 0 else None
+        self.progress = progress
+
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        name = quote_form_param(filename or os.path.basename(file_path))
+        parts = []
+        for key, value in (fields or {}).items():
+            parts.append(
+                f"--{boundary}\r\n"
+                f'Content-Disposition: form-data; name="{quote_form_param(key)}"\r\n\r\n'
+                f"{value}\r\n"
+            )
+        parts.append(
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{quote_form_param(field_name)}"; '
+            f'filename="{name}"\r\n'
+            f"Content-Type: {file_content_type}\r\n\r\n"
+        )
+        self._preamble = "".join(parts).encode("utf-8")
+        self._epilogue = f"\r\n--{boundary}--\r\n".encode("utf-8")
+        self.content_length = len(self._preamble) + self.file_size + len(self._epilogue)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        started = time.monotonic()
+        sent = 0
+        yield self._preamble
+        # 文件读取放到线程中执行，慢速磁盘/NFS 不阻塞事件循环
+        file_handle = await asyncio.to_thread(open, self.file_path, "rb")
+        try:
+            while True:
+                chunk = await asyncio.to_thread(file_handle.read, self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+                sent += len(chunk)
+                await notify_progress(self.progress, sent, self.file_size)
+                if self.rate_limit:
+                    # 按累计发送量限速：实际耗时短于应有耗时则等待差值
+                    delay = sent / self.rate_limit - (time.monotonic() - started)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+        finally:
+            file_handle.close()
+        yield self._epilogue
+
+
+async def write_chunks(
+    chunks: AsyncIterator[bytes],
+    path: Union[str, "os.PathLike[str]"],
+    *,
+    max_bytes: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    total: Optional[int] = None,
+) -> int:
+    """
+    将异步字节流写入文件，返回写入字节数
+
+    Raises:
+        TransferTooLargeError: 累计字节数超过 max_bytes（已写入的部分由调用方清理）
+    """
+    written = 0
+    # 文件写入在线程中执行，避免阻塞事件循环
+    file_handle = await asyncio.to_thread(open, path, "wb")
+    try:
+        async for chunk in chunks:
+            written += len(chunk)
+            if max_bytes is not None and written > max_bytes:
+                raise TransferTooLargeError(max_bytes)
+            await asyncio.to_thread(file_handle.write, chunk)
+            await notify_progress(progress, written, total)
+    finally:
+        await asyncio.to_thread(file_handle.close)
+    return written
+
+
+def parse_content_disposition(header: str) -> Optional[str]:
+    """从 Content-Disposition 中解析安全的文件名（仅保留 basename，无效名返回 None）。"""
+    if not header:
+        return None
+    match = re.search(r"filename\*\s*=\s*(?:[\w-]+'[^']*')?([^;]+)", header, re.IGNORECASE)
+    if match:
+        name = unquote(match.group(1).strip().strip('"'))
+    else:
+        match = re.search(r'filename\s*=\s*"?([^";]+)"?', header, re.IGNORECASE)
+        if not match:
+            return None
+        name = match.group(1).strip()
+    name = os.path.basename(name.replace("\\", "/")).strip()
+    # 空名、"." 与 ".." 不是文件名，交由调用方使用默认名
+    if name in ("", ".", ".."):
+        return None
+    return name
+
+
+def format_bytes(size: int) -> str:
+    """格式化字节数为可读字符串。"""
+    value = float(size)
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            return f"{value:.0f}{unit}" if unit == "B" else f"{value:.1f}{unit}"
+        value /= 1024
+    return f"{value:.1f}GB"
+
+
+__all__ = [
+    "DEFAULT_CHUNK_SIZE",
+    "MultipartFileStream",
+    "ProgressCallback",
+    "TransferTooLargeError",
+    "format_bytes",
+    "notify_progress",
+    "parse_content_disposition",
+    "quote_form_param",
+    "write_chunks",
+]
@@ -5,7 +5,7 @@ Alconna 命令模块 (on_alconna 架构)
 命令在各子模块导入时自动注册到 NoneBot。
 
 已迁移：
-- 房间管理命令 (list, info, start, stop, restart)
+- 房间管理命令 (list, info, dashboard, start, stop, restart)
 - 控制台命令 (console, announce)
 - 玩家管理命令 (players, kick)
 - 帮助命令 (help)
@@ -16,9 +16,10 @@ Alconna 命令模块 (on_alconna 架构)
 - 备份管理命令 (backup list, create, restore)
 - 模组管理命令 (mod search, list, add, remove, check, config save)
 - 存档管理命令 (archive upload, download, replace, validate)
-- 签到命令 (sign bind, sign unbind, sign)
+- 签到命令 (sign bind, sign unbind, sign, sign rank)
 - 默认房间命令 (默认房间, 清除默认, 查看默认)
 - 自动发现命令 (room scan, room import)
+- 运行统计命令 (stats api)
 """
 
 from .base import (
@@ -39,16 +40,19 @@ from .room import (
     room_start_command,
     room_stop_command,
     room_restart_command,
+    room_dashboard_command,
     list_matcher,
     info_matcher,
     start_matcher,
     stop_matcher,
     restart_matcher,
+    dashboard_matcher,
     handle_room_list,
     handle_room_info,
     handle_room_start,
     handle_room_stop,
     handle_room_restart,
+    handle_room_dashboard,
 )
 from .console import (
     console_command,
@@ -140,12 +144,15 @@ from .sign import (
     sign_bind_command,
     sign_unbind_command,
     sign_command,
+    sign_rank_command,
     sign_bind_matcher,
     sign_unbind_matcher,
     sign_matcher,
+    sign_rank_matcher,
     handle_sign_bind,
     handle_sign_unbind,
     handle_sign,
+    handle_sign_rank,
 )
 from .default_room import (
     set_default_room_command,
@@ -166,6 +173,11 @@ from .auto_discovery import (
     handle_scan,
     handle_import,
 )
+from .stats import (
+    stats_command,
+    stats_matcher,
+    handle_stats,
+)
 
 __all__ = [
     # Base
@@ -184,16 +196,19 @@ __all__ = [
     "room_start_command",
     "room_stop_command",
     "room_restart_command",
+    "room_dashboard_command",
     "list_matcher",
     "info_matcher",
     "start_matcher",
     "stop_matcher",
     "restart_matcher",
+    "dashboard_matcher",
     "handle_room_list",
     "handle_room_info",
     "handle_room_start",
     "handle_room_stop",
     "handle_room_restart",
+    "handle_room_dashboard",
     # Console commands
     "console_command",
     "announce_command",
@@ -274,12 +289,15 @@ __all__ = [
     "sign_bind_command",
     "sign_unbind_command",
     "sign_command",
+    "sign_rank_command",
     "sign_bind_matcher",
     "sign_unbind_matcher",
     "sign_matcher",
+    "sign_rank_matcher",
     "handle_sign_bind",
     "handle_sign_unbind",
     "handle_sign",
+    "handle_sign_rank",
     # Default room commands
     "set_default_room_command",
     "clear_default_room_command",
@@ -297,4 +315,8 @@ __all__ = [
     "import_matcher",
     "handle_scan",
     "handle_import",
+    # Stats commands
+    "stats_command",
+    "stats_matcher",
+    "handle_stats",
 ]
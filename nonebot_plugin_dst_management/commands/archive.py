@@ -7,7 +7,7 @@
 
 from __future__ import annotations
 
-from typing import Optional
+from typing import Any, Awaitable, Callable, Optional
 
 from arclet.alconna import Alconna, Args, CommandMeta
 from nonebot.adapters.onebot.v11 import Message
@@ -16,6 +16,7 @@ from nonebot.internal.adapter import Event
 from nonebot_plugin_alconna import Match, AlconnaMatch, on_alconna
 
 from ..client.api_client import DSTApiClient
+from ..client.transfer import format_bytes
 from ..utils.permission import ADMIN_PERMISSION, USER_PERMISSION, check_group
 from ..helpers.formatters import (
     format_error,
@@ -78,6 +79,36 @@ def _extract_room_and_source(raw: str) -> Optional[tuple[int, str]]:
     return int(room_id_str), source.strip()
 
 
+def _progress_reporter(
+    matcher: Any,
+    action: str,
+    step: int = 25,
+) -> Callable[[int, Optional[int]], Awaitable[None]]:
+    """生成传输进度回调，每跨过 step% 发送一次进度消息（总大小未知时不发送）。"""
+    state = {"next": step}
+
+    async def report(transferred: int, total: Optional[int]) -> None:
+        if not total:
+            return
+        percent = transferred * 100 // total
+        if percent < state["next"] or percent >= 100:
+            return
+        state["next"] = (percent // step + 1) * step
+        done, size = format_bytes(transferred), format_bytes(total)
+        await matcher.send(format_info(f"{action} {percent}%（{done}/{size}）"))
+
+    return report
+
+
+def _upload_options(service: ArchiveService, matcher: Any) -> dict[str, Any]:
+    """上传/替换存档的流式发送参数（进度消息、限速、块大小）。"""
+    return {
+        "progress": _progress_reporter(matcher, "已上传"),
+        "rate_limit": service.upload_rate_limit or None,
+        "chunk_size": service.chunk_size,
+    }
+
+
 # ========== Alconna 命令定义 ==========
 
 archive_upload_command = Alconna(
@@ -236,7 +267,9 @@ async def handle_archive_upload(
             return
 
         await archive_upload_matcher.send(format_info("正在上传存档..."))
-        upload_result = await client.upload_archive(room_id, archive_path)
+        upload_result = await client.upload_archive(
+            room_id, archive_path, **_upload_options(service, archive_upload_matcher)
+        )
         if upload_result.get("success"):
             await remember_room(event, room_id)
             await archive_upload_matcher.finish(format_success("存档上传成功"))
@@ -280,12 +313,22 @@ async def handle_archive_download(
     elif resolved.source == RoomSource.DEFAULT:
         await archive_download_matcher.send(format_info(f"未指定房间ID，使用默认房间 {rid}..."))
 
-    if not hasattr(client, "download_archive"):
+    if hasattr(client, "download_archive_to_file"):
+        await archive_download_matcher.send(format_info("正在打包存档..."))
+        result = await client.download_archive_to_file(
+            rid,
+            service.work_dir,
+            max_bytes=service.max_bytes or None,
+            progress=_progress_reporter(archive_download_matcher, "已下载"),
+            chunk_size=service.chunk_size,
+        )
+    elif hasattr(client, "download_archive"):
+        await archive_download_matcher.send(format_info("正在打包存档..."))
+        result = await client.download_archive(rid)
+    else:
         await archive_download_matcher.finish(format_error("当前 API 客户端未实现存档下载"))
         return
 
-    await archive_download_matcher.send(format_info("正在打包存档..."))
-    result = await client.download_archive(rid)
     if not result.get("success"):
         await archive_download_matcher.finish(format_error(f"存档打包失败：{result.get('error')}"))
         return
@@ -294,16 +337,20 @@ async def handle_archive_download(
     url = data.get("url") or data.get("downloadUrl") or data.get("download_url")
     filename = data.get("filename")
     size = data.get("size")
+    saved_path = data.get("path")
     content = data.get("content")
 
     lines = ["✅ 存档已生成"]
     if filename:
         lines.append(f"- 文件名：{filename}")
     if size:
-        lines.append(f"- 大小：{size}")
+        lines.append(f"- 大小：{format_bytes(size) if isinstance(size, int) else size}")
     if url:
         lines.append("")
         lines.append(url)
+    elif saved_path:
+        lines.append("")
+        lines.append(f"已保存到服务端：{saved_path}")
     elif content:
         temp_path = service.work_dir / (filename or f"archive_{rid}.zip")
         try:
@@ -384,7 +431,9 @@ async def handle_archive_replace(
             return
 
         await archive_replace_matcher.send(format_info("正在替换存档..."))
-        replace_result = await client.replace_archive(room_id, archive_path)
+        replace_result = await client.replace_archive(
+            room_id, archive_path, **_upload_options(service, archive_replace_matcher)
+        )
         if replace_result.get("success"):
             await remember_room(event, room_id)
             await archive_replace_matcher.finish(format_success("存档替换成功"))
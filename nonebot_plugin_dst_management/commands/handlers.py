@@ -34,12 +34,13 @@ def init(api_client: DSTApiClient, ai_client: Optional[AIClient] = None) -> None
     _ai_client = ai_client
 
     # 核心命令（仅需 api_client）
-    from . import room, console, player, backup, help as help_cmd, config_ui, archive
+    from . import room, console, player, backup, help as help_cmd, config_ui, archive, stats
     room.init(api_client)
     console.init(api_client)
     player.init(api_client)
     backup.init(api_client)
     archive.init(api_client)
+    stats.init(api_client)
     help_cmd.init()
     config_ui.init()
 
@@ -103,6 +103,7 @@ def _help_main_menu() -> str:
             [
                 "📋 房间列表: /dst list",
                 "🔎 房间详情: /dst info",
+                "📊 房间总览: /dst dashboard",
                 "🚀 启动 / 🛑 关闭 / 🔄 重启: /dst start|stop|restart 🔒",
             ]
         ),
@@ -124,6 +125,7 @@ def _help_main_menu() -> str:
                 "📌 默认房间: /dst 默认房间 / 查看默认 / 清除默认",
                 "🔍 自动发现: /dst room scan 🔒",
                 "📥 导入发现: /dst room import --select ... 🔒",
+                "📊 运行统计: /dst stats api | db 🔒",
             ]
         ),
         "",
@@ -139,6 +141,7 @@ def _help_main_menu_markdown() -> str:
         "## 🏠 基础管理",
         "- 📋 房间列表: `/dst list`",
         "- 🔎 房间详情: `/dst info`",
+        "- 📊 房间总览: `/dst dashboard`",
         "- 🚀 启动 / 🛑 关闭 / 🔄 重启: `/dst start|stop|restart` (🔒)",
         "",
         "## 👥 玩家管理",
@@ -153,6 +156,7 @@ def _help_main_menu_markdown() -> str:
         "- 📌 默认房间: `/dst 默认房间` / `/dst 查看默认` / `/dst ���除默认`",
         "- 🔍 自动发现: `/dst room scan` (🔒)",
         "- 📥 导入发现: `/dst room import ...` (🔒)",
+        "- 📊 运行统计: `/dst stats api` / `/dst stats db` (🔒)",
         "",
         f"{ICON_TIP} 发送 `/dst help 基础|玩家|备份|设置` 查看完整用法",
     ]
@@ -175,6 +179,12 @@ def _help_base() -> str:
             "查看房间详细信息",
             aliases=("dst 房间详情", "dst 详情", "dst 房间信息", "dst 查房间详情", "dst 查详情"),
         ),
+        HelpItem(
+            "📊",
+            "房间总览",
+            "/dst dashboard",
+            "一次查看所有房间的状态、在线人数与世界数",
+        ),
         HelpItem(
             "🚀",
             "启动房间",
@@ -341,6 +351,20 @@ def _help_settings() -> str:
             admin_only=True,
             aliases=("dst 房间导入", "dst 导入房间", "dst room setup", "dst setup"),
         ),
+        HelpItem(
+            "📊",
+            "运行统计",
+            "/dst stats api",
+            "查看各 DMP 接口的请求次数、p50/p95/p99 延迟与状态码",
+            admin_only=True,
+        ),
+        HelpItem(
+            "🗄️",
+            "数据库统计",
+            "/dst stats db [on|off|reset]",
+            "查看按语句聚合的查询耗时、慢查询及其查询计划；on/off 开关查询分析，reset 清空统计",
+            admin_only=True,
+        ),
     ]
     lines = ["⚙️ 系统设置", ""]
     lines.extend(_render_items(items))
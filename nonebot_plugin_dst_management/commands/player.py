@@ -6,6 +6,7 @@
 
 from __future__ import annotations
 
+import asyncio
 from typing import Optional
 
 from arclet.alconna import Alconna, Args, CommandMeta
@@ -14,10 +15,12 @@ from nonebot.internal.adapter import Event
 from nonebot_plugin_alconna import Match, AlconnaMatch, on_alconna
 
 from ..client.api_client import DSTApiClient
+from ..config import get_dst_config
 from ..utils.permission import ADMIN_PERMISSION, USER_PERMISSION
 from ..helpers.formatters import format_error, format_success
 from ..helpers.commands import parse_room_id
 from ..helpers.room_context import RoomSource, remember_room, resolve_room_id
+from ..services.monitors.room_poller import format_snapshot_age, get_snapshot_store
 
 
 # 全局 API 客户端，由 init 函数设置
@@ -79,16 +82,30 @@ async def handle_players(
 
     actual_room_id = int(resolved.room_id)
 
-    room_result = await client.get_room_info(actual_room_id)
-    room_name = "未知房间"
-    if room_result["success"]:
-        room_name = room_result["data"].get("gameName", "未知房间")
-
-    result = await client.get_online_players(actual_room_id)
-    if not result["success"]:
-        await players_matcher.finish(format_error(f"获取玩家列表失败：{result['error']}"))
-
-    players = result["data"] or []
+    # 启用后台轮询且快照足够新时直接读取，不请求 DMP
+    store = get_snapshot_store()
+    max_age = get_dst_config().dst_room_snapshot_max_age
+    snapshot = store.get_room(actual_room_id) if store else None
+    snapshot_players = store.get_players(actual_room_id, max_age) if store else None
+    age_hint = ""
+
+    if snapshot is not None and snapshot_players is not None:
+        room_name = snapshot.room.get("gameName", "未知房间")
+        players = snapshot_players
+        age_hint = format_snapshot_age(snapshot.players_age())
+    else:
+        room_result, result = await asyncio.gather(
+            client.get_room_info(actual_room_id),
+            client.get_online_players(actual_room_id),
+        )
+        room_name = "未知房间"
+        if room_result["success"]:
+            room_name = room_result["data"].get("gameName", "未知房间")
+
+        if not result["success"]:
+            await players_matcher.finish(format_error(f"获取玩家列表失败：{result['error']}"))
+
+        players = result["data"] or []
     await remember_room(event, actual_room_id)
 
     lines = [f"👥 在线玩家 ({room_name})", f"共 {len(players)} 人", ""]
@@ -100,6 +117,9 @@ async def handle_players(
             uid = player.get("uid", "未知")
             prefab = player.get("prefab", "未知")
             lines.append(f"{idx}. {nickname} ({uid}) - {prefab}")
+    if age_hint:
+        lines.append("")
+        lines.append(age_hint)
 
     await players_matcher.finish("\n".join(lines))
 
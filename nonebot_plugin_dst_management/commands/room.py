@@ -6,7 +6,8 @@
 
 from __future__ import annotations
 
-from typing import Optional
+import asyncio
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
 
 from arclet.alconna import Alconna, Args, CommandMeta
 from nonebot.internal.adapter import Event
@@ -14,6 +15,7 @@ from nonebot.internal.adapter import Event
 from nonebot_plugin_alconna import Match, AlconnaMatch, on_alconna
 
 from ..client.api_client import DSTApiClient
+from ..config import get_dst_config
 from ..utils.permission import ADMIN_PERMISSION, USER_PERMISSION
 from ..helpers.formatters import (
     format_error,
@@ -21,6 +23,7 @@ from ..helpers.formatters import (
     status_badge,
 )
 from ..helpers.room_context import remember_room, resolve_room_id
+from ..services.monitors.room_poller import format_snapshot_age, get_snapshot_store
 from ..services.monitors.sign_monitor import get_sign_monitor
 
 
@@ -35,6 +38,96 @@ def get_api_client() -> DSTApiClient:
     return _api_client
 
 
+# ========== 纯逻辑辅助函数 ==========
+
+DASHBOARD_PAGE_SIZE = 50
+
+
+async def fetch_all_rooms(
+    client: DSTApiClient,
+    semaphore: asyncio.Semaphore,
+    page_size: int = DASHBOARD_PAGE_SIZE,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """获取所有分页的房间，返回 (房间列表, 错误信息)。首页之后的分页并发获取。"""
+    first = await client.get_room_list(page=1, page_size=page_size)
+    if not first["success"]:
+        return [], first.get("error") or "未知错误"
+
+    data = first["data"] or {}
+    rooms: List[Dict[str, Any]] = list(data.get("rows") or [])
+    total = int(data.get("totalCount") or len(rooms))
+    total_pages = max(1, (total + page_size - 1) // page_size)
+
+    async def fetch_page(page: int) -> List[Dict[str, Any]]:
+        async with semaphore:
+            result = await client.get_room_list(page=page, page_size=page_size)
+        if not result["success"]:
+            return []
+        return list((result["data"] or {}).get("rows") or [])
+
+    pages = await asyncio.gather(*(fetch_page(page) for page in range(2, total_pages + 1)))
+    for rows in pages:
+        rooms.extend(rows)
+    return rooms, None
+
+
+async def collect_dashboard(
+    client: DSTApiClient,
+    rooms: List[Dict[str, Any]],
+    semaphore: asyncio.Semaphore,
+) -> List[Dict[str, Any]]:
+    """并发获取每个房间的在线玩家与世界列表（同时发出的请求数受 semaphore 限制）。"""
+
+    async def limited(request: Awaitable[Dict[str, Any]]) -> Dict[str, Any]:
+        # 每个请求单独占用一个并发名额
+        async with semaphore:
+            return await request
+
+    async def collect(room: Dict[str, Any]) -> Dict[str, Any]:
+        room_id = int(room["id"])
+        players_result, worlds_result = await asyncio.gather(
+            limited(client.get_online_players(room_id)),
+            limited(client.get_world_list(room_id)),
+        )
+        players = (players_result["data"] or []) if players_result["success"] else None
+        worlds = (
+            (worlds_result["data"] or {}).get("rows", []) if worlds_result["success"] else None
+        )
+        return {
+            "id": room_id,
+            "name": room.get("gameName", "未知"),
+            "status": bool(room.get("status")),
+            "max_players": room.get("maxPlayer"),
+            "players": players,
+            "worlds": worlds,
+        }
+
+    return list(await asyncio.gather(*(collect(room) for room in rooms)))
+
+
+def format_dashboard(rows: List[Dict[str, Any]]) -> str:
+    """渲染多房间总览表。"""
+    running = sum(1 for row in rows if row["status"])
+    online = sum(len(row["players"]) for row in rows if row["players"])
+    lines = [
+        "📊 房间总览",
+        f"房间: {len(rows)} 个（运行中 {running}） | 在线玩家: {online} 人",
+        "",
+        "ID | 名称 | 状态 | 在线 | 世界",
+    ]
+    for row in sorted(rows, key=lambda item: item["id"]):
+        players = "?" if row["players"] is None else str(len(row["players"]))
+        if row["max_players"]:
+            players = f"{players}/{row['max_players']}"
+        worlds = "?" if row["worlds"] is None else str(len(row["worlds"]))
+        status = "🟢 运行中" if row["status"] else "🔴 已停止"
+        lines.append(f"{row['id']} | {row['name']} | {status} | {players} | {worlds}")
+    if any(row["players"] is None or row["worlds"] is None for row in rows):
+        lines.append("")
+        lines.append("? 表示该项获取失败")
+    return "\n".join(lines)
+
+
 # ========== 命令定义 + on_alconna 匹配器 ==========
 
 room_list_command = Alconna(
@@ -87,6 +180,15 @@ room_restart_command = Alconna(
     ),
 )
 
+room_dashboard_command: Alconna[Any] = Alconna(
+    "dst dashboard",
+    meta=CommandMeta(
+        description="查看所有房间总览",
+        usage="/dst dashboard",
+        example="/dst dashboard",
+    ),
+)
+
 # ========== on_alconna 匹配器 ==========
 
 list_matcher = on_alconna(room_list_command, permission=USER_PERMISSION, priority=10, block=True)
@@ -94,6 +196,9 @@ info_matcher = on_alconna(room_info_command, permission=USER_PERMISSION, priorit
 start_matcher = on_alconna(room_start_command, permission=ADMIN_PERMISSION, priority=10, block=True)
 stop_matcher = on_alconna(room_stop_command, permission=ADMIN_PERMISSION, priority=10, block=True)
 restart_matcher = on_alconna(room_restart_command, permission=ADMIN_PERMISSION, priority=10, block=True)
+dashboard_matcher = on_alconna(
+    room_dashboard_command, permission=USER_PERMISSION, priority=10, block=True
+)
 
 
 # ========== 命令处理函数 ==========
@@ -107,23 +212,51 @@ async def handle_room_list(
     client = get_api_client()
     page_num = page.result if page.available else 1
 
-    result = await client.get_room_list(page=page_num, page_size=10)
-    if not result["success"]:
-        await list_matcher.finish(format_error(f"获取房间列表失败：{result['error']}"))
+    # 启用后台轮询时优先使用房间列表快照
+    store = get_snapshot_store()
+    snapshot_rows = store.list_rooms(get_dst_config().dst_room_snapshot_max_age) if store else None
+    age_hint = ""
+    if store is not None and snapshot_rows is not None:
+        rooms = snapshot_rows[(page_num - 1) * 10:page_num * 10]
+        total = len(snapshot_rows)
+        age_hint = format_snapshot_age(store.rooms_age())
+    else:
+        result = await client.get_room_list(page=page_num, page_size=10)
+        if not result["success"]:
+            await list_matcher.finish(format_error(f"获取房间列表失败：{result['error']}"))
 
-    data = result["data"]
-    rooms = data.get("rows", [])
-    total = data.get("totalCount", 0)
+        data = result["data"]
+        rooms = data.get("rows", [])
+        total = data.get("totalCount", 0)
     total_pages = max(1, (total + 9) // 10)
 
     lines = [f"📋 房间列表 (第 {page_num}/{total_pages} 页)", f"总计: {total} 个房间", ""]
     for room in rooms:
         status = "🟢 运行中" if room.get("status") else "🔴 已停止"
         lines.append(f"{room['id']}. {room.get('gameName', '未知')} - {status}")
+    if age_hint:
+        lines.append("")
+        lines.append(age_hint)
 
     await list_matcher.finish("\n".join(lines))
 
 
+@dashboard_matcher.handle()
+async def handle_room_dashboard(event: Event) -> None:
+    """处理房间总览命令"""
+    client = get_api_client()
+    semaphore = asyncio.Semaphore(max(1, get_dst_config().dst_dashboard_concurrency))
+
+    rooms, error = await fetch_all_rooms(client, semaphore)
+    if error:
+        await dashboard_matcher.finish(format_error(f"获取房间列表失败：{error}"))
+    if not rooms:
+        await dashboard_matcher.finish("📊 房间总览\n暂无房间")
+
+    rows = await collect_dashboard(client, rooms, semaphore)
+    await dashboard_matcher.finish(format_dashboard(rows))
+
+
 @info_matcher.handle()
 async def handle_room_info(
     event: Event,
@@ -142,22 +275,33 @@ async def handle_room_info(
 
     actual_room_id = int(resolved.room_id)
 
-    room_result = await client.get_room_info(actual_room_id)
+    # 启用后台轮询时，在线玩家优先读取快照
+    store = get_snapshot_store()
+    max_age = get_dst_config().dst_room_snapshot_max_age
+    snapshot_players = store.get_players(actual_room_id, max_age) if store else None
+
+    # 其余读取互不依赖，并发发出
+    reads = [client.get_room_info(actual_room_id), client.get_world_list(actual_room_id)]
+    if snapshot_players is None:
+        reads.append(client.get_online_players(actual_room_id))
+    room_result, worlds_result, *rest = await asyncio.gather(*reads)
+    players_result: Dict[str, Any] = (
+        rest[0] if rest else {"success": True, "data": snapshot_players}
+    )
     if not room_result["success"]:
         await info_matcher.finish(format_error(f"获取房间信息失败：{room_result['error']}"))
 
-    worlds_result = await client.get_world_list(actual_room_id)
     worlds = worlds_result["data"].get("rows", []) if worlds_result["success"] else []
-
-    players_result = await client.get_online_players(actual_room_id)
     players = players_result["data"] or [] if players_result["success"] else []
+    players_age_hint = ""
+    if store is not None and snapshot_players is not None:
+        snapshot = store.get_room(actual_room_id)
+        players_age_hint = format_snapshot_age(snapshot.players_age() if snapshot else None)
 
+    # 待发放奖励检查放到后台，复用已获取的在线玩家列表，不阻塞回复
     monitor = get_sign_monitor()
     if monitor:
-        try:
-            await monitor.check_room_pending_rewards(actual_room_id)
-        except Exception:
-            pass
+        monitor.schedule_room_check(actual_room_id, players if players_result["success"] else None)
 
     await remember_room(event, actual_room_id)
 
@@ -168,7 +312,7 @@ async def handle_room_info(
         f"模式: {room.get('gameMode', '未知')}",
         f"状态: {'运行中' if room.get('status') else '已停止'} {status_badge(room.get('status'))}",
         f"最大玩家: {room.get('maxPlayer', 0)}",
-        f"在线玩家: {len(players)} 人",
+        f"在线玩家: {len(players)} 人{players_age_hint}",
         "",
         "🌍 世界列表:",
     ]
@@ -254,15 +398,18 @@ __all__ = [
     "room_start_command",
     "room_stop_command",
     "room_restart_command",
+    "room_dashboard_command",
     "list_matcher",
     "info_matcher",
     "start_matcher",
     "stop_matcher",
     "restart_matcher",
+    "dashboard_matcher",
     "handle_room_list",
     "handle_room_info",
     "handle_room_start",
     "handle_room_stop",
     "handle_room_restart",
+    "handle_room_dashboard",
     "init",
 ]
@@ -17,6 +17,7 @@ from ..client.api_client import DSTApiClient
 from ..utils.permission import ADMIN_PERMISSION, USER_PERMISSION
 from ..helpers.formatters import format_error, format_info, format_success
 from ..helpers.room_context import remember_room, resolve_room_id
+from ..services.leaderboard_service import LeaderboardService, format_leaderboard, resolve_metric
 from ..services.monitors.sign_monitor import get_sign_monitor
 from ..services.sign_service import SignService
 
@@ -43,6 +44,15 @@ def get_sign_service() -> SignService:
     return _sign_service
 
 
+# 全局排行榜服务（缓存各房间前 N 名）
+_leaderboard_service = LeaderboardService()
+
+
+def get_leaderboard_service() -> LeaderboardService:
+    """获取排行榜服务"""
+    return _leaderboard_service
+
+
 def _extract_user_id(event: Any) -> Optional[str]:
     """从事件中提取用户 ID（兼容不同适配器）"""
     if event is None:
@@ -86,6 +96,16 @@ sign_unbind_command = Alconna(
     ),
 )
 
+sign_rank_command: Alconna[Any] = Alconna(
+    "dst sign rank",
+    Args["metric", str, "continuous"]["page", int, 1]["room_id", str, None],
+    meta=CommandMeta(
+        description="签到排行榜",
+        usage="/dst sign rank [连续|积分|次数] [页码] [房间ID]",
+        example="/dst sign rank 积分 1",
+    ),
+)
+
 sign_command = Alconna(
     "dst sign",
     Args["room_id", str, None],
@@ -100,6 +120,9 @@ sign_command = Alconna(
 
 sign_bind_matcher = on_alconna(sign_bind_command, permission=USER_PERMISSION, priority=10, block=True)
 sign_unbind_matcher = on_alconna(sign_unbind_command, permission=USER_PERMISSION, priority=10, block=True)
+sign_rank_matcher = on_alconna(
+    sign_rank_command, permission=USER_PERMISSION, priority=9, block=True
+)
 sign_matcher = on_alconna(sign_command, permission=USER_PERMISSION, priority=10, block=True)
 
 
@@ -159,6 +182,31 @@ async def handle_sign_unbind(
     await sign_unbind_matcher.finish(format_success(f"{result.message}，房间ID：{actual_room_id}"))
 
 
+@sign_rank_matcher.handle()
+async def handle_sign_rank(
+    event: Event,
+    metric: Match[str] = AlconnaMatch("metric"),
+    page: Match[int] = AlconnaMatch("page"),
+    room_id: Match[str] = AlconnaMatch("room_id"),
+) -> None:
+    """处理签到排行榜命令"""
+    metric_key = resolve_metric(metric.result if metric.available else None)
+    if metric_key is None:
+        await sign_rank_matcher.finish(format_error("用法：/dst sign rank [连续|积分|次数] [页码] [房间ID]"))
+        return
+
+    room_id_val = room_id.result if room_id.available else None
+    actual_room_id = await _resolve_room_id(event, room_id_val)
+    if actual_room_id is None:
+        await sign_rank_matcher.finish(format_error("请提供房间ID，或先使用一次带房间ID的命令以锁定房间，或设置默认房间"))
+        return
+
+    page_num = page.result if page.available else 1
+    result = await get_leaderboard_service().get_page(actual_room_id, metric_key, page=page_num)
+    await remember_room(event, actual_room_id)
+    await sign_rank_matcher.finish(format_leaderboard(result, actual_room_id))
+
+
 @sign_matcher.handle()
 async def handle_sign(
     event: Event,
@@ -206,11 +254,15 @@ __all__ = [
     "sign_bind_command",
     "sign_unbind_command",
     "sign_command",
+    "sign_rank_command",
     "sign_bind_matcher",
     "sign_unbind_matcher",
     "sign_matcher",
+    "sign_rank_matcher",
     "handle_sign_bind",
     "handle_sign_unbind",
     "handle_sign",
+    "handle_sign_rank",
+    "get_leaderboard_service",
     "init",
 ]
@@ -0,0 +1,224 @@
+"""
+运行统计命令 (on_alconna)
+
+提供诊断命令：
+- stats api：DMP 接口延迟与错误统计
+- stats db [on|off|reset]：数据库查询分析、慢查询与缓存统计
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from arclet.alconna import Alconna, Args, CommandMeta
+from nonebot.adapters.onebot.v11 import Message
+from nonebot.internal.adapter import Event
+
+from nonebot_plugin_alconna import Match, AlconnaMatch, on_alconna
+
+from ..client.api_client import DSTApiClient
+from ..client.transfer import format_bytes
+from ..database import (
+    configure_query_profiler,
+    get_last_room_buffer,
+    get_query_profiler,
+    get_sign_retention,
+    get_user_settings_cache_stats,
+)
+from ..helpers.formatters import format_error, format_info
+from ..utils.permission import ADMIN_PERMISSION, check_group
+
+
+# 全局 API 客户端
+_api_client: Optional[DSTApiClient] = None
+
+
+def get_api_client() -> DSTApiClient:
+    if _api_client is None:
+        raise RuntimeError("API 客户端未初始化，请先调用 init() 函数")
+    return _api_client
+
+
+# ========== 纯逻辑辅助函数 ==========
+
+
+def _format_ms(value: float) -> str:
+    return f"{value / 1000:.2f}s" if value >= 1000 else f"{value:.0f}ms"
+
+
+def format_api_stats(
+    rows: List[Dict[str, Any]],
+    request_stats: Optional[Dict[str, Any]] = None,
+) -> str:
+    """渲染 DMP 接口统计（每个端点一段）。"""
+    if not rows:
+        return "📊 DMP 接口统计\n\n暂无请求记录"
+
+    lines = ["📊 DMP 接口统计", ""]
+    for row in rows:
+        lines.append(f"{row['method']} {row['endpoint']} ×{row['count']}")
+        lines.append(
+            f"  p50 {_format_ms(row['p50_ms'])} | p95 {_format_ms(row['p95_ms'])}"
+            f" | p99 {_format_ms(row['p99_ms'])} | max {_format_ms(row['max_ms'])}"
+        )
+        statuses = " ".join(f"{code}:{count}" for code, count in sorted(row["statuses"].items()))
+        traffic = []
+        if row["bytes_in"]:
+            traffic.append(f"↓{format_bytes(row['bytes_in'])}")
+        if row["bytes_out"]:
+            traffic.append(f"↑{format_bytes(row['bytes_out'])}")
+        lines.append(f"  状态 {statuses}" + (f" | {' '.join(traffic)}" if traffic else ""))
+
+    if request_stats:
+        lines.append("")
+        lines.append(
+            f"请求合并：发出 {request_stats.get('issued', 0)}，合并 {request_stats.get('coalesced', 0)}"
+        )
+        cache = request_stats.get("cache")
+        if cache:
+            lines.append(f"响应缓存：命中 {cache['hits']}，未命中 {cache['misses']}，条目 {cache['entries']}")
+        players = request_stats.get("players")
+        if players:
+            lines.append(
+                f"在线玩家快照：命中 {players['hits']}，合并 {players['coalesced']}，房间 {players['rooms']}"
+            )
+        breaker = request_stats.get("breaker")
+        if breaker:
+            lines.append(f"熔断器：{breaker['state']}，已拒绝 {breaker['rejected']}")
+    return "\n".join(lines)
+
+
+def _shorten_sql(sql: str, width: int = 80) -> str:
+    return sql if len(sql) <= width else sql[: width - 1] + "…"
+
+
+def format_db_stats(
+    rows: List[Dict[str, Any]],
+    slow: List[Dict[str, Any]],
+    *,
+    enabled: bool,
+    threshold_ms: float,
+    settings_cache: Optional[Dict[str, Any]] = None,
+    last_room_writes: Optional[Dict[str, Any]] = None,
+    retention: Optional[Dict[str, Any]] = None,
+    limit: int = 10,
+) -> str:
+    """渲染数据库查询统计（按总耗时排序的前 limit 条语句 + 最近慢查询）。"""
+    state = f"已开启，慢查询阈值 {_format_ms(threshold_ms)}" if enabled else "未开启（/dst stats db on 开启）"
+    lines = ["🗄️ 数据库统计", "", f"查询分析：{state}"]
+
+    if rows:
+        lines.append("")
+        for row in rows[:limit]:
+            lines.append(_shorten_sql(row["sql"]))
+            lines.append(
+                f"  ×{row['count']} | 总计 {_format_ms(row['total_ms'])}"
+                f" | 平均 {_format_ms(row['avg_ms'])} | 最大 {_format_ms(row['max_ms'])}"
+            )
+    elif enabled:
+        lines.append("暂无查询记录")
+
+    if slow:
+        lines.append("")
+        lines.append("最近慢查询：")
+        for entry in slow[:5]:
+            lines.append(f"{_format_ms(entry['elapsed_ms'])} {_shorten_sql(entry['sql'])}")
+            lines.extend(f"  {step}" for step in entry["plan"])
+
+    if settings_cache:
+        lines.append("")
+        lines.append(
+            f"设置缓存：命中 {settings_cache['hits']}，未命中 {settings_cache['misses']}，"
+            f"条目 {settings_cache['entries']}/{settings_cache['max_entries']}"
+        )
+    if last_room_writes:
+        lines.append(
+            f"最近房间写入：排队 {last_room_writes['queued']}，跳过 {last_room_writes['skipped']}，"
+            f"批量提交 {last_room_writes['flushes']} 次"
+        )
+    if retention:
+        lines.append(
+            f"签到归档：保留 {retention['retention_days']} 天，已归档 {retention['archived']} 条，"
+            f"回收 {retention['pages_freed']} 页"
+        )
+    return "\n".join(lines)
+
+
+# ========== Alconna 命令定义 ==========
+
+stats_command: Alconna[Any] = Alconna(
+    "dst stats",
+    Args["target", str, "api"]["action", str, None],
+    meta=CommandMeta(
+        description="查看运行统计",
+        usage="/dst stats api | /dst stats db [on|off|reset]",
+        example="/dst stats db",
+    ),
+)
+
+stats_matcher = on_alconna(stats_command, permission=ADMIN_PERMISSION, priority=10, block=True)
+
+
+# ========== 命令处理 ==========
+
+
+@stats_matcher.handle()
+async def handle_stats(
+    event: Event,
+    target: Match[str] = AlconnaMatch("target"),
+    action: Match[str] = AlconnaMatch("action"),
+) -> None:
+    """处理运行统计命令"""
+    if not await check_group(event):
+        await stats_matcher.finish(format_error("当前群组未授权使用此功能"))
+        return
+
+    kind = (target.result if target.available else "api").strip().lower()
+    if kind == "api":
+        client = get_api_client()
+        text = format_api_stats(client.get_api_metrics(), client.get_request_stats())
+        await stats_matcher.finish(Message(text))
+        return
+
+    if kind != "db":
+        await stats_matcher.finish(format_info("用法：/dst stats api | /dst stats db [on|off|reset]"))
+        return
+
+    profiler = get_query_profiler()
+    operation = (action.result if action.available else "").strip().lower()
+    if operation in {"on", "off"}:
+        configure_query_profiler(operation == "on")
+        await stats_matcher.finish(format_info(f"数据库查询分析已{'开启' if operation == 'on' else '关闭'}"))
+        return
+    if operation == "reset":
+        profiler.reset()
+        await stats_matcher.finish(format_info("数据库查询统计已清空"))
+        return
+
+    retention = get_sign_retention()
+    text = format_db_stats(
+        profiler.snapshot(),
+        profiler.slow_queries(),
+        enabled=profiler.enabled,
+        threshold_ms=profiler.slow_threshold_ms,
+        settings_cache=get_user_settings_cache_stats(),
+        last_room_writes=get_last_room_buffer().stats(),
+        retention=retention.stats() if retention is not None else None,
+    )
+    await stats_matcher.finish(Message(text))
+
+
+def init(api_client: DSTApiClient) -> None:
+    """初始化运行统计命令"""
+    global _api_client
+    _api_client = api_client
+
+
+__all__ = [
+    "stats_command",
+    "stats_matcher",
+    "handle_stats",
+    "format_api_stats",
+    "format_db_stats",
+    "init",
+]
@@ -7,7 +7,7 @@
 import json
 import os
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
 from nonebot import get_driver
 
@@ -20,6 +20,68 @@ class DSTConfig(BaseModel):
     dst_api_url: str = "http://localhost:8080"
     dst_api_token: str = ""
     dst_timeout: int = 10
+
+    # DMP API 响应缓存（按端点 TTL，键如 "/room/player/online"）
+    dst_api_cache_enabled: bool = False
+    dst_api_cache_ttls: Dict[str, float] = Field(default_factory=dict)
+    dst_api_cache_max_entries: int = 1024
+
+    # DMP HTTP 连接池（API 请求与存档上传/下载共用）
+    dst_http_max_connections: int = 20
+    dst_http_max_keepalive_connections: int = 10
+    dst_http_keepalive_expiry: float = 30.0
+    dst_http2: bool = False
+
+    # 在线玩家列表按房间复用的时间（秒），签到高峰时同一房间只请求一次 DMP，0 表示不复用
+    dst_players_cache_ttl: float = 3.0
+
+    # /dst dashboard 并发请求数上限
+    dst_dashboard_concurrency: int = 8
+
+    # 房间状态后台轮询（可选），命令优先读取不超过 max_age 秒的快照
+    dst_room_poller_enabled: bool = False
+    dst_room_poll_active_interval: float = 10.0
+    dst_room_poll_idle_interval: float = 60.0
+    dst_room_poll_list_interval: float = 30.0
+    dst_room_poll_metrics_interval: float = 60.0
+    dst_room_poll_concurrency: int = 4
+    dst_room_snapshot_max_age: float = 30.0
+
+    # 最近操作房间（last_room_id）批量写入间隔（秒），0 表示每次立即写入
+    dst_last_room_flush_interval: float = 0.5
+
+    # 数据库查询分析（可选，/dst stats db 查看），超过阈值（毫秒）的语句记入慢查询日志
+    dst_db_profiling: bool = False
+    dst_db_slow_query_ms: float = 100.0
+
+    # 签到记录保留（可选）：超过天数的已发放记录定时归档为月度汇总并删除明细，0 表示不归档
+    dst_sign_retention_days: int = 0
+    dst_sign_retention_interval: float = 6 * 3600
+    dst_sign_retention_batch_size: int = 500
+
+    # 签到奖励批量发放：同一房间的待发放记录合并为控制台命令，单条命令最大长度（字符）
+    dst_sign_delivery_max_command_length: int = 4000
+    # 发放认领超时（秒），超时未完成的发放退回待发放
+    dst_sign_claim_timeout: float = 600.0
+
+    # 待发放奖励后台巡检（可选），无人新上线的房间检查间隔指数退避至 max_interval
+    dst_sign_sweeper_enabled: bool = False
+    dst_sign_sweep_interval: float = 30.0
+    dst_sign_sweep_max_interval: float = 600.0
+    dst_sign_sweep_concurrency: int = 4
+
+    # DMP 请求重试（仅幂等请求；写操作只在连接失败时重试）与熔断
+    dst_api_retries: int = 3
+    dst_api_retry_backoff: float = 0.5
+    dst_api_retry_max_backoff: float = 4.0
+    dst_api_breaker_threshold: int = 5
+    dst_api_breaker_recovery: float = 30.0
+
+    # 存档传输（流式写入磁盘，超过上限的下载会被中止）
+    dst_archive_max_bytes: int = 512 * 1024 * 1024
+    # 上传限速（字节/秒，0 表示不限速）与单次读取块大小
+    dst_archive_upload_rate_limit: int = 0
+    dst_archive_chunk_size: int = 64 * 1024
     
     # 权限配置
     dst_admin_users: List[int] = Field(default_factory=list)
@@ -133,6 +195,83 @@ def _apply_env_overrides(config: DSTConfig) -> DSTConfig:
         updates["dst_api_token"] = value
     if (value := env("DST_TIMEOUT")) is not None:
         updates["dst_timeout"] = int(value)
+    if (value := env("DST_API_CACHE_ENABLED")) is not None:
+        updates["dst_api_cache_enabled"] = _parse_bool(value)
+    if (value := env("DST_API_CACHE_TTLS")) is not None:
+        try:
+            updates["dst_api_cache_ttls"] = {
+                str(key): float(ttl) for key, ttl in json.loads(value).items()
+            }
+        except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+            pass
+    if (value := env("DST_API_CACHE_MAX_ENTRIES")) is not None:
+        updates["dst_api_cache_max_entries"] = int(value)
+    if (value := env("DST_HTTP_MAX_CONNECTIONS")) is not None:
+        updates["dst_http_max_connections"] = int(value)
+    if (value := env("DST_HTTP_MAX_KEEPALIVE_CONNECTIONS")) is not None:
+        updates["dst_http_max_keepalive_connections"] = int(value)
+    if (value := env("DST_HTTP_KEEPALIVE_EXPIRY")) is not None:
+        updates["dst_http_keepalive_expiry"] = float(value)
+    if (value := env("DST_HTTP2")) is not None:
+        updates["dst_http2"] = _parse_bool(value)
+    if (value := env("DST_PLAYERS_CACHE_TTL")) is not None:
+        updates["dst_players_cache_ttl"] = float(value)
+    if (value := env("DST_DASHBOARD_CONCURRENCY")) is not None:
+        updates["dst_dashboard_concurrency"] = int(value)
+    if (value := env("DST_ROOM_POLLER_ENABLED")) is not None:
+        updates["dst_room_poller_enabled"] = _parse_bool(value)
+    if (value := env("DST_ROOM_POLL_ACTIVE_INTERVAL")) is not None:
+        updates["dst_room_poll_active_interval"] = float(value)
+    if (value := env("DST_ROOM_POLL_IDLE_INTERVAL")) is not None:
+        updates["dst_room_poll_idle_interval"] = float(value)
+    if (value := env("DST_ROOM_POLL_LIST_INTERVAL")) is not None:
+        updates["dst_room_poll_list_interval"] = float(value)
+    if (value := env("DST_ROOM_POLL_METRICS_INTERVAL")) is not None:
+        updates["dst_room_poll_metrics_interval"] = float(value)
+    if (value := env("DST_ROOM_POLL_CONCURRENCY")) is not None:
+        updates["dst_room_poll_concurrency"] = int(value)
+    if (value := env("DST_ROOM_SNAPSHOT_MAX_AGE")) is not None:
+        updates["dst_room_snapshot_max_age"] = float(value)
+    if (value := env("DST_LAST_ROOM_FLUSH_INTERVAL")) is not None:
+        updates["dst_last_room_flush_interval"] = float(value)
+    if (value := env("DST_DB_PROFILING")) is not None:
+        updates["dst_db_profiling"] = _parse_bool(value)
+    if (value := env("DST_DB_SLOW_QUERY_MS")) is not None:
+        updates["dst_db_slow_query_ms"] = float(value)
+    if (value := env("DST_SIGN_RETENTION_DAYS")) is not None:
+        updates["dst_sign_retention_days"] = int(value)
+    if (value := env("DST_SIGN_RETENTION_INTERVAL")) is not None:
+        updates["dst_sign_retention_interval"] = float(value)
+    if (value := env("DST_SIGN_RETENTION_BATCH_SIZE")) is not None:
+        updates["dst_sign_retention_batch_size"] = int(value)
+    if (value := env("DST_SIGN_DELIVERY_MAX_COMMAND_LENGTH")) is not None:
+        updates["dst_sign_delivery_max_command_length"] = int(value)
+    if (value := env("DST_SIGN_CLAIM_TIMEOUT")) is not None:
+        updates["dst_sign_claim_timeout"] = float(value)
+    if (value := env("DST_SIGN_SWEEPER_ENABLED")) is not None:
+        updates["dst_sign_sweeper_enabled"] = _parse_bool(value)
+    if (value := env("DST_SIGN_SWEEP_INTERVAL")) is not None:
+        updates["dst_sign_sweep_interval"] = float(value)
+    if (value := env("DST_SIGN_SWEEP_MAX_INTERVAL")) is not None:
+        updates["dst_sign_sweep_max_interval"] = float(value)
+    if (value := env("DST_SIGN_SWEEP_CONCURRENCY")) is not None:
+        updates["dst_sign_sweep_concurrency"] = int(value)
+    if (value := env("DST_API_RETRIES")) is not None:
+        updates["dst_api_retries"] = int(value)
+    if (value := env("DST_API_RETRY_BACKOFF")) is not None:
+        updates["dst_api_retry_backoff"] = float(value)
+    if (value := env("DST_API_RETRY_MAX_BACKOFF")) is not None:
+        updates["dst_api_retry_max_backoff"] = float(value)
+    if (value := env("DST_API_BREAKER_THRESHOLD")) is not None:
+        updates["dst_api_breaker_threshold"] = int(value)
+    if (value := env("DST_API_BREAKER_RECOVERY")) is not None:
+        updates["dst_api_breaker_recovery"] = float(value)
+    if (value := env("DST_ARCHIVE_MAX_BYTES")) is not None:
+        updates["dst_archive_max_bytes"] = int(value)
+    if (value := env("DST_ARCHIVE_UPLOAD_RATE_LIMIT")) is not None:
+        updates["dst_archive_upload_rate_limit"] = int(value)
+    if (value := env("DST_ARCHIVE_CHUNK_SIZE")) is not None:
+        updates["dst_archive_chunk_size"] = int(value)
     if (value := env("DST_ADMIN_USERS")) is not None:
         updates["dst_admin_users"] = _parse_int_list(value)
     if (value := env("DST_ADMIN_GROUPS")) is not None:
@@ -9,15 +9,39 @@ from .connection import (
     execute,
     execute_returning_id,
     execute_many,
+    run_transaction,
+    run_with_connection,
+    add_close_callback,
     execute_script,
     fetch_one,
     fetch_all,
+    close_db,
+)
+from .profiler import QueryProfiler, configure_query_profiler, get_query_profiler
+from .migrations import LATEST_VERSION, apply_migrations, get_schema_version
+from .settings_cache import UserSettings, get_user_settings_cache_stats
+from .write_behind import (
+    LastRoomWriteBuffer,
+    configure_last_room_buffer,
+    flush_last_room_writes,
+    get_last_room_buffer,
+)
+from .retention import (
+    SignRecordRetention,
+    archive_sign_records,
+    get_sign_retention,
+    start_sign_retention,
+    stop_sign_retention,
+    vacuum_free_pages,
 )
 from .models import (
     SignUser,
     SignRecord,
+    SignInOutcome,
     PendingSignRecord,
     SignReward,
+    SignRecordSummary,
+    LeaderboardEntry,
     init_db,
     create_user_binding,
     get_user_binding,
@@ -25,16 +49,36 @@ from .models import (
     update_user_sign_stats,
     delete_user_binding,
     create_sign_record,
+    record_sign_in,
+    get_room_sign_version,
+    LEADERBOARD_METRICS,
+    list_sign_leaderboard,
+    count_sign_leaderboard,
     get_sign_record,
     list_sign_records,
+    count_sign_records,
+    list_sign_record_summaries,
     list_pending_sign_records,
+    list_pending_reward_rooms,
+    list_room_pending_sign_records,
+    list_user_pending_sign_records,
     delete_sign_record,
     update_sign_record_status,
+    SIGN_STATUS_PENDING,
+    SIGN_STATUS_DELIVERED,
+    SIGN_STATUS_DELIVERING,
+    claim_sign_records,
+    mark_sign_records_delivered,
+    finish_sign_in_delivery,
+    release_stale_sign_claims,
     create_sign_reward,
     list_sign_rewards,
+    get_sign_rewards_version,
     get_sign_reward,
     update_sign_reward,
     delete_sign_reward,
+    get_user_settings,
+    get_user_settings_many,
     set_user_default_room,
     get_user_default_room,
     clear_user_default_room,
@@ -53,13 +97,32 @@ __all__ = [
     "execute",
     "execute_returning_id",
     "execute_many",
+    "run_transaction",
+    "run_with_connection",
+    "add_close_callback",
     "execute_script",
     "fetch_one",
     "fetch_all",
+    "close_db",
+    "QueryProfiler",
+    "configure_query_profiler",
+    "get_query_profiler",
+    "LATEST_VERSION",
+    "apply_migrations",
+    "get_schema_version",
+    "SignRecordRetention",
+    "archive_sign_records",
+    "get_sign_retention",
+    "start_sign_retention",
+    "stop_sign_retention",
+    "vacuum_free_pages",
     "SignUser",
     "SignRecord",
+    "SignInOutcome",
     "PendingSignRecord",
     "SignReward",
+    "SignRecordSummary",
+    "LeaderboardEntry",
     "init_db",
     "create_user_binding",
     "get_user_binding",
@@ -67,16 +130,42 @@ __all__ = [
     "update_user_sign_stats",
     "delete_user_binding",
     "create_sign_record",
+    "record_sign_in",
+    "get_room_sign_version",
+    "LEADERBOARD_METRICS",
+    "list_sign_leaderboard",
+    "count_sign_leaderboard",
     "get_sign_record",
     "list_sign_records",
+    "count_sign_records",
+    "list_sign_record_summaries",
     "list_pending_sign_records",
+    "list_pending_reward_rooms",
+    "list_room_pending_sign_records",
+    "list_user_pending_sign_records",
     "delete_sign_record",
     "update_sign_record_status",
+    "SIGN_STATUS_PENDING",
+    "SIGN_STATUS_DELIVERED",
+    "SIGN_STATUS_DELIVERING",
+    "claim_sign_records",
+    "mark_sign_records_delivered",
+    "finish_sign_in_delivery",
+    "release_stale_sign_claims",
     "create_sign_reward",
     "list_sign_rewards",
+    "get_sign_rewards_version",
     "get_sign_reward",
     "update_sign_reward",
     "delete_sign_reward",
+    "UserSettings",
+    "LastRoomWriteBuffer",
+    "configure_last_room_buffer",
+    "flush_last_room_writes",
+    "get_last_room_buffer",
+    "get_user_settings",
+    "get_user_settings_many",
+    "get_user_settings_cache_stats",
     "set_user_default_room",
     "get_user_default_room",
     "clear_user_default_room",
@@ -2,26 +2,63 @@
 数据库连接管理
 
 提供 SQLite 连接与异步执行封装。
+
+连接在首次使用时打开并长期复用（WAL 模式），数据库路径变化时自动重连，
+插件关闭时通过 close_db() 释放。
+
+阻塞的 sqlite3 调用不在事件循环中执行：
+- 写入提交到单线程写执行器，按提交顺序串行执行
+- 查询提交到读执行器，每个读线程持有自己的只读连接，WAL 下可与写入并发
 """
 
 from __future__ import annotations
 
+import asyncio
 import os
 import sqlite3
-from contextlib import closing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Any, Iterable, Optional, Sequence, Tuple
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+from .profiler import ProfilingConnection, get_query_profiler
 
 DEFAULT_DB_PATH = "data/dst_sign.db"
 
+# 页缓存大小（负数单位为 KiB，即约 8MB）
+CACHE_SIZE_KIB = 8192
+BUSY_TIMEOUT_MS = 5000
+# 读线程数
+READ_WORKERS = 4
+
 _db_path_override: Optional[Path] = None
 
+_connection: Optional[sqlite3.Connection] = None
+_connection_path: Optional[Path] = None
+_connection_lock = threading.RLock()
+# 关闭连接时递增，读线程据此丢弃旧连接
+_generation = 0
+_read_local = threading.local()
+_read_connections: List[sqlite3.Connection] = []
+
+# set_db_path / close_db 时在事件循环一侧调用，用于清空依赖数据库内容的缓存
+_close_callbacks: List[Callable[[], None]] = []
+
+_write_executor: Optional[ThreadPoolExecutor] = None
+_read_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+T = TypeVar("T")
 
 
 def set_db_path(path: str | Path) -> None:
     """设置数据库路径（用于测试或自定义配置）。"""
     global _db_path_override
     _db_path_override = Path(path)
+    _close_connection()
+    _run_close_callbacks()
 
 
 def get_db_path() -> Path:
@@ -33,77 +70,278 @@ def get_db_path() -> Path:
     return Path(DEFAULT_DB_PATH)
 
 
-def _open_connection() -> sqlite3.Connection:
-    path = get_db_path()
+def _open_connection(path: Path, *, readonly: bool = False) -> sqlite3.Connection:
     path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(path, check_same_thread=False)
+    # auto_vacuum 只能在建表前设置：仅对新建（空）库的写连接设置，旧库需手动 VACUUM 切换
+    is_new = not path.exists() or path.stat().st_size == 0
+    conn = sqlite3.connect(
+        path,
+        check_same_thread=False,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        factory=ProfilingConnection,
+    )
     conn.row_factory = sqlite3.Row
+    if is_new and not readonly:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
     conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    return conn
+
+
+def _get_connection() -> sqlite3.Connection:
+    """获取共享连接，数据库路径变化时重新打开。调用方需持有 _connection_lock。"""
+    global _connection, _connection_path
+    path = get_db_path()
+    if _connection is not None and _connection_path == path:
+        return _connection
+    _close_connection()
+    _connection = _open_connection(path)
+    _connection_path = path
+    return _connection
+
+
+def _get_read_connection() -> sqlite3.Connection:
+    """获取当前读线程的只读连接，路径变化或连接被关闭后重新打开。"""
+    path = get_db_path()
+    conn: Optional[sqlite3.Connection] = getattr(_read_local, "conn", None)
+    if conn is not None and _read_local.path == path and _read_local.generation == _generation:
+        return conn
+    if conn is not None:
+        _discard_read_connection(conn)
+    conn = _open_connection(path, readonly=True)
+    conn.execute("PRAGMA query_only = ON")
+    with _connection_lock:
+        _read_connections.append(conn)
+        _read_local.generation = _generation
+    _read_local.conn = conn
+    _read_local.path = path
     return conn
 
 
+def _discard_read_connection(conn: sqlite3.Connection) -> None:
+    with _connection_lock:
+        if conn in _read_connections:
+            _read_connections.remove(conn)
+    conn.close()
+
+
+def _close_connection() -> None:
+    """关闭写连接并使所有读连接失效（读线程下次使用时自行重连）。"""
+    global _connection, _connection_path, _generation
+    with _connection_lock:
+        _generation += 1
+        if _connection is not None:
+            try:
+                _connection.close()
+            finally:
+                _connection = None
+                _connection_path = None
+
+
+def _run_close_callbacks() -> None:
+    """
+    执行连接关闭回调
+
+    回调修改的缓存归事件循环所有，只能在事件循环一侧调用，不在数据库线程中执行。
+    """
+    for callback in _close_callbacks:
+        callback()
+
+
+def add_close_callback(callback: Callable[[], None]) -> None:
+    """注册连接关闭回调（set_db_path 切换数据库或 close_db 时触发）。"""
+    if callback not in _close_callbacks:
+        _close_callbacks.append(callback)
+
+
+def _get_executors() -> Tuple[ThreadPoolExecutor, ThreadPoolExecutor]:
+    global _write_executor, _read_executor
+    with _executor_lock:
+        if _write_executor is None:
+            _write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dst-db-write")
+        if _read_executor is None:
+            _read_executor = ThreadPoolExecutor(
+                max_workers=READ_WORKERS, thread_name_prefix="dst-db-read"
+            )
+        return _write_executor, _read_executor
+
+
+async def run_write(func: Callable[..., T], *args: Any) -> T:
+    """在写线程中执行函数（按提交顺序串行）。"""
+    executor, _ = _get_executors()
+    return await asyncio.get_running_loop().run_in_executor(executor, partial(func, *args))
+
+
+def _call_profiled(conn: sqlite3.Connection, func: Callable[..., T], args: Tuple[Any, ...]) -> T:
+    """调用 func(conn, *args)；开启分析时 func 内的每条语句单独计时。"""
+    if not isinstance(conn, ProfilingConnection) or not get_query_profiler().enabled:
+        return func(conn, *args)
+    conn.profile_statements = True
+    try:
+        return func(conn, *args)
+    finally:
+        conn.profile_statements = False
+
+
+def _run_with_connection(func: Callable[..., T], args: Tuple[Any, ...]) -> T:
+    with _connection_lock:
+        return _call_profiled(_get_connection(), func, args)
+
+
+async def run_with_connection(func: Callable[..., T], *args: Any) -> T:
+    """在写线程中以写连接调用 func(conn, *args)，事务由 func 自行管理。"""
+    return await run_write(_run_with_connection, func, args)
+
+
+def _run_transaction(func: Callable[..., T], args: Tuple[Any, ...]) -> T:
+    profiler = get_query_profiler()
+    with _connection_lock:
+        conn = _get_connection()
+        started = time.perf_counter() if profiler.enabled else 0.0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = _call_profiled(conn, func, args)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        if profiler.enabled:
+            # 事务整体另记一行（按函数名归类），事务内各语句已由 _call_profiled 单独记录
+            profiler.record(f"TRANSACTION {func.__name__}", time.perf_counter() - started)
+        return result
+
+
+async def run_transaction(func: Callable[..., T], *args: Any) -> T:
+    """
+    在写线程中以单个事务执行函数（BEGIN IMMEDIATE，成功提交、异常回滚）。
+
+    func 的第一个参数为写连接，其余为 args。
+    """
+    return await run_write(_run_transaction, func, args)
+
+
+async def _run_read(func: Callable[..., T], *args: Any) -> T:
+    _, executor = _get_executors()
+    return await asyncio.get_running_loop().run_in_executor(executor, partial(func, *args))
+
+
 def _execute(query: str, params: Sequence[Any]) -> Tuple[int, int]:
-    with closing(_open_connection()) as conn:
-        cursor = conn.execute(query, params)
-        conn.commit()
+    profiler = get_query_profiler()
+    with _connection_lock:
+        conn = _get_connection()
+        started = time.perf_counter() if profiler.enabled else 0.0
+        try:
+            cursor = conn.execute(query, params)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        if profiler.enabled:
+            profiler.record(query, time.perf_counter() - started, conn, params)
         return cursor.rowcount, cursor.lastrowid
 
 
-def _execute_many(query: str, params: Iterable[Sequence[Any]]) -> int:
-    with closing(_open_connection()) as conn:
-        cursor = conn.executemany(query, params)
-        conn.commit()
+def _execute_many(query: str, params: List[Sequence[Any]]) -> int:
+    profiler = get_query_profiler()
+    with _connection_lock:
+        conn = _get_connection()
+        started = time.perf_counter() if profiler.enabled else 0.0
+        try:
+            cursor = conn.executemany(query, params)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        if profiler.enabled:
+            profiler.record(query, time.perf_counter() - started, conn, params[0] if params else ())
         return cursor.rowcount
 
 
 def _execute_script(script: str) -> None:
-    with closing(_open_connection()) as conn:
+    with _connection_lock:
+        conn = _get_connection()
         conn.executescript(script)
         conn.commit()
 
 
 def _fetch_one(query: str, params: Sequence[Any]) -> Optional[sqlite3.Row]:
-    with closing(_open_connection()) as conn:
-        cursor = conn.execute(query, params)
-        return cursor.fetchone()
+    profiler = get_query_profiler()
+    conn = _get_read_connection()
+    started = time.perf_counter() if profiler.enabled else 0.0
+    cursor = conn.execute(query, params)
+    try:
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    if profiler.enabled:
+        profiler.record(query, time.perf_counter() - started, conn, params)
+    return row
 
 
 def _fetch_all(query: str, params: Sequence[Any]) -> list[sqlite3.Row]:
-    with closing(_open_connection()) as conn:
-        cursor = conn.execute(query, params)
-        return cursor.fetchall()
+    profiler = get_query_profiler()
+    conn = _get_read_connection()
+    started = time.perf_counter() if profiler.enabled else 0.0
+    rows = conn.execute(query, params).fetchall()
+    if profiler.enabled:
+        profiler.record(query, time.perf_counter() - started, conn, params)
+    return rows
 
 
 async def execute(query: str, params: Sequence[Any] = ()) -> int:
     """执行写入语句，返回受影响行数。"""
-    rowcount, _ = _execute(query, params)
+    rowcount, _ = await run_write(_execute, query, params)
     return rowcount
 
 
 async def execute_returning_id(query: str, params: Sequence[Any] = ()) -> int:
     """执行写入语句，返回自增主键。"""
-    _, lastrowid = _execute(query, params)
+    _, lastrowid = await run_write(_execute, query, params)
     return lastrowid
 
 
 async def execute_many(query: str, params: Iterable[Sequence[Any]]) -> int:
     """批量执行写入语句。"""
-    return _execute_many(query, params)
+    return await run_write(_execute_many, query, list(params))
 
 
 async def execute_script(script: str) -> None:
     """执行多条 SQL 语句。"""
-    _execute_script(script)
+    await run_write(_execute_script, script)
 
 
 async def fetch_one(query: str, params: Sequence[Any] = ()) -> Optional[sqlite3.Row]:
     """查询单条记录。"""
-    return _fetch_one(query, params)
+    return await _run_read(_fetch_one, query, params)
 
 
 async def fetch_all(query: str, params: Sequence[Any] = ()) -> list[sqlite3.Row]:
     """查询多条记录。"""
-    return _fetch_all(query, params)
+    return await _run_read(_fetch_all, query, params)
+
+
+async def close_db() -> None:
+    """等待已提交的数据库操作完成并关闭所有连接（插件关闭时调用，之后的查询会自动重连）。"""
+    global _write_executor, _read_executor
+    with _executor_lock:
+        executors = [
+            executor for executor in (_write_executor, _read_executor) if executor is not None
+        ]
+        _write_executor = _read_executor = None
+    for executor in executors:
+        await asyncio.get_running_loop().run_in_executor(
+            None, partial(executor.shutdown, wait=True)
+        )
+    _close_connection()
+    _run_close_callbacks()
+    with _connection_lock:
+        connections = list(_read_connections)
+        _read_connections.clear()
+    for conn in connections:
+        conn.close()
 
 
 __all__ = [
@@ -112,8 +350,13 @@ __all__ = [
     "get_db_path",
     "execute",
     "execute_returning_id",
+    "run_write",
+    "run_transaction",
+    "run_with_connection",
+    "add_close_callback",
     "execute_many",
     "execute_script",
     "fetch_one",
     "fetch_all",
+    "close_db",
 ]
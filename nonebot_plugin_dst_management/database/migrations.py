@@ -0,0 +1,218 @@
+"""
+数据库结构迁移
+
+schema_version 表记录已应用的迁移版本；init_db 时只执行尚未应用的迁移，
+全部待执行迁移在同一个事务中完成。已是最新版本时启动只需读取一次版本号。
+
+新增表、列或索引时在 MIGRATIONS 末尾追加新版本，不要修改已发布的迁移。
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from typing import Callable, List, Tuple
+
+from loguru import logger
+
+from .connection import run_with_connection
+
+SIGN_USERS_TABLE = """
+CREATE TABLE IF NOT EXISTS sign_users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    qq_id TEXT NOT NULL,
+    ku_id TEXT NOT NULL,
+    room_id INTEGER NOT NULL,
+    player_name TEXT,
+    bind_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_sign_time DATE,
+    sign_count INTEGER DEFAULT 0,
+    continuous_days INTEGER DEFAULT 0,
+    level INTEGER DEFAULT 1,
+    total_points INTEGER DEFAULT 0,
+    UNIQUE(qq_id, room_id)
+);
+"""
+
+SIGN_RECORDS_TABLE = """
+CREATE TABLE IF NOT EXISTS sign_records (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    qq_id TEXT NOT NULL,
+    room_id INTEGER NOT NULL,
+    sign_date DATE NOT NULL,
+    reward_level INTEGER NOT NULL,
+    reward_items TEXT,
+    status INTEGER DEFAULT 1,
+    sign_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(qq_id, room_id, sign_date)
+);
+"""
+
+# 待发放记录的部分索引：只收录 status = 0 的行，按房间/用户查询时无需扫描历史记录
+SIGN_RECORDS_PENDING_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_sign_records_pending
+ON sign_records (room_id, qq_id)
+WHERE status = 0;
+"""
+
+# 排行榜覆盖索引：按房间 + 指标降序，附带排名输出所需的列，查询无需回表
+SIGN_USERS_RANK_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_sign_users_rank_continuous
+ON sign_users (room_id, continuous_days DESC, qq_id, player_name, last_sign_time);
+CREATE INDEX IF NOT EXISTS idx_sign_users_rank_points
+ON sign_users (room_id, total_points DESC, qq_id, player_name);
+CREATE INDEX IF NOT EXISTS idx_sign_users_rank_count
+ON sign_users (room_id, sign_count DESC, qq_id, player_name);
+"""
+
+# 已发放签到记录的月度汇总：保留期之外的 sign_records 行合并到这里后删除
+SIGN_RECORD_SUMMARIES_TABLE = """
+CREATE TABLE IF NOT EXISTS sign_record_summaries (
+    qq_id TEXT NOT NULL,
+    room_id INTEGER NOT NULL,
+    month TEXT NOT NULL,
+    sign_count INTEGER NOT NULL DEFAULT 0,
+    first_sign_date DATE,
+    last_sign_date DATE,
+    max_reward_level INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (qq_id, room_id, month)
+) WITHOUT ROWID;
+"""
+
+# 发放中（status = 2）记录的部分索引，供超时认领回收使用
+SIGN_RECORDS_CLAIMED_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_sign_records_claimed
+ON sign_records (claimed_at)
+WHERE status = 2;
+"""
+
+SIGN_REWARDS_TABLE = """
+CREATE TABLE IF NOT EXISTS sign_rewards (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    level INTEGER NOT NULL UNIQUE,
+    continuous_days INTEGER NOT NULL,
+    reward_items TEXT NOT NULL,
+    bonus_points INTEGER DEFAULT 0,
+    description TEXT
+);
+"""
+
+USER_SETTINGS_TABLE = """
+CREATE TABLE IF NOT EXISTS user_settings (
+    qq_id TEXT PRIMARY KEY,
+    default_room_id INTEGER,
+    last_room_id INTEGER,
+    ui_mode TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+SCHEMA_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER NOT NULL
+);
+"""
+
+
+def _statements(script: str) -> List[str]:
+    return [statement.strip() for statement in script.split(";") if statement.strip()]
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set[str]:
+    return {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _migrate_base_schema(conn: sqlite3.Connection) -> None:
+    """基础表结构；兼容引入版本表之前创建、可能缺少新增列的旧库。"""
+    for script in (SIGN_USERS_TABLE, SIGN_RECORDS_TABLE, SIGN_REWARDS_TABLE, USER_SETTINGS_TABLE):
+        conn.execute(script)
+    if "status" not in _columns(conn, "sign_records"):
+        conn.execute("ALTER TABLE sign_records ADD COLUMN status INTEGER DEFAULT 1")
+    conn.execute("UPDATE sign_records SET status = 1 WHERE status IS NULL")
+    settings_columns = _columns(conn, "user_settings")
+    if "last_room_id" not in settings_columns:
+        conn.execute("ALTER TABLE user_settings ADD COLUMN last_room_id INTEGER")
+    if "ui_mode" not in settings_columns:
+        conn.execute("ALTER TABLE user_settings ADD COLUMN ui_mode TEXT")
+
+
+def _migrate_pending_index(conn: sqlite3.Connection) -> None:
+    conn.execute(SIGN_RECORDS_PENDING_INDEX)
+
+
+def _migrate_rank_indexes(conn: sqlite3.Connection) -> None:
+    for statement in _statements(SIGN_USERS_RANK_INDEXES):
+        conn.execute(statement)
+
+
+def _migrate_record_summaries(conn: sqlite3.Connection) -> None:
+    conn.execute(SIGN_RECORD_SUMMARIES_TABLE)
+
+
+def _migrate_record_claims(conn: sqlite3.Connection) -> None:
+    if "claimed_at" not in _columns(conn, "sign_records"):
+        conn.execute("ALTER TABLE sign_records ADD COLUMN claimed_at TIMESTAMP")
+    conn.execute(SIGN_RECORDS_CLAIMED_INDEX)
+
+
+# (版本号, 说明, 迁移函数)，版本号必须严格递增
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "基础表结构", _migrate_base_schema),
+    (2, "待发放记录部分索引", _migrate_pending_index),
+    (3, "排行榜覆盖索引", _migrate_rank_indexes),
+    (4, "签到记录月度汇总表", _migrate_record_summaries),
+    (5, "签到记录发放认领", _migrate_record_claims),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _read_version(conn: sqlite3.Connection) -> int:
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        # 版本表不存在：新库或引入迁移之前的旧库
+        return 0
+    return int(row[0] or 0)
+
+
+def _apply_migrations(conn: sqlite3.Connection) -> Tuple[int, int]:
+    current = _read_version(conn)
+    if current >= LATEST_VERSION:
+        return current, current
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(SCHEMA_VERSION_TABLE)
+        # 持有写锁后重新读取，避免多进程同时迁移
+        current = _read_version(conn)
+        for version, _, migrate in MIGRATIONS:
+            if version > current:
+                migrate(conn)
+        conn.execute("DELETE FROM schema_version")
+        conn.execute("INSERT INTO schema_version (version) VALUES (?)", (LATEST_VERSION,))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return current, LATEST_VERSION
+
+
+async def apply_migrations() -> int:
+    """执行尚未应用的迁移，返回当前结构版本号。"""
+    previous, current = await run_with_connection(_apply_migrations)
+    if previous != current:
+        logger.info("数据库结构已从版本 {} 迁移至 {}", previous, current)
+    return current
+
+
+async def get_schema_version() -> int:
+    """读取数据库当前结构版本号。"""
+    return await run_with_connection(_read_version)
+
+
+__all__ = [
+    "LATEST_VERSION",
+    "MIGRATIONS",
+    "apply_migrations",
+    "get_schema_version",
+]
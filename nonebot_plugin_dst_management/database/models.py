@@ -6,64 +6,22 @@ from __future__ import annotations
 
 import json
 import sqlite3
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import date, datetime
-from typing import Any, Optional
-
-from .connection import execute, execute_returning_id, execute_script, fetch_all, fetch_one
-
-
-SIGN_USERS_TABLE = """
-CREATE TABLE IF NOT EXISTS sign_users (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    qq_id TEXT NOT NULL,
-    ku_id TEXT NOT NULL,
-    room_id INTEGER NOT NULL,
-    player_name TEXT,
-    bind_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    last_sign_time DATE,
-    sign_count INTEGER DEFAULT 0,
-    continuous_days INTEGER DEFAULT 0,
-    level INTEGER DEFAULT 1,
-    total_points INTEGER DEFAULT 0,
-    UNIQUE(qq_id, room_id)
-);
-"""
+from typing import Any, Optional, Tuple
 
-SIGN_RECORDS_TABLE = """
-CREATE TABLE IF NOT EXISTS sign_records (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    qq_id TEXT NOT NULL,
-    room_id INTEGER NOT NULL,
-    sign_date DATE NOT NULL,
-    reward_level INTEGER NOT NULL,
-    reward_items TEXT,
-    status INTEGER DEFAULT 1,
-    sign_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE(qq_id, room_id, sign_date)
-);
-"""
+from .connection import (
+    add_close_callback,
+    execute,
+    execute_returning_id,
+    fetch_all,
+    fetch_one,
+    run_transaction,
+)
+from .migrations import apply_migrations
+from .settings_cache import UserSettings, get_user_settings_cache
+from .write_behind import get_last_room_buffer
 
-SIGN_REWARDS_TABLE = """
-CREATE TABLE IF NOT EXISTS sign_rewards (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    level INTEGER NOT NULL UNIQUE,
-    continuous_days INTEGER NOT NULL,
-    reward_items TEXT NOT NULL,
-    bonus_points INTEGER DEFAULT 0,
-    description TEXT
-);
-"""
-
-USER_SETTINGS_TABLE = """
-CREATE TABLE IF NOT EXISTS user_settings (
-    qq_id TEXT PRIMARY KEY,
-    default_room_id INTEGER,
-    last_room_id INTEGER,
-    ui_mode TEXT,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
-"""
 
 @dataclass
 class SignUser:
@@ -96,6 +54,14 @@ class SignUser:
         )
 
 
+@dataclass(frozen=True)
+class SignInOutcome:
+    """record_sign_in 的结果；user 为 None 时 already_signed 区分当日已签到与未绑定"""
+
+    user: Optional[SignUser]
+    already_signed: bool = False
+
+
 @dataclass
 class SignRecord:
     id: int
@@ -169,6 +135,37 @@ class SignReward:
         )
 
 
+@dataclass(frozen=True)
+class SignRecordSummary:
+    qq_id: str
+    room_id: int
+    month: str
+    sign_count: int
+    first_sign_date: Optional[date]
+    last_sign_date: Optional[date]
+    max_reward_level: int
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "SignRecordSummary":
+        return cls(
+            qq_id=row["qq_id"],
+            room_id=row["room_id"],
+            month=row["month"],
+            sign_count=row["sign_count"],
+            first_sign_date=_parse_date(row["first_sign_date"]),
+            last_sign_date=_parse_date(row["last_sign_date"]),
+            max_reward_level=row["max_reward_level"],
+        )
+
+
+@dataclass(frozen=True)
+class LeaderboardEntry:
+    rank: int
+    qq_id: str
+    player_name: Optional[str]
+    value: int
+
+
 def _parse_date(value: Any) -> Optional[date]:
     if value is None:
         return None
@@ -212,43 +209,35 @@ def _load_json(value: Optional[str]) -> Optional[list[dict[str, Any]]]:
 
 
 async def init_db() -> None:
-    """初始化数据库表。"""
-    await execute_script(
-        "\n".join(
-            [
-                SIGN_USERS_TABLE,
-                SIGN_RECORDS_TABLE,
-                SIGN_REWARDS_TABLE,
-                USER_SETTINGS_TABLE,
-            ]
-        )
-    )
-    await _ensure_sign_records_status()
-    await _ensure_user_settings_last_room_id()
-    await _ensure_user_settings_ui_mode()
+    """初始化数据库（按 schema_version 执行待应用的迁移）。"""
+    await apply_migrations()
+
+
+# 各房间 sign_users 的写入版本（全局递增序号），供排行榜缓存判断是否失效
+_sign_users_seq = 0
+_sign_users_base = 0
+_room_sign_versions: dict[int, int] = {}
+
 
+def get_room_sign_version(room_id: int) -> int:
+    """获取房间签到数据版本号（该房间用户数据每次写入后变化）。"""
+    return _room_sign_versions.get(room_id, _sign_users_base)
 
-async def _ensure_sign_records_status() -> None:
-    rows = await fetch_all("PRAGMA table_info(sign_records)")
-    columns = {row["name"] for row in rows}
-    if "status" not in columns:
-        await execute("ALTER TABLE sign_records ADD COLUMN status INTEGER DEFAULT 1")
-    await execute("UPDATE sign_records SET status = 1 WHERE status IS NULL")
 
+def _bump_room_sign_version(room_id: int) -> None:
+    global _sign_users_seq
+    _sign_users_seq += 1
+    _room_sign_versions[room_id] = _sign_users_seq
 
-async def _ensure_user_settings_ui_mode() -> None:
-    rows = await fetch_all("PRAGMA table_info(user_settings)")
-    columns = {row["name"] for row in rows}
-    if "ui_mode" not in columns:
-        await execute("ALTER TABLE user_settings ADD COLUMN ui_mode TEXT")
 
-async def _ensure_user_settings_last_room_id() -> None:
-    rows = await fetch_all("PRAGMA table_info(user_settings)")
-    columns = {row["name"] for row in rows}
-    if "last_room_id" not in columns:
-        await execute("ALTER TABLE user_settings ADD COLUMN last_room_id INTEGER")
+def _reset_room_sign_versions() -> None:
+    global _sign_users_seq, _sign_users_base
+    _sign_users_seq += 1
+    _sign_users_base = _sign_users_seq
+    _room_sign_versions.clear()
 
 
+add_close_callback(_reset_room_sign_versions)
 
 
 async def create_user_binding(
@@ -259,7 +248,7 @@ async def create_user_binding(
 ) -> Optional[int]:
     """创建用户绑定。"""
     try:
-        return await execute_returning_id(
+        binding_id = await execute_returning_id(
             """
             INSERT INTO sign_users (qq_id, ku_id, room_id, player_name)
             VALUES (?, ?, ?, ?)
@@ -268,6 +257,8 @@ async def create_user_binding(
         )
     except sqlite3.IntegrityError:
         return None
+    _bump_room_sign_version(room_id)
+    return binding_id
 
 
 async def get_user_binding(qq_id: str, room_id: int) -> Optional[SignUser]:
@@ -304,7 +295,7 @@ async def update_user_sign_stats(
     total_points: int,
 ) -> int:
     """更新用户签到信息。"""
-    return await execute(
+    updated = await execute(
         """
         UPDATE sign_users
         SET last_sign_time = ?,
@@ -324,17 +315,21 @@ async def update_user_sign_stats(
             room_id,
         ),
     )
+    _bump_room_sign_version(room_id)
+    return updated
 
 
 async def delete_user_binding(qq_id: str, room_id: int) -> int:
     """删除用户绑定。"""
-    return await execute(
+    deleted = await execute(
         """
         DELETE FROM sign_users
         WHERE qq_id = ? AND room_id = ?
         """,
         (qq_id, room_id),
     )
+    _bump_room_sign_version(room_id)
+    return deleted
 
 
 async def create_sign_record(
@@ -365,6 +360,156 @@ async def create_sign_record(
         return None
 
 
+def _record_sign_in(
+    conn: sqlite3.Connection,
+    qq_id: str,
+    room_id: int,
+    sign_date: str,
+    continuous_days: int,
+    level: int,
+    bonus_points: int,
+    reward_items: Optional[str],
+    status: int,
+) -> Tuple[bool, Optional[sqlite3.Row]]:
+    """返回 (当日是否已签到, 更新后的用户行)；未绑定时用户行为 None。"""
+    signed = conn.execute(
+        "SELECT 1 FROM sign_records WHERE qq_id = ? AND room_id = ? AND sign_date = ?",
+        (qq_id, room_id, sign_date),
+    ).fetchone()
+    if signed:
+        return True, None
+    updated = conn.execute(
+        """
+        UPDATE sign_users
+        SET last_sign_time = ?,
+            sign_count = sign_count + 1,
+            continuous_days = ?,
+            level = ?,
+            total_points = total_points + ?
+        WHERE qq_id = ? AND room_id = ?
+        """,
+        (sign_date, continuous_days, level, bonus_points, qq_id, room_id),
+    ).rowcount
+    if updated <= 0:
+        return False, None
+    conn.execute(
+        """
+        INSERT INTO sign_records
+            (qq_id, room_id, sign_date, reward_level, reward_items, status, claimed_at)
+        VALUES (?, ?, ?, ?, ?, ?, CASE WHEN ? = 2 THEN CURRENT_TIMESTAMP END)
+        """,
+        (qq_id, room_id, sign_date, level, reward_items, status, status),
+    )
+    row: Optional[sqlite3.Row] = conn.execute(
+        "SELECT * FROM sign_users WHERE qq_id = ? AND room_id = ?",
+        (qq_id, room_id),
+    ).fetchone()
+    return False, row
+
+
+async def record_sign_in(
+    qq_id: str,
+    room_id: int,
+    sign_date: date,
+    *,
+    continuous_days: int,
+    level: int,
+    bonus_points: int = 0,
+    reward_items: Optional[object] = None,
+    status: int = 1,
+) -> SignInOutcome:
+    """
+    在单个事务内完成签到：检查当日记录、更新用户统计并写入签到记录。
+
+    status 为 2（发放中）时记录直接处于认领状态，即时发放后需调用 finish_sign_in_delivery。
+
+    Returns:
+        签到结果：成功时 user 为更新后的用户信息；当日已签到时 already_signed 为 True，
+        未绑定（如绑定被并发解除）时 user 为 None 且 already_signed 为 False
+    """
+    already_signed, row = await run_transaction(
+        _record_sign_in,
+        qq_id,
+        room_id,
+        sign_date.isoformat(),
+        continuous_days,
+        level,
+        bonus_points,
+        _dump_json(reward_items),
+        status,
+    )
+    if not row:
+        return SignInOutcome(None, already_signed)
+    _bump_room_sign_version(room_id)
+    return SignInOutcome(SignUser.from_row(row))
+
+
+# 排行榜指标 -> sign_users 列
+LEADERBOARD_METRICS = ("continuous_days", "total_points", "sign_count")
+
+
+def _leaderboard_where(metric: str, active_since: Optional[date]) -> tuple[str, list[Any]]:
+    if metric not in LEADERBOARD_METRICS:
+        raise ValueError(f"Invalid leaderboard metric: {metric}")
+    where = f"room_id = ? AND {metric} > 0"
+    params: list[Any] = []
+    if metric == "continuous_days" and active_since is not None:
+        # 断签用户的 continuous_days 不再有效
+        where += " AND last_sign_time >= ?"
+        params.append(active_since.isoformat())
+    return where, params
+
+
+def leaderboard_query(metric: str, active_since: Optional[date] = None) -> str:
+    """排行榜分页查询 SQL（参数：room_id[, active_since], limit, offset）。"""
+    where, _ = _leaderboard_where(metric, active_since)
+    return (
+        f"SELECT qq_id, player_name, {metric} AS value FROM sign_users "
+        f"WHERE {where} ORDER BY {metric} DESC, qq_id ASC LIMIT ? OFFSET ?"
+    )
+
+
+async def list_sign_leaderboard(
+    room_id: int,
+    metric: str,
+    limit: int = 10,
+    offset: int = 0,
+    active_since: Optional[date] = None,
+) -> list[LeaderboardEntry]:
+    """
+    查询房间签到排行榜（按指标降序分页）。
+
+    Args:
+        metric: continuous_days / total_points / sign_count
+        active_since: 连续签到榜只统计最后签到日期不早于该日期的用户
+    """
+    _, params = _leaderboard_where(metric, active_since)
+    rows = await fetch_all(
+        leaderboard_query(metric, active_since),
+        (room_id, *params, limit, offset),
+    )
+    return [
+        LeaderboardEntry(
+            rank=offset + index + 1,
+            qq_id=row["qq_id"],
+            player_name=row["player_name"],
+            value=row["value"],
+        )
+        for index, row in enumerate(rows)
+    ]
+
+
+async def count_sign_leaderboard(
+    room_id: int,
+    metric: str,
+    active_since: Optional[date] = None,
+) -> int:
+    """统计房间排行榜上榜人数。"""
+    where, params = _leaderboard_where(metric, active_since)
+    row = await fetch_one(f"SELECT COUNT(*) FROM sign_users WHERE {where}", (room_id, *params))
+    return int(row[0]) if row else 0
+
+
 async def get_sign_record(
     qq_id: str,
     sign_date: date,
@@ -390,31 +535,91 @@ async def get_sign_record(
     return SignRecord.from_row(row) if row else None
 
 
-async def list_sign_records(qq_id: str, room_id: int) -> list[SignRecord]:
-    """列出用户签到记录。"""
+async def list_sign_records(
+    qq_id: str,
+    room_id: int,
+    limit: int = 30,
+    offset: int = 0,
+) -> list[SignRecord]:
+    """分页列出用户签到记录（按日期倒序）。保留期之外的记录见 list_sign_record_summaries。"""
     rows = await fetch_all(
         """
         SELECT * FROM sign_records
         WHERE qq_id = ? AND room_id = ?
         ORDER BY sign_date DESC
+        LIMIT ? OFFSET ?
         """,
-        (qq_id, room_id),
+        (qq_id, room_id, limit, offset),
     )
     return [SignRecord.from_row(row) for row in rows]
 
 
-async def list_pending_sign_records() -> list[PendingSignRecord]:
-    """列出待发放奖励的签到记录。"""
+async def count_sign_records(qq_id: str, room_id: int) -> int:
+    """统计用户在房间内尚未归档的签到记录数。"""
+    row = await fetch_one(
+        "SELECT COUNT(*) AS total FROM sign_records WHERE qq_id = ? AND room_id = ?",
+        (qq_id, room_id),
+    )
+    return int(row["total"]) if row else 0
+
+
+async def list_sign_record_summaries(
+    qq_id: str,
+    room_id: int,
+    limit: int = 12,
+    offset: int = 0,
+) -> list[SignRecordSummary]:
+    """分页列出已归档签到记录的月度汇总（按月份倒序）。"""
     rows = await fetch_all(
         """
-        SELECT r.*, u.ku_id
-        FROM sign_records AS r
-        JOIN sign_users AS u
-            ON u.qq_id = r.qq_id AND u.room_id = r.room_id
-        WHERE r.status = 0
-        ORDER BY r.sign_time ASC
-        """
+        SELECT * FROM sign_record_summaries
+        WHERE qq_id = ? AND room_id = ?
+        ORDER BY month DESC
+        LIMIT ? OFFSET ?
+        """,
+        (qq_id, room_id, limit, offset),
     )
+    return [SignRecordSummary.from_row(row) for row in rows]
+
+
+_PENDING_SELECT = """
+SELECT r.*, u.ku_id
+FROM sign_records AS r
+JOIN sign_users AS u
+    ON u.qq_id = r.qq_id AND u.room_id = r.room_id
+WHERE r.status = 0
+"""
+
+PENDING_BY_ROOM_QUERY = _PENDING_SELECT + "AND r.room_id = ?\nORDER BY r.sign_time ASC"
+PENDING_BY_USER_QUERY = (
+    _PENDING_SELECT + "AND r.room_id = ? AND r.qq_id = ?\nORDER BY r.sign_time ASC"
+)
+
+
+async def list_pending_sign_records() -> list[PendingSignRecord]:
+    """列出待发放奖励的签到记录。"""
+    rows = await fetch_all(_PENDING_SELECT + "ORDER BY r.sign_time ASC")
+    return [PendingSignRecord.from_row(row) for row in rows]
+
+
+PENDING_ROOMS_QUERY = "SELECT DISTINCT room_id FROM sign_records WHERE status = 0 ORDER BY room_id"
+
+
+async def list_pending_reward_rooms() -> list[int]:
+    """列出存在待发放记录的房间（只读取待发放部分索引）。"""
+    rows = await fetch_all(PENDING_ROOMS_QUERY)
+    return [int(row["room_id"]) for row in rows]
+
+
+async def list_room_pending_sign_records(room_id: int) -> list[PendingSignRecord]:
+    """列出指定房间待发放奖励的签到记录。"""
+    rows = await fetch_all(PENDING_BY_ROOM_QUERY, (room_id,))
+    return [PendingSignRecord.from_row(row) for row in rows]
+
+
+async def list_user_pending_sign_records(qq_id: str, room_id: int) -> list[PendingSignRecord]:
+    """列出指定用户在指定房间待发放奖励的签到记录。"""
+    rows = await fetch_all(PENDING_BY_USER_QUERY, (room_id, qq_id))
     return [PendingSignRecord.from_row(row) for row in rows]
 
 
@@ -430,6 +635,112 @@ async def update_sign_record_status(record_id: int, status: int) -> int:
     )
 
 
+# sign_records.status：待发放 / 已发放 / 发放中（已被某个发放流程认领，完成后改为已发放或退回待发放）
+SIGN_STATUS_PENDING = 0
+SIGN_STATUS_DELIVERED = 1
+SIGN_STATUS_DELIVERING = 2
+
+# 单条 IN 查询的最大参数个数
+_CLAIM_CHUNK_SIZE = 500
+
+
+def _claim_sign_records(conn: sqlite3.Connection, record_ids: list[int]) -> list[int]:
+    claimed: list[int] = []
+    for start in range(0, len(record_ids), _CLAIM_CHUNK_SIZE):
+        chunk = record_ids[start:start + _CLAIM_CHUNK_SIZE]
+        placeholders = ", ".join("?" for _ in chunk)
+        rows = conn.execute(
+            f"""
+            UPDATE sign_records
+            SET status = 2, claimed_at = CURRENT_TIMESTAMP
+            WHERE status = 0 AND id IN ({placeholders})
+            RETURNING id
+            """,
+            chunk,
+        ).fetchall()
+        claimed.extend(row[0] for row in rows)
+    return claimed
+
+
+async def claim_sign_records(record_ids: list[int]) -> set[int]:
+    """
+    认领待发放记录（status 0 -> 2），返回认领成功的记录 ID。
+
+    并发的发放流程只会有一个认领到同一条记录，只有认领成功的记录才能发放。
+    """
+    if not record_ids:
+        return set()
+    return set(await run_transaction(_claim_sign_records, list(record_ids)))
+
+
+def _mark_sign_records_delivered(
+    conn: sqlite3.Connection,
+    record_ids: list[int],
+    release_ids: list[int],
+) -> int:
+    updated = conn.executemany(
+        "UPDATE sign_records SET status = 1, claimed_at = NULL WHERE id = ? AND status = 2",
+        [(record_id,) for record_id in record_ids],
+    ).rowcount
+    if release_ids:
+        conn.executemany(
+            "UPDATE sign_records SET status = 0, claimed_at = NULL WHERE id = ? AND status = 2",
+            [(record_id,) for record_id in release_ids],
+        )
+    return updated
+
+
+async def mark_sign_records_delivered(
+    record_ids: list[int],
+    release_ids: Optional[list[int]] = None,
+) -> int:
+    """
+    在单个事务中完成认领：record_ids 标记为已发放，release_ids（发放失败）退回待发放。
+
+    Returns:
+        标记为已发放的行数
+    """
+    if not record_ids and not release_ids:
+        return 0
+    return await run_transaction(
+        _mark_sign_records_delivered, list(record_ids), list(release_ids or [])
+    )
+
+
+async def finish_sign_in_delivery(
+    qq_id: str,
+    room_id: int,
+    sign_date: date,
+    delivered: bool,
+) -> int:
+    """完成签到时即时发放的认领：成功标记为已发放，失败退回待发放。"""
+    return await execute(
+        """
+        UPDATE sign_records
+        SET status = ?, claimed_at = NULL
+        WHERE qq_id = ? AND room_id = ? AND sign_date = ? AND status = 2
+        """,
+        (
+            SIGN_STATUS_DELIVERED if delivered else SIGN_STATUS_PENDING,
+            qq_id,
+            room_id,
+            sign_date.isoformat(),
+        ),
+    )
+
+
+async def release_stale_sign_claims(timeout: float) -> int:
+    """将认领超过 timeout 秒仍未完成的记录退回待发放（进程中断等情况），返回退回的行数。"""
+    return await execute(
+        """
+        UPDATE sign_records
+        SET status = 0, claimed_at = NULL
+        WHERE status = 2 AND (claimed_at IS NULL OR claimed_at <= datetime('now', ?))
+        """,
+        (f"-{int(timeout)} seconds",),
+    )
+
+
 async def delete_sign_record(qq_id: str, sign_date: date, room_id: Optional[int] = None) -> int:
     """删除签到记录。"""
     if room_id is None:
@@ -449,6 +760,23 @@ async def delete_sign_record(qq_id: str, sign_date: date, room_id: Optional[int]
     )
 
 
+# 奖励配置版本号：奖励增删改或数据库切换时递增，供奖励表缓存判断是否失效
+_sign_rewards_version = 0
+
+
+def get_sign_rewards_version() -> int:
+    """获取奖励配置版本号。"""
+    return _sign_rewards_version
+
+
+def _bump_sign_rewards_version() -> None:
+    global _sign_rewards_version
+    _sign_rewards_version += 1
+
+
+add_close_callback(_bump_sign_rewards_version)
+
+
 async def create_sign_reward(
     level: int,
     continuous_days: int,
@@ -458,7 +786,7 @@ async def create_sign_reward(
 ) -> Optional[int]:
     """创建奖励配置。"""
     try:
-        return await execute_returning_id(
+        reward_id = await execute_returning_id(
             """
             INSERT INTO sign_rewards (level, continuous_days, reward_items, bonus_points, description)
             VALUES (?, ?, ?, ?, ?)
@@ -467,6 +795,8 @@ async def create_sign_reward(
         )
     except sqlite3.IntegrityError:
         return None
+    _bump_sign_rewards_version()
+    return reward_id
 
 
 async def list_sign_rewards() -> list[SignReward]:
@@ -495,7 +825,7 @@ async def update_sign_reward(
     description: Optional[str] = None,
 ) -> int:
     """更新奖励配置。"""
-    return await execute(
+    updated = await execute(
         """
         UPDATE sign_rewards
         SET continuous_days = ?,
@@ -506,22 +836,73 @@ async def update_sign_reward(
         """,
         (continuous_days, _dump_json(reward_items), bonus_points, description, level),
     )
+    _bump_sign_rewards_version()
+    return updated
 
 
 async def delete_sign_reward(level: int) -> int:
     """删除奖励配置。"""
-    return await execute(
+    deleted = await execute(
         """
         DELETE FROM sign_rewards
         WHERE level = ?
         """,
         (level,),
     )
+    _bump_sign_rewards_version()
+    return deleted
+
+
+async def get_user_settings_many(keys: list[str]) -> dict[str, UserSettings]:
+    """
+    批量获取 user_settings（先查缓存，未命中的键合并为一次查询）。
+
+    不存在的行返回全空的 UserSettings。
+    """
+    cache = get_user_settings_cache()
+    unique_keys = list(dict.fromkeys(keys))
+    found = cache.get_many(unique_keys)
+    missing = [key for key in unique_keys if key not in found]
+    if missing:
+        generation = cache.generation
+        placeholders = ", ".join("?" for _ in missing)
+        rows = await fetch_all(
+            f"""
+            SELECT qq_id, default_room_id, last_room_id, ui_mode
+            FROM user_settings
+            WHERE qq_id IN ({placeholders})
+            """,
+            missing,
+        )
+        loaded = {
+            row["qq_id"]: UserSettings(
+                qq_id=row["qq_id"],
+                default_room_id=row["default_room_id"],
+                last_room_id=row["last_room_id"],
+                ui_mode=row["ui_mode"] or None,
+            )
+            for row in rows
+        }
+        buffer = get_last_room_buffer()
+        for key in missing:
+            entry = loaded.get(key) or UserSettings(qq_id=key)
+            # 叠加尚未落库的 last_room_id
+            pending = buffer.pending_value(key)
+            if pending is not None:
+                entry = replace(entry, last_room_id=pending)
+            cache.put(entry, generation)
+            found[key] = entry
+    return found
+
+
+async def get_user_settings(qq_id: str) -> UserSettings:
+    """获取单个用户的 user_settings（经缓存）。"""
+    return (await get_user_settings_many([qq_id]))[qq_id]
 
 
 async def set_user_default_room(qq_id: str, room_id: int) -> int:
     """设置用户默认房间（存在则更新）。"""
-    return await execute(
+    updated = await execute(
         """
         INSERT INTO user_settings (qq_id, default_room_id, updated_at)
         VALUES (?, ?, CURRENT_TIMESTAMP)
@@ -531,26 +912,18 @@ async def set_user_default_room(qq_id: str, room_id: int) -> int:
         """,
         (qq_id, room_id),
     )
+    get_user_settings_cache().update(qq_id, default_room_id=room_id)
+    return updated
 
 
 async def get_user_default_room(qq_id: str) -> Optional[int]:
     """获取用户默认房间。"""
-    row = await fetch_one(
-        """
-        SELECT default_room_id
-        FROM user_settings
-        WHERE qq_id = ?
-        """,
-        (qq_id,),
-    )
-    if not row:
-        return None
-    return row["default_room_id"]
+    return (await get_user_settings(qq_id)).default_room_id
 
 
 async def clear_user_default_room(qq_id: str) -> int:
     """清除用户默认房间。"""
-    return await execute(
+    updated = await execute(
         """
         UPDATE user_settings
         SET default_room_id = NULL,
@@ -559,13 +932,15 @@ async def clear_user_default_room(qq_id: str) -> int:
         """,
         (qq_id,),
     )
+    get_user_settings_cache().update(qq_id, default_room_id=None)
+    return updated
 
 
 async def set_user_ui_mode(qq_id: str, ui_mode: str) -> int:
     """设置用户 UI 展示模式（存在则更新）。"""
     if ui_mode not in {"text", "markdown"}:
         raise ValueError(f"Invalid ui_mode: {ui_mode}")
-    return await execute(
+    updated = await execute(
         """
         INSERT INTO user_settings (qq_id, ui_mode, updated_at)
         VALUES (?, ?, CURRENT_TIMESTAMP)
@@ -575,29 +950,19 @@ async def set_user_ui_mode(qq_id: str, ui_mode: str) -> int:
         """,
         (qq_id, ui_mode),
     )
+    get_user_settings_cache().update(qq_id, ui_mode=ui_mode)
+    return updated
 
 
 async def get_user_ui_mode(qq_id: str) -> Optional[str]:
     """获取用户 UI 展示模式。"""
-    row = await fetch_one(
-        """
-        SELECT ui_mode
-        FROM user_settings
-        WHERE qq_id = ?
-        """,
-        (qq_id,),
-    )
-    if not row:
-        return None
-    value = row["ui_mode"]
-    if not value:
-        return None
-    return str(value)
+    value = (await get_user_settings(qq_id)).ui_mode
+    return str(value) if value else None
 
 
 async def clear_user_ui_mode(qq_id: str) -> int:
     """清除用户 UI 展示模式。"""
-    return await execute(
+    updated = await execute(
         """
         UPDATE user_settings
         SET ui_mode = NULL,
@@ -606,11 +971,14 @@ async def clear_user_ui_mode(qq_id: str) -> int:
         """,
         (qq_id,),
     )
+    get_user_settings_cache().update(qq_id, ui_mode=None)
+    return updated
 
 
 async def set_user_last_room(qq_id: str, room_id: int) -> int:
     """设置用户/群组最近操作房间（存在则更新）。"""
-    return await execute(
+    get_last_room_buffer().forget(qq_id)
+    updated = await execute(
         """
         INSERT INTO user_settings (qq_id, last_room_id, updated_at)
         VALUES (?, ?, CURRENT_TIMESTAMP)
@@ -620,26 +988,19 @@ async def set_user_last_room(qq_id: str, room_id: int) -> int:
         """,
         (qq_id, room_id),
     )
+    get_user_settings_cache().update(qq_id, last_room_id=room_id)
+    return updated
 
 
 async def get_user_last_room(qq_id: str) -> Optional[int]:
     """获取用户/群组最近操作房间。"""
-    row = await fetch_one(
-        """
-        SELECT last_room_id
-        FROM user_settings
-        WHERE qq_id = ?
-        """,
-        (qq_id,),
-    )
-    if not row:
-        return None
-    return row["last_room_id"]
+    return (await get_user_settings(qq_id)).last_room_id
 
 
 async def clear_user_last_room(qq_id: str) -> int:
     """清除用户/群组最近操作房间。"""
-    return await execute(
+    get_last_room_buffer().forget(qq_id)
+    updated = await execute(
         """
         UPDATE user_settings
         SET last_room_id = NULL,
@@ -648,13 +1009,19 @@ async def clear_user_last_room(qq_id: str) -> int:
         """,
         (qq_id,),
     )
+    get_user_settings_cache().update(qq_id, last_room_id=None)
+    return updated
 
 
 __all__ = [
     "SignUser",
     "SignRecord",
+    "SignInOutcome",
     "PendingSignRecord",
     "SignReward",
+    "SignRecordSummary",
+    "LeaderboardEntry",
+    "UserSettings",
     "init_db",
     "create_user_binding",
     "get_user_binding",
@@ -662,16 +1029,36 @@ __all__ = [
     "update_user_sign_stats",
     "delete_user_binding",
     "create_sign_record",
+    "record_sign_in",
+    "get_room_sign_version",
+    "LEADERBOARD_METRICS",
+    "list_sign_leaderboard",
+    "count_sign_leaderboard",
     "get_sign_record",
     "list_sign_records",
+    "count_sign_records",
+    "list_sign_record_summaries",
     "list_pending_sign_records",
+    "list_pending_reward_rooms",
+    "list_room_pending_sign_records",
+    "list_user_pending_sign_records",
     "delete_sign_record",
     "update_sign_record_status",
+    "SIGN_STATUS_PENDING",
+    "SIGN_STATUS_DELIVERED",
+    "SIGN_STATUS_DELIVERING",
+    "claim_sign_records",
+    "mark_sign_records_delivered",
+    "finish_sign_in_delivery",
+    "release_stale_sign_claims",
     "create_sign_reward",
     "list_sign_rewards",
+    "get_sign_rewards_version",
     "get_sign_reward",
     "update_sign_reward",
     "delete_sign_reward",
+    "get_user_settings",
+    "get_user_settings_many",
     "set_user_default_room",
     "get_user_default_room",
     "clear_user_default_room",
@@ -0,0 +1,201 @@
+"""
+数据库查询分析
+
+可选开启：按归一化 SQL 聚合每条语句的执行次数、总耗时与最大耗时，
+超过阈值的语句连同 EXPLAIN QUERY PLAN 记入慢查询日志。关闭时只有一次布尔判断的开销。
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+from loguru import logger
+
+# 保留的慢查询条数
+SLOW_LOG_SIZE = 20
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+
+# 支持 EXPLAIN QUERY PLAN 的语句
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE")
+
+
+def normalize_sql(sql: str) -> str:
+    """归一化 SQL：合并空白、字面量替换为 ?、IN 列表折叠为 IN (...)。"""
+    text = _WHITESPACE.sub(" ", sql).strip().rstrip(";").strip()
+    text = _STRING_LITERAL.sub("?", text)
+    text = _NUMBER_LITERAL.sub("?", text)
+    return _IN_LIST.sub("IN (...)", text)
+
+
+class QueryStats:
+    """单条归一化语句的计数器"""
+
+    __slots__ = ("count", "total_ms", "max_ms")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+
+class ProfilingConnection(sqlite3.Connection):
+    """
+    可按语句计时的连接
+
+    profile_statements 为 True 时，execute/executemany/executescript 的每条语句都经
+    QueryProfiler 记录（含慢查询 EXPLAIN）；用于事务函数内部的语句，默认关闭。
+    """
+
+    profile_statements = False
+
+    def execute(self, sql: str, parameters: Any = (), /) -> sqlite3.Cursor:
+        if not self.profile_statements:
+            return super().execute(sql, parameters)
+        started = time.perf_counter()
+        cursor = super().execute(sql, parameters)
+        _profiler.record(sql, time.perf_counter() - started, self, parameters)
+        return cursor
+
+    def executemany(self, sql: str, parameters: Any, /) -> sqlite3.Cursor:
+        if not self.profile_statements:
+            return super().executemany(sql, parameters)
+        rows = list(parameters)
+        started = time.perf_counter()
+        cursor = super().executemany(sql, rows)
+        _profiler.record(sql, time.perf_counter() - started, self, rows[0] if rows else ())
+        return cursor
+
+    def executescript(self, sql_script: str, /) -> sqlite3.Cursor:
+        if not self.profile_statements:
+            return super().executescript(sql_script)
+        started = time.perf_counter()
+        cursor = super().executescript(sql_script)
+        # 脚本可能包含多条语句，不获取查询计划
+        _profiler.record(sql_script, time.perf_counter() - started)
+        return cursor
+
+
+def _total_ms(row: Dict[str, Any]) -> float:
+    return float(row["total_ms"])
+
+
+class QueryProfiler:
+    """
+    查询分析器（读写线程共用，内部加锁）
+
+    Attributes:
+        enabled: 是否记录
+        slow_threshold_ms: 慢查询阈值（毫秒）
+    """
+
+    def __init__(self, enabled: bool = False, slow_threshold_ms: float = 100.0) -> None:
+        self.enabled = enabled
+        self.slow_threshold_ms = slow_threshold_ms
+        self._stats: Dict[str, QueryStats] = {}
+        self._slow: Deque[Dict[str, Any]] = deque(maxlen=SLOW_LOG_SIZE)
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        sql: str,
+        elapsed: float,
+        conn: Optional[sqlite3.Connection] = None,
+        params: Sequence[Any] = (),
+    ) -> None:
+        """记录一次执行（elapsed 单位为秒），超过阈值时获取查询计划并写入慢查询日志。"""
+        key = normalize_sql(sql)
+        elapsed_ms = elapsed * 1000
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = QueryStats()
+            stats.count += 1
+            stats.total_ms += elapsed_ms
+            if elapsed_ms > stats.max_ms:
+                stats.max_ms = elapsed_ms
+
+        if elapsed_ms < self.slow_threshold_ms:
+            return
+        plan = self._explain(conn, sql, params) if conn is not None else []
+        with self._lock:
+            self._slow.append(
+                {"sql": key, "elapsed_ms": elapsed_ms, "plan": plan, "at": time.time()}
+            )
+        logger.warning(
+            "慢查询 {:.1f}ms：{}{}",
+            elapsed_ms,
+            key,
+            "".join(f"\n  {line}" for line in plan),
+        )
+
+    @staticmethod
+    def _explain(conn: sqlite3.Connection, sql: str, params: Sequence[Any]) -> List[str]:
+        statement = sql.strip()
+        if not statement.upper().startswith(_EXPLAINABLE):
+            return []
+        try:
+            # 绕过 ProfilingConnection.execute，EXPLAIN 本身不计入统计
+            rows = sqlite3.Connection.execute(
+                conn, "EXPLAIN QUERY PLAN " + statement, params
+            ).fetchall()
+        except sqlite3.Error:
+            return []
+        return [str(row[-1]) for row in rows]
+
+    def snapshot(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """导出各语句统计（按总耗时降序）。"""
+        with self._lock:
+            rows = [
+                {
+                    "sql": sql,
+                    "count": stats.count,
+                    "total_ms": stats.total_ms,
+                    "avg_ms": stats.total_ms / stats.count if stats.count else 0.0,
+                    "max_ms": stats.max_ms,
+                }
+                for sql, stats in self._stats.items()
+            ]
+        rows.sort(key=_total_ms, reverse=True)
+        return rows[:limit] if limit is not None else rows
+
+    def slow_queries(self) -> List[Dict[str, Any]]:
+        """最近的慢查询（新的在前）。"""
+        with self._lock:
+            return list(reversed(self._slow))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._slow.clear()
+
+
+_profiler = QueryProfiler()
+
+
+def get_query_profiler() -> QueryProfiler:
+    return _profiler
+
+
+def configure_query_profiler(enabled: bool, slow_threshold_ms: Optional[float] = None) -> None:
+    """开启/关闭查询分析，可同时设置慢查询阈值（毫秒）。"""
+    _profiler.enabled = enabled
+    if slow_threshold_ms is not None:
+        _profiler.slow_threshold_ms = slow_threshold_ms
+
+
+__all__ = [
+    "ProfilingConnection",
+    "QueryProfiler",
+    "configure_query_profiler",
+    "get_query_profiler",
+    "normalize_sql",
+]
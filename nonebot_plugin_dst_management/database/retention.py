@@ -0,0 +1,250 @@
+"""
+签到记录保留与归档
+
+sign_records 每人每房间每天一行。超过保留天数且已发放（status = 1）的记录
+按 (qq_id, room_id, 月份) 合并进 sign_record_summaries 后删除；
+每批在独立的短事务中完成，批次之间其他写入可以插队，最后以增量 VACUUM 归还空闲页。
+
+增量 VACUUM 需要 auto_vacuum = INCREMENTAL：新建的数据库默认开启，
+旧库需手动执行一次 ``PRAGMA auto_vacuum = INCREMENTAL; VACUUM;``，否则只归档不回收空间。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from .connection import run_transaction, run_with_connection
+
+DEFAULT_BATCH_SIZE = 500
+# 每次增量 VACUUM 最多回收的页数
+VACUUM_PAGES_PER_STEP = 256
+
+_SELECT_BATCH = """
+SELECT id, qq_id, room_id, sign_date, reward_level
+FROM sign_records
+WHERE id > ? AND status = 1 AND sign_date < ?
+ORDER BY id
+LIMIT ?
+"""
+
+_UPSERT_SUMMARY = """
+INSERT INTO sign_record_summaries
+    (qq_id, room_id, month, sign_count, first_sign_date, last_sign_date, max_reward_level)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(qq_id, room_id, month)
+DO UPDATE SET sign_count = sign_count + excluded.sign_count,
+              first_sign_date = MIN(first_sign_date, excluded.first_sign_date),
+              last_sign_date = MAX(last_sign_date, excluded.last_sign_date),
+              max_reward_level = MAX(max_reward_level, excluded.max_reward_level)
+"""
+
+
+def _archive_batch(
+    conn: sqlite3.Connection,
+    after_id: int,
+    cutoff: str,
+    batch_size: int,
+) -> Tuple[int, int]:
+    """归档一批记录，返回 (归档行数, 本批最大 id)。"""
+    rows = conn.execute(_SELECT_BATCH, (after_id, cutoff, batch_size)).fetchall()
+    if not rows:
+        return 0, after_id
+
+    summaries: Dict[Tuple[str, int, str], List[Any]] = {}
+    for row in rows:
+        day = str(row["sign_date"])[:10]
+        key = (row["qq_id"], row["room_id"], day[:7])
+        summary = summaries.get(key)
+        if summary is None:
+            summaries[key] = [1, day, day, row["reward_level"] or 0]
+            continue
+        summary[0] += 1
+        summary[1] = min(summary[1], day)
+        summary[2] = max(summary[2], day)
+        summary[3] = max(summary[3], row["reward_level"] or 0)
+
+    conn.executemany(_UPSERT_SUMMARY, [(*key, *values) for key, values in summaries.items()])
+    conn.executemany("DELETE FROM sign_records WHERE id = ?", [(row["id"],) for row in rows])
+    return len(rows), rows[-1]["id"]
+
+
+async def archive_sign_records(
+    retention_days: int,
+    *,
+    today: Optional[date] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """
+    将早于 retention_days 天的已发放签到记录归档为月度汇总
+
+    Returns:
+        归档（删除）的记录数；retention_days <= 0 时不做处理
+    """
+    if retention_days <= 0:
+        return 0
+    cutoff = ((today or date.today()) - timedelta(days=retention_days)).isoformat()
+    batch_size = max(1, batch_size)
+    total = 0
+    after_id = 0
+    while True:
+        archived, after_id = await run_transaction(_archive_batch, after_id, cutoff, batch_size)
+        total += archived
+        if archived < batch_size:
+            return total
+
+
+def _incremental_vacuum(conn: sqlite3.Connection, pages: int) -> Optional[int]:
+    """回收最多 pages 个空闲页，返回回收页数；未开启增量模式时返回 None。"""
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        return None
+    before: int = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if before == 0:
+        return 0
+    # execute() 只单步执行一次（仅回收一页），executescript 会执行到结束
+    conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+    after: int = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return before - after
+
+
+async def vacuum_free_pages(pages_per_step: int = VACUUM_PAGES_PER_STEP) -> Optional[int]:
+    """分步执行增量 VACUUM 直到没有空闲页，返回回收页数；未开启增量模式时返回 None。"""
+    total = 0
+    while True:
+        freed = await run_with_connection(_incremental_vacuum, pages_per_step)
+        if freed is None:
+            return None if total == 0 else total
+        total += freed
+        if freed < pages_per_step:
+            return total
+
+
+class SignRecordRetention:
+    """
+    签到记录定时归档任务
+
+    Attributes:
+        retention_days: 明细保留天数
+        interval: 执行间隔（秒）
+        batch_size: 单个事务归档的记录数
+    """
+
+    def __init__(
+        self,
+        retention_days: int,
+        interval: float = 6 * 3600,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        self.retention_days = retention_days
+        self.interval = interval
+        self.batch_size = batch_size
+        self.runs = 0
+        self.archived = 0
+        self.pages_freed = 0
+        self.last_run: Optional[float] = None
+        self._vacuum_hint_logged = False
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info("签到记录归档任务已启动，保留 {} 天", self.retention_days)
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("签到记录归档失败：{}", exc)
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """执行一次归档与空间回收。"""
+        archived = await archive_sign_records(
+            self.retention_days, today=today, batch_size=self.batch_size
+        )
+        freed = await vacuum_free_pages() if archived else 0
+        self.runs += 1
+        self.archived += archived
+        self.pages_freed += freed or 0
+        self.last_run = time.time()
+        if archived:
+            logger.info("已归档 {} 条签到记录，回收 {} 页", archived, freed or 0)
+        if freed is None and not self._vacuum_hint_logged:
+            self._vacuum_hint_logged = True
+            logger.info(
+                "数据库未开启增量 VACUUM，归档释放的空间不会归还；"
+                "可停机执行一次 PRAGMA auto_vacuum = INCREMENTAL; VACUUM;"
+            )
+        return {"archived": archived, "pages_freed": freed}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "retention_days": self.retention_days,
+            "runs": self.runs,
+            "archived": self.archived,
+            "pages_freed": self.pages_freed,
+            "last_run": self.last_run,
+        }
+
+
+_retention: Optional[SignRecordRetention] = None
+
+
+def get_sign_retention() -> Optional[SignRecordRetention]:
+    """获取归档任务（未启用时返回 None）。"""
+    return _retention
+
+
+def start_sign_retention(
+    retention_days: int,
+    interval: float = 6 * 3600,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Optional[SignRecordRetention]:
+    """启动定时归档任务；retention_days <= 0 时不启用。"""
+    global _retention
+    if retention_days <= 0:
+        return None
+    if _retention is None:
+        _retention = SignRecordRetention(retention_days, interval, batch_size)
+    _retention.start()
+    return _retention
+
+
+async def stop_sign_retention() -> None:
+    global _retention
+    if _retention is not None:
+        await _retention.stop()
+    _retention = None
+
+
+__all__ = [
+    "SignRecordRetention",
+    "archive_sign_records",
+    "get_sign_retention",
+    "start_sign_retention",
+    "stop_sign_retention",
+    "vacuum_free_pages",
+]
@@ -0,0 +1,110 @@
+"""
+user_settings 行缓存
+
+按 qq_id（或 group:<id> 上下文键）缓存 user_settings 行的有界 LRU，
+setter 写穿更新，数据库路径变化或连接关闭时整体清空。
+不存在的行也会缓存为全空条目，避免重复查询。
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterable, Optional
+
+from .connection import add_close_callback
+
+DEFAULT_MAX_ENTRIES = 1024
+
+
+@dataclass(frozen=True)
+class UserSettings:
+    qq_id: str
+    default_room_id: Optional[int] = None
+    last_room_id: Optional[int] = None
+    ui_mode: Optional[str] = None
+
+
+class UserSettingsCache:
+    """user_settings 行的 LRU 缓存（线程安全，数据库连接关闭回调可能在写线程触发）"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, UserSettings]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 每次写入/清空递增；加载期间发生过写入时丢弃加载结果，避免旧值覆盖写穿结果
+        self.generation = 0
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, UserSettings]:
+        """返回已缓存的条目，并按命中/未命中计数。"""
+        found: Dict[str, UserSettings] = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end(key)
+                self.hits += 1
+                found[key] = entry
+        return found
+
+    def peek(self, key: str) -> Optional[UserSettings]:
+        """读取条目但不计数、不调整 LRU 顺序。"""
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, entry: UserSettings, generation: Optional[int] = None) -> None:
+        """写入从数据库加载的条目；generation 与当前不一致时不缓存。"""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[entry.qq_id] = entry
+            self._entries.move_to_end(entry.qq_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def update(self, qq_id: str, **fields: Any) -> None:
+        """写穿：已缓存的条目就地更新字段，未缓存则不做处理（下次读取时加载）。"""
+        with self._lock:
+            self.generation += 1
+            entry = self._entries.get(qq_id)
+            if entry is not None:
+                self._entries[qq_id] = replace(entry, **fields)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+
+_cache = UserSettingsCache()
+add_close_callback(_cache.clear)
+
+
+def get_user_settings_cache() -> UserSettingsCache:
+    return _cache
+
+
+def get_user_settings_cache_stats() -> Dict[str, int]:
+    """获取 user_settings 缓存命中统计。"""
+    return _cache.stats()
+
+
+__all__ = [
+    "UserSettings",
+    "UserSettingsCache",
+    "get_user_settings_cache",
+    "get_user_settings_cache_stats",
+]
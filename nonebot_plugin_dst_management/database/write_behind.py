@@ -0,0 +1,185 @@
+"""
+last_room_id 写回缓冲
+
+remember_room 几乎每条命令都会为群组与用户各写一次 last_room_id，且多数值未变化。
+缓冲区在值与缓存一致时直接跳过；变化的值暂存在内存中，
+每隔 flush_interval 秒（或关闭时）以一次 executemany 事务批量写入。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Dict, Optional
+
+from loguru import logger
+
+from .connection import add_close_callback, execute_many
+from .settings_cache import get_user_settings_cache
+
+DEFAULT_FLUSH_INTERVAL = 0.5
+# 写入失败后的重试间隔上限（秒），失败间隔从 flush_interval 起逐次翻倍
+MAX_RETRY_DELAY = 30.0
+
+_UPSERT_LAST_ROOM = """
+INSERT INTO user_settings (qq_id, last_room_id, updated_at)
+VALUES (?, ?, CURRENT_TIMESTAMP)
+ON CONFLICT(qq_id)
+DO UPDATE SET last_room_id = excluded.last_room_id,
+              updated_at = CURRENT_TIMESTAMP
+"""
+
+
+class LastRoomWriteBuffer:
+    """
+    last_room_id 写回缓冲
+
+    Attributes:
+        flush_interval: 批量写入间隔（秒），0 表示每次立即写入
+    """
+
+    def __init__(self, flush_interval: float = DEFAULT_FLUSH_INTERVAL) -> None:
+        self.flush_interval = flush_interval
+        self.queued = 0
+        self.skipped = 0
+        self.flushes = 0
+        self.rows_written = 0
+        # 连续失败次数，用于计算重试退避
+        self._failures = 0
+        self._pending: Dict[str, int] = {}
+        # 正在写入的批次，写入完成前仍作为读取覆盖值
+        self._flushing: Dict[str, int] = {}
+        # 同一时间只有一个批次在写入：失败放回的旧值不会覆盖后续批次，_flushing 也不会被替换
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def pending_value(self, key: str) -> Optional[int]:
+        """获取尚未落库的 last_room_id（无则返回 None）。"""
+        value = self._pending.get(key)
+        return value if value is not None else self._flushing.get(key)
+
+    async def remember(self, key: str, room_id: int) -> bool:
+        """
+        记录最近操作房间
+
+        Returns:
+            是否产生了新的待写入值（值未变化时为 False）
+        """
+        current = self.pending_value(key)
+        if current is None:
+            cached = get_user_settings_cache().peek(key)
+            current = cached.last_room_id if cached is not None else None
+        if current == room_id:
+            self.skipped += 1
+            return False
+
+        self._pending[key] = room_id
+        self.queued += 1
+        # 先更新缓存，后续读取立即可见
+        get_user_settings_cache().update(key, last_room_id=room_id)
+        if self.flush_interval <= 0:
+            await self.flush()
+        elif self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_later())
+        return True
+
+    async def _flush_later(self, delay: Optional[float] = None) -> None:
+        await asyncio.sleep(self.flush_interval if delay is None else delay)
+        await self.flush()
+
+    async def flush(self, *, retry: bool = True) -> None:
+        """
+        立即写入所有待写入值（单个事务）
+
+        写入失败时值放回缓冲；retry 为 True 时按指数退避安排下一次写入。
+        并发调用依次执行，后到的调用写入前一批次之后产生的值。
+        """
+        if not self._pending:
+            return
+        async with self._flush_lock:
+            await self._flush_batch(retry)
+
+    async def _flush_batch(self, retry: bool) -> None:
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        self._flushing = batch
+        try:
+            await execute_many(_UPSERT_LAST_ROOM, list(batch.items()))
+        except Exception as exc:
+            for key, value in batch.items():
+                self._pending.setdefault(key, value)
+            self._failures += 1
+            if not retry:
+                logger.warning("批量写入 last_room_id 失败：{}", exc)
+                return
+            base = self.flush_interval if self.flush_interval > 0 else DEFAULT_FLUSH_INTERVAL
+            delay = min(MAX_RETRY_DELAY, base * 2 ** (self._failures - 1))
+            logger.warning("批量写入 last_room_id 失败，{:.1f} 秒后重试：{}", delay, exc)
+            self._schedule(delay)
+            return
+        finally:
+            self._flushing = {}
+        # 写入成功，重置重试退避
+        self._failures = 0
+        self.flushes += 1
+        self.rows_written += len(batch)
+
+    def _schedule(self, delay: float) -> None:
+        # 当前正在执行的定时任务即将结束，需要替换为新任务
+        if self._task is None or self._task.done() or self._task is asyncio.current_task():
+            self._task = asyncio.create_task(self._flush_later(delay))
+
+    def forget(self, key: str) -> None:
+        """丢弃指定键的待写入值（直接写库后调用，避免被旧值覆盖）。"""
+        self._pending.pop(key, None)
+
+    def discard(self) -> None:
+        """丢弃待写入值（数据库路径切换时调用）。"""
+        self._pending.clear()
+        self._flushing = {}
+
+    async def close(self) -> None:
+        """取消定时写入并写入剩余值。"""
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush(retry=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self.queued,
+            "skipped": self.skipped,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "pending": len(self._pending),
+        }
+
+
+_buffer = LastRoomWriteBuffer()
+add_close_callback(_buffer.discard)
+
+
+def get_last_room_buffer() -> LastRoomWriteBuffer:
+    return _buffer
+
+
+def configure_last_room_buffer(flush_interval: float) -> None:
+    """设置批量写入间隔（秒），0 表示立即写入。"""
+    _buffer.flush_interval = flush_interval
+
+
+async def flush_last_room_writes() -> None:
+    """写入所有缓冲中的 last_room_id（插件关闭前调用）。"""
+    await _buffer.close()
+
+
+__all__ = [
+    "LastRoomWriteBuffer",
+    "configure_last_room_buffer",
+    "flush_last_room_writes",
+    "get_last_room_buffer",
+]
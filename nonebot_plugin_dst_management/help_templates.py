@@ -44,6 +44,7 @@ HELP_TEXT_ONEBOT_V11: str = """\
   🧾 /dst sign bind <KU_ID> [房间ID]  签到绑定
   🎁 /dst sign [房间ID]               签到
   🔓 /dst sign unbind [房间ID]        签到解绑
+  🏆 /dst sign rank [类型] [页码]      签到排行榜
   🤖 /dst analyze <房间ID>            AI 配置分析
   🧠 /dst mod recommend <房间ID> [类型]   AI 模组推荐
   🧩 /dst mod parse <房间ID> <世界ID>     AI 模组配置解析
@@ -95,6 +96,7 @@ HELP_MARKDOWN_QQ: str = """\
 - `/dst sign bind <KU_ID> [房间ID]`：签到绑定
 - `/dst sign [房间ID]`：签到
 - `/dst sign unbind [房间ID]`：签到解绑
+- `/dst sign rank [连续|积分|次数] [页码] [房间ID]`：签到排行榜
 - `/dst analyze <房间ID>`：AI 配置分析
 - `/dst mod recommend <房间ID> [类型]`：AI 模组推荐
 - `/dst mod parse <房间ID> <世界ID>`：AI 模组配置解析
@@ -5,7 +5,8 @@ This module implements "session locking" / context awareness for room-scoped com
 - Remember the last successfully operated room per user and per group.
 - When a command omits the room id, fall back to last room, then default room.
 
-Persistence: stored in the sqlite `user_settings.last_room_id` column.
+Persistence: stored in the sqlite `user_settings.last_room_id` column; lookups go
+through the in-process user_settings cache and writes through a write-behind buffer.
 """
 
 from __future__ import annotations
@@ -17,7 +18,12 @@ from typing import Any, Optional
 from loguru import logger
 
 from .commands import parse_room_id
-from ..database import get_user_default_room, get_user_last_room, set_user_last_room
+from ..database import (
+    UserSettings,
+    get_last_room_buffer,
+    get_user_settings,
+    get_user_settings_many,
+)
 
 
 class RoomSource(str, Enum):
@@ -95,22 +101,31 @@ async def resolve_room_id(event: Any, room_id_arg: Optional[str]) -> Optional[Ro
             return None
         return RoomResolution(room_id=room_id, source=RoomSource.ARG)
 
-    for key in _iter_context_keys(event):
-        try:
-            last = await get_user_last_room(key)
-        except Exception as exc:
-            logger.warning(f"读取 last_room_id 失败({key}): {exc}")
-            continue
+    keys = _iter_context_keys(event)
+    if not keys:
+        return None
+
+    # group/user 的 last_room_id 与 default_room_id 一次读取（经缓存）
+    settings: dict[str, UserSettings] = {}
+    try:
+        settings = await get_user_settings_many(keys)
+    except Exception as exc:
+        logger.warning(f"批量读取房间上下文失败({', '.join(keys)})，逐个读取: {exc}")
+        # 逐个读取：单个来源失败时仍可回退到其余来源
+        for key in keys:
+            try:
+                settings[key] = await get_user_settings(key)
+            except Exception as key_exc:
+                logger.warning(f"读取房间上下文失败({key}): {key_exc}")
+
+    for key in keys:
+        last = settings[key].last_room_id if key in settings else None
         if last is not None:
             return RoomResolution(room_id=int(last), source=RoomSource.LAST, context_key=key)
 
     user_id = _extract_user_id(event)
-    if user_id:
-        try:
-            default_room = await get_user_default_room(user_id)
-        except Exception as exc:
-            logger.warning(f"读取 default_room_id 失败({user_id}): {exc}")
-            default_room = None
+    if user_id and user_id in settings:
+        default_room = settings[user_id].default_room_id
         if default_room is not None:
             return RoomResolution(room_id=int(default_room), source=RoomSource.DEFAULT)
 
@@ -118,7 +133,10 @@ async def resolve_room_id(event: Any, room_id_arg: Optional[str]) -> Optional[Ro
 
 
 async def remember_room(event: Any, room_id: int) -> None:
-    """Persist last operated room for group/user context (best-effort)."""
+    """Persist last operated room for group/user context (best-effort).
+
+    Unchanged values are skipped; changed values are written behind in batches.
+    """
 
     if room_id <= 0:
         return
@@ -128,7 +146,7 @@ async def remember_room(event: Any, room_id: int) -> None:
 
     for key in keys:
         try:
-            await set_user_last_room(key, int(room_id))
+            await get_last_room_buffer().remember(key, int(room_id))
         except Exception as exc:
             logger.warning(f"写入 last_room_id 失败({key}): {exc}")
 
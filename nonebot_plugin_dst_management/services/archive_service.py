@@ -16,6 +16,7 @@ from zipfile import ZipFile, BadZipFile
 
 import httpx
 
+from ..client.transfer import DEFAULT_CHUNK_SIZE, write_chunks
 from ..config import get_dst_config
 
 
@@ -36,6 +37,9 @@ class ArchiveService:
     def __init__(self, work_dir: Optional[str] = None):
         config = get_dst_config()
         self.ai_enabled = bool(config.dst_enable_ai)
+        self.max_bytes = int(config.dst_archive_max_bytes)
+        self.upload_rate_limit = int(config.dst_archive_upload_rate_limit)
+        self.chunk_size = int(config.dst_archive_chunk_size) or DEFAULT_CHUNK_SIZE
         base_dir = Path(work_dir) if work_dir else Path(tempfile.gettempdir())
         self.work_dir = base_dir / "dst_archives"
         self.work_dir.mkdir(parents=True, exist_ok=True)
@@ -69,13 +73,20 @@ class ArchiveService:
         return {"success": True, "path": str(path), "cleanup": False}
 
     async def download_file(self, url: str, dest: Path) -> None:
-        """下载文件到指定路径"""
+        """流式下载文件到指定路径（超过大小上限时中止并删除部分文件）"""
         dest.parent.mkdir(parents=True, exist_ok=True)
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            with open(dest, "wb") as f:
-                f.write(response.content)
+        try:
+            async with httpx.AsyncClient(timeout=30) as client:
+                async with client.stream("GET", url) as response:
+                    response.raise_for_status()
+                    await write_chunks(
+                        response.aiter_bytes(self.chunk_size),
+                        dest,
+                        max_bytes=self.max_bytes or None,
+                    )
+        except BaseException:
+            self.cleanup_file(str(dest))
+            raise
 
     def validate_archive(self, archive_path: str) -> Dict[str, object]:
         """
@@ -0,0 +1,166 @@
+"""
+签到排行榜服务
+
+排行数据直接来自 sign_users 中随签到事务更新的聚合列，由覆盖索引支撑分页查询；
+每个房间、每个指标的前 N 名缓存在内存中，房间签到数据写入后下次读取时刷新。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, Optional, Tuple
+
+from ..database import (
+    LEADERBOARD_METRICS,
+    LeaderboardEntry,
+    count_sign_leaderboard,
+    get_room_sign_version,
+    list_sign_leaderboard,
+)
+
+# 指标别名 -> sign_users 列
+METRIC_ALIASES: Dict[str, str] = {
+    "continuous": "continuous_days",
+    "streak": "continuous_days",
+    "连续": "continuous_days",
+    "points": "total_points",
+    "积分": "total_points",
+    "count": "sign_count",
+    "total": "sign_count",
+    "次数": "sign_count",
+    "累计": "sign_count",
+}
+
+METRIC_LABELS: Dict[str, str] = {
+    "continuous_days": "连续签到",
+    "total_points": "签到积分",
+    "sign_count": "累计签到",
+}
+
+
+def resolve_metric(value: Optional[str]) -> Optional[str]:
+    """解析排行指标（支持别名），无法识别时返回 None。"""
+    key = (value or "continuous").strip().lower()
+    if key in LEADERBOARD_METRICS:
+        return key
+    return METRIC_ALIASES.get(key)
+
+
+@dataclass(frozen=True)
+class LeaderboardPage:
+    metric: str
+    page: int
+    page_size: int
+    total: int
+    entries: list[LeaderboardEntry]
+
+    @property
+    def total_pages(self) -> int:
+        return max(1, (self.total + self.page_size - 1) // self.page_size)
+
+
+class LeaderboardService:
+    """
+    排行榜服务
+
+    Attributes:
+        top_n: 每个房间/指标缓存的名次数，第一页不超过该数量时直接读缓存
+    """
+
+    def __init__(self, top_n: int = 10) -> None:
+        self.top_n = max(1, top_n)
+        self.hits = 0
+        self.misses = 0
+        # (房间, 指标, 活跃起始日) -> (房间数据版本, 前 N 名, 上榜人数)
+        self._top: Dict[
+            Tuple[int, str, Optional[date]], Tuple[int, list[LeaderboardEntry], int]
+        ] = {}
+
+    @staticmethod
+    def _active_since(metric: str, today: Optional[date]) -> Optional[date]:
+        if metric != "continuous_days":
+            return None
+        # 昨天或今天签到过的用户连续天数仍然有效
+        return (today or date.today()) - timedelta(days=1)
+
+    async def get_top(
+        self,
+        room_id: int,
+        metric: str,
+        today: Optional[date] = None,
+    ) -> Tuple[list[LeaderboardEntry], int]:
+        """获取前 N 名与上榜人数（房间数据未变化时直接返回缓存）。"""
+        active_since = self._active_since(metric, today)
+        key = (room_id, metric, active_since)
+        version = get_room_sign_version(room_id)
+        cached = self._top.get(key)
+        if cached is not None and cached[0] == version:
+            self.hits += 1
+            return cached[1], cached[2]
+
+        self.misses += 1
+        entries = await list_sign_leaderboard(
+            room_id, metric, limit=self.top_n, active_since=active_since
+        )
+        total = (
+            len(entries)
+            if len(entries) < self.top_n
+            else await count_sign_leaderboard(room_id, metric, active_since=active_since)
+        )
+        # 丢弃其他日期的旧缓存
+        for stale in [k for k in self._top if k[:2] == (room_id, metric) and k != key]:
+            del self._top[stale]
+        self._top[key] = (version, entries, total)
+        return entries, total
+
+    async def get_page(
+        self,
+        room_id: int,
+        metric: str,
+        page: int = 1,
+        page_size: int = 10,
+        today: Optional[date] = None,
+    ) -> LeaderboardPage:
+        """分页获取排行榜，前 N 名范围内的页面由缓存提供。"""
+        page = max(1, page)
+        offset = (page - 1) * page_size
+        entries, total = await self.get_top(room_id, metric, today)
+        # 缓存覆盖所请求的名次（或整个榜单都在缓存内）时直接切片
+        if offset + page_size <= self.top_n or total <= self.top_n:
+            return LeaderboardPage(
+                metric, page, page_size, total, entries[offset:offset + page_size]
+            )
+
+        active_since = self._active_since(metric, today)
+        rows = await list_sign_leaderboard(
+            room_id, metric, limit=page_size, offset=offset, active_since=active_since
+        )
+        return LeaderboardPage(metric, page, page_size, total, rows)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._top)}
+
+
+def format_leaderboard(page: LeaderboardPage, room_id: int) -> str:
+    """渲染排行榜文本。"""
+    label = METRIC_LABELS.get(page.metric, page.metric)
+    unit = "分" if page.metric == "total_points" else "天"
+    lines = [f"🏆 {label}排行榜 · 房间 {room_id} (第 {page.page}/{page.total_pages} 页)", ""]
+    if not page.entries:
+        lines.append("暂无数据")
+        return "\n".join(lines)
+    medals = {1: "🥇", 2: "🥈", 3: "🥉"}
+    for entry in page.entries:
+        name = entry.player_name or entry.qq_id
+        lines.append(f"{medals.get(entry.rank, f'{entry.rank}.')} {name}  {entry.value}{unit}")
+    return "\n".join(lines)
+
+
+__all__ = [
+    "LeaderboardPage",
+    "LeaderboardService",
+    "METRIC_LABELS",
+    "format_leaderboard",
+    "resolve_metric",
+]
@@ -1,7 +1,30 @@
 """
-签到监视器模块初始化
+监视器模块初始化
+
+- 签到监视器：触发式发放待领取的签到奖励
+- 房间轮询器：可选的后台房间状态轮询与快照存储
 """
 
+from .room_poller import (
+    RoomPoller,
+    RoomSnapshot,
+    RoomSnapshotStore,
+    get_room_poller,
+    get_snapshot_store,
+    init_room_poller,
+    shutdown_room_poller,
+)
 from .sign_monitor import SignMonitor, get_sign_monitor, init_sign_monitor
 
-__all__ = ["SignMonitor", "get_sign_monitor", "init_sign_monitor"]
+__all__ = [
+    "RoomPoller",
+    "RoomSnapshot",
+    "RoomSnapshotStore",
+    "SignMonitor",
+    "get_room_poller",
+    "get_sign_monitor",
+    "get_snapshot_store",
+    "init_room_poller",
+    "init_sign_monitor",
+    "shutdown_room_poller",
+]
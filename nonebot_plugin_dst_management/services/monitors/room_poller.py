@@ -0,0 +1,357 @@
+"""
+房间状态后台轮询器
+
+按自适应间隔轮询房间列表、在线玩家与平台指标，结果写入内存快照，
+命令处理与签到监视器可直接读取快照而无需等待 DMP。
+
+- 有玩家在线的房间轮询最快，运行中但无人的房间其次，已停止的房间只随房间列表刷新
+- 同时进行的 DMP 请求数受信号量限制
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from ...client.api_client import DSTApiClient
+
+# 单轮房间列表分页大小
+ROOM_LIST_PAGE_SIZE = 50
+
+
+@dataclass
+class RoomSnapshot:
+    """单个房间的快照"""
+
+    room_id: int
+    room: Dict[str, Any]
+    updated_at: float
+    players: Optional[List[Dict[str, Any]]] = None
+    players_updated_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self.room.get("status"))
+
+    def players_age(self, now: Optional[float] = None) -> Optional[float]:
+        """在线玩家数据的年龄（秒），尚未获取时返回 None。"""
+        if self.players_updated_at is None:
+            return None
+        return (now if now is not None else time.monotonic()) - self.players_updated_at
+
+
+@dataclass
+class RoomSnapshotStore:
+    """房间快照存储（仅在事件循环内读写，无需加锁）"""
+
+    rooms: Dict[int, RoomSnapshot] = field(default_factory=dict)
+    rooms_updated_at: Optional[float] = None
+    metrics: Optional[Dict[str, Any]] = None
+    metrics_updated_at: Optional[float] = None
+
+    def update_rooms(self, rows: List[Dict[str, Any]], now: Optional[float] = None) -> None:
+        """以完整房间列表替换快照，保留仍存在房间的玩家数据。"""
+        now = now if now is not None else time.monotonic()
+        rooms: Dict[int, RoomSnapshot] = {}
+        for row in rows:
+            try:
+                room_id = int(row["id"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            previous = self.rooms.get(room_id)
+            snapshot = RoomSnapshot(room_id=room_id, room=dict(row), updated_at=now)
+            if previous is not None and snapshot.running:
+                snapshot.players = previous.players
+                snapshot.players_updated_at = previous.players_updated_at
+            elif not snapshot.running:
+                # 已停止的房间没有在线玩家
+                snapshot.players = []
+                snapshot.players_updated_at = now
+            rooms[room_id] = snapshot
+        self.rooms = rooms
+        self.rooms_updated_at = now
+
+    def update_players(
+        self,
+        room_id: int,
+        players: List[Dict[str, Any]],
+        now: Optional[float] = None,
+    ) -> None:
+        snapshot = self.rooms.get(room_id)
+        if snapshot is None:
+            return
+        snapshot.players = list(players)
+        snapshot.players_updated_at = now if now is not None else time.monotonic()
+
+    def update_metrics(self, metrics: Dict[str, Any], now: Optional[float] = None) -> None:
+        self.metrics = metrics
+        self.metrics_updated_at = now if now is not None else time.monotonic()
+
+    def invalidate_room(self, room_id: Optional[int]) -> None:
+        """
+        房间被写操作（启动/关闭/重启等）改变后使快照失效
+
+        房间列表整体标记为过期，该房间（room_id 为 None 时所有房间）的在线玩家清空，
+        读取方在下一轮轮询前回退为直接请求 DMP。
+        """
+        self.rooms_updated_at = None
+        targets = self.rooms.values() if room_id is None else [self.rooms.get(room_id)]
+        for snapshot in targets:
+            if snapshot is not None:
+                snapshot.players = None
+                snapshot.players_updated_at = None
+
+    def get_room(self, room_id: int) -> Optional[RoomSnapshot]:
+        return self.rooms.get(room_id)
+
+    def get_players(self, room_id: int, max_age: float) -> Optional[List[Dict[str, Any]]]:
+        """获取不超过 max_age 秒的在线玩家快照，过期或不存在时返回 None。"""
+        snapshot = self.rooms.get(room_id)
+        if snapshot is None or snapshot.players is None:
+            return None
+        age = snapshot.players_age()
+        if age is None or age > max_age:
+            return None
+        return list(snapshot.players)
+
+    def list_rooms(self, max_age: float) -> Optional[List[Dict[str, Any]]]:
+        """获取不超过 max_age 秒的房间列表快照（按 ID 排序）。"""
+        if self.rooms_updated_at is None or time.monotonic() - self.rooms_updated_at > max_age:
+            return None
+        return [self.rooms[room_id].room for room_id in sorted(self.rooms)]
+
+    def rooms_age(self) -> Optional[float]:
+        if self.rooms_updated_at is None:
+            return None
+        return time.monotonic() - self.rooms_updated_at
+
+
+def format_snapshot_age(age: Optional[float]) -> str:
+    """格式化快照年龄提示。"""
+    if age is None:
+        return ""
+    seconds = max(0, int(age))
+    if seconds < 60:
+        return f"（数据更新于 {seconds} 秒前）"
+    return f"（数据更新于 {seconds // 60} 分钟前）"
+
+
+class RoomPoller:
+    """
+    自适应房间轮询器
+
+    Attributes:
+        active_interval: 有玩家在线房间的玩家列表轮询间隔（秒）
+        idle_interval: 运行中但无人房间的轮询间隔（秒）
+        room_list_interval: 房间列表刷新间隔（秒），已停止的房间只随列表刷新
+        metrics_interval: 平台指标刷新间隔（秒），0 表示不轮询
+        concurrency: 同时进行的 DMP 请求数上限
+    """
+
+    def __init__(
+        self,
+        api_client: DSTApiClient,
+        store: RoomSnapshotStore,
+        *,
+        active_interval: float = 10.0,
+        idle_interval: float = 60.0,
+        room_list_interval: float = 30.0,
+        metrics_interval: float = 60.0,
+        concurrency: int = 4,
+        on_players: Optional[Callable[[int, List[Dict[str, Any]]], Any]] = None,
+    ) -> None:
+        self.api_client = api_client
+        self.store = store
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.room_list_interval = room_list_interval
+        self.metrics_interval = metrics_interval
+        self.on_players = on_players
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._room_list_due = 0.0
+        self._metrics_due = 0.0
+        self._players_due: Dict[int, float] = {}
+        # 每次失效递增；失效前发起的轮询结果不再写入快照
+        self._generation = 0
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info("房间状态轮询器已启动")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        logger.info("房间状态轮询器已停止")
+
+    def invalidate_room(self, room_id: Optional[int]) -> None:
+        """
+        使房间快照失效，并让房间列表与该房间玩家在下一轮立即刷新。
+
+        写操作发出前与完成后各触发一次，写进行期间发起的轮询结果会被丢弃。
+        """
+        self._generation += 1
+        self.store.invalidate_room(room_id)
+        self._room_list_due = 0.0
+        if room_id is None:
+            self._players_due.clear()
+        else:
+            self._players_due.pop(room_id, None)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                delay = await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("房间状态轮询失败：{}", exc)
+                delay = self.active_interval
+            await asyncio.sleep(delay)
+
+    async def poll_once(self, now: Optional[float] = None) -> float:
+        """执行一轮到期的轮询，返回距下一次到期的秒数。"""
+        now = now if now is not None else time.monotonic()
+
+        jobs = []
+        if now >= self._room_list_due:
+            jobs.append(self._refresh_room_list(now))
+        if self.metrics_interval > 0 and now >= self._metrics_due:
+            jobs.append(self._refresh_metrics(now))
+        if jobs:
+            await asyncio.gather(*jobs)
+
+        due_rooms = [
+            snapshot.room_id
+            for snapshot in self.store.rooms.values()
+            if snapshot.running and now >= self._players_due.get(snapshot.room_id, 0.0)
+        ]
+        if due_rooms:
+            await asyncio.gather(*(self._refresh_players(room_id, now) for room_id in due_rooms))
+
+        # 清理已消失房间的调度信息
+        for room_id in list(self._players_due):
+            if room_id not in self.store.rooms:
+                del self._players_due[room_id]
+
+        next_due = [self._room_list_due]
+        if self.metrics_interval > 0:
+            next_due.append(self._metrics_due)
+        next_due.extend(
+            self._players_due.get(snapshot.room_id, now)
+            for snapshot in self.store.rooms.values()
+            if snapshot.running
+        )
+        return max(0.5, min(next_due) - now)
+
+    async def _refresh_room_list(self, now: float) -> None:
+        self._room_list_due = now + self.room_list_interval
+        generation = self._generation
+        rows: List[Dict[str, Any]] = []
+        page = 1
+        while True:
+            async with self._semaphore:
+                result = await self.api_client.get_room_list(
+                    page=page, page_size=ROOM_LIST_PAGE_SIZE
+                )
+            if not result.get("success"):
+                logger.debug("轮询房间列表失败：{}", result.get("error"))
+                return
+            data = result.get("data") or {}
+            page_rows = data.get("rows") or []
+            rows.extend(page_rows)
+            total = int(data.get("totalCount") or 0)
+            if not page_rows or len(rows) >= total:
+                break
+            page += 1
+        if generation != self._generation:
+            return
+        self.store.update_rooms(rows, now)
+
+    async def _refresh_metrics(self, now: float) -> None:
+        self._metrics_due = now + self.metrics_interval
+        async with self._semaphore:
+            result = await self.api_client.get_platform_metrics()
+        if result.get("success"):
+            self.store.update_metrics(result.get("data") or {}, now)
+
+    async def _refresh_players(self, room_id: int, now: float) -> None:
+        generation = self._generation
+        async with self._semaphore:
+            result = await self.api_client.get_online_players(room_id)
+        if generation != self._generation:
+            return
+        if not result.get("success"):
+            self._players_due[room_id] = now + self.idle_interval
+            return
+        players = result.get("data") or []
+        self.store.update_players(room_id, players, now)
+        self._players_due[room_id] = now + (self.active_interval if players else self.idle_interval)
+        if players and self.on_players is not None:
+            try:
+                self.on_players(room_id, players)
+            except Exception as exc:
+                logger.warning("处理轮询玩家列表失败，room_id={} error={}", room_id, exc)
+
+
+# 全局单例（启用轮询时初始化）
+_store: Optional[RoomSnapshotStore] = None
+_poller: Optional[RoomPoller] = None
+
+
+def get_snapshot_store() -> Optional[RoomSnapshotStore]:
+    """获取房间快照存储（未启用轮询时返回 None）。"""
+    return _store
+
+
+def get_room_poller() -> Optional[RoomPoller]:
+    return _poller
+
+
+def init_room_poller(api_client: DSTApiClient, **kwargs: Any) -> RoomPoller:
+    """初始化房间轮询器与快照存储（需调用 start() 开始轮询）。"""
+    global _store, _poller
+    if _poller is None:
+        _store = RoomSnapshotStore()
+        _poller = RoomPoller(api_client, _store, **kwargs)
+        # 经客户端发出的写操作（/dst start|stop|restart 等）立即使快照失效
+        api_client.add_mutation_listener(_poller.invalidate_room)
+    return _poller
+
+
+async def shutdown_room_poller() -> None:
+    """停止轮询并清空快照。"""
+    global _store, _poller
+    if _poller is not None:
+        _poller.api_client.remove_mutation_listener(_poller.invalidate_room)
+        await _poller.stop()
+    _store = None
+    _poller = None
+
+
+__all__ = [
+    "RoomPoller",
+    "RoomSnapshot",
+    "RoomSnapshotStore",
+    "format_snapshot_age",
+    "get_room_poller",
+    "get_snapshot_store",
+    "init_room_poller",
+    "shutdown_room_poller",
+]
@@ -1,42 +1,118 @@
 """
-签到异步发放触发式检查器。
+签到异步发放检查器。
 
-在玩家执行命令时触发检查，不使用后台轮询。
+默认在玩家执行命令时触发检查；可选开启后台巡检（PendingRewardSweeper），
+只检查存在待发放记录的房间，无人新上线的房间按指数退避降低检查频率。
 """
 
 from __future__ import annotations
 
-from typing import Optional
+import asyncio
+import time
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
 from loguru import logger
 
 from ...client.api_client import DSTApiClient
-from ...database import PendingSignRecord, list_pending_sign_records, update_sign_record_status
-from ..sign_service import SignService
+from ...config import get_dst_config
+from ...database import (
+    PendingSignRecord,
+    claim_sign_records,
+    list_pending_reward_rooms,
+    list_room_pending_sign_records,
+    list_user_pending_sign_records,
+    mark_sign_records_delivered,
+    release_stale_sign_claims,
+)
+from ..sign_service import DEFAULT_MAX_COMMAND_LENGTH, SignService, is_delivery_uncertain
+from .room_poller import get_snapshot_store
+
+# 认领超时（秒）：超过该时间仍处于发放中的记录退回待发放
+DEFAULT_CLAIM_TIMEOUT = 600.0
+# 关闭时等待进行中发放完成的最长时间（秒）
+DEFAULT_DRAIN_TIMEOUT = 30.0
+
+
+def _snapshot_players(room_id: int) -> Optional[List[Dict[str, Any]]]:
+    """读取后台轮询的在线玩家快照（未启用或已过期时返回 None）。"""
+    store = get_snapshot_store()
+    if store is None:
+        return None
+    return store.get_players(room_id, get_dst_config().dst_room_snapshot_max_age)
 
 
 class SignMonitor:
-    """签到奖励异步发放监视器（触发式）。"""
-
-    def __init__(self, api_client: DSTApiClient) -> None:
+    """
+    签到奖励异步发放监视器（触发式）。
+
+    同一房间的待发放记录合并为尽量少的控制台命令（长度不超过 max_command_length），
+    发放成功的记录在同一个事务中标记为已发放。
+
+    发放前先原子认领记录（status 0 -> 2），并发的检查不会重复发放同一条记录；
+    超过 claim_timeout 秒仍未完成的认领在下次检查时退回待发放。
+
+    认领、发放与标记在独立任务中执行，调用方被取消时不会中断；
+    只有确定未执行的命令才退回待发放，结果未知（超时、连接中断）的按已发放处理，避免重复发放。
+    关闭前调用 drain() 等待进行中的发放完成。
+    """
+
+    def __init__(
+        self,
+        api_client: DSTApiClient,
+        max_command_length: int = DEFAULT_MAX_COMMAND_LENGTH,
+        claim_timeout: float = DEFAULT_CLAIM_TIMEOUT,
+    ) -> None:
         self.api_client = api_client
-
-    async def check_room_pending_rewards(self, room_id: int) -> None:
-        """
-        检查指定房间的待发放奖励。
-
-        通常在获取该房间在线玩家列表后调用，复用 API 调用结果。
+        self.max_command_length = max_command_length
+        self.claim_timeout = claim_timeout
+        self._reconciled_at: Optional[float] = None
+        # 后台检查任务（持有引用避免被回收），按房间去重
+        self._room_tasks: Dict[int, "asyncio.Task[None]"] = {}
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        # 进行中的认领 -> 发放 -> 标记任务
+        self._deliveries: Set["asyncio.Task[List[PendingSignRecord]]"] = set()
+
+    def schedule_room_check(
+        self,
+        room_id: int,
+        players: Optional[List[Dict[str, Any]]] = None,
+    ) -> Optional["asyncio.Task[None]"]:
         """
-        pending_records = await list_pending_sign_records()
-        if not pending_records:
-            return
+        在后台检查指定房间的待发放奖励，不阻塞命令回复。
 
-        # 筛选出该房间的待发放记录
-        room_records = [r for r in pending_records if r.room_id == room_id]
-        if not room_records:
-            return
+        同一房间已有检查在进行时直接返回该任务。
 
-        # 获取在线玩家（如果调用方已经获取过，可以考虑传入缓存）
+        Args:
+            room_id: 房间ID
+            players: 调用方已获取的在线玩家列表（可选，传入则不再请求）
+        """
+        running = self._room_tasks.get(room_id)
+        if running is not None and not running.done():
+            return running
+
+        task = asyncio.create_task(self._run_room_check(room_id, players))
+        self._room_tasks[room_id] = task
+        self._tasks.add(task)
+        task.add_done_callback(partial(self._forget_task, room_id))
+        return task
+
+    async def _run_room_check(self, room_id: int, players: Optional[List[Dict[str, Any]]]) -> None:
+        try:
+            await self.check_room_pending_rewards(room_id, players=players)
+        except Exception as exc:
+            logger.warning("后台检查签到奖励失败，room_id={} error={}", room_id, exc)
+
+    def _forget_task(self, room_id: int, task: "asyncio.Task[None]") -> None:
+        self._tasks.discard(task)
+        if self._room_tasks.get(room_id) is task:
+            del self._room_tasks[room_id]
+
+    async def fetch_online_players(self, room_id: int) -> Optional[List[Dict[str, Any]]]:
+        """获取在线玩家（优先读取新鲜快照），请求失败时返回 None。"""
+        players = _snapshot_players(room_id)
+        if players is not None:
+            return players
         online_result = await self.api_client.get_online_players(room_id)
         if not online_result.get("success"):
             logger.warning(
@@ -44,39 +120,147 @@ class SignMonitor:
                 room_id,
                 online_result.get("error"),
             )
+            return None
+        return online_result.get("data") or []
+
+    async def check_room_pending_rewards(
+        self,
+        room_id: int,
+        players: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """
+        检查指定房间的待发放奖励。
+
+        通常在获取该房间在线玩家列表后调用，传入 players 可复用 API 调用结果。
+        """
+        await self.reconcile_claims()
+        room_records = await list_room_pending_sign_records(room_id)
+        if not room_records:
+            return
+
+        # 获取在线玩家（调用方已获取过或有新鲜快照时直接复用）
+        if players is None:
+            players = await self.fetch_online_players(room_id)
+        if players is None:
             return
 
-        players = online_result.get("data") or []
         online_ids = {player.get("uid") for player in players if player.get("uid")}
         if not online_ids:
             return
 
         # 匹配并发放奖励
-        for record in room_records:
-            if record.ku_id not in online_ids:
-                continue
+        deliverable = [record for record in room_records if record.ku_id in online_ids]
+        if deliverable:
+            await self._deliver(room_id, deliverable)
+
+    async def _deliver(
+        self,
+        room_id: int,
+        records: Sequence[PendingSignRecord],
+    ) -> List[PendingSignRecord]:
+        """
+        合并发放奖励并标记已发放。
 
-            rewards = record.reward_items or []
-            command = SignService.generate_give_command(record.ku_id, rewards)
-            result = await self.api_client.execute_console_command(room_id, None, command)
+        发放在独立任务中执行并受 shield 保护，已认领的记录总会被标记或退回。
 
+        Returns:
+            发放成功的记录
+        """
+        task = asyncio.create_task(self._claim_and_deliver(room_id, records))
+        self._deliveries.add(task)
+        task.add_done_callback(self._deliveries.discard)
+        return await asyncio.shield(task)
+
+    async def _claim_and_deliver(
+        self,
+        room_id: int,
+        records: Sequence[PendingSignRecord],
+    ) -> List[PendingSignRecord]:
+        claimed = await claim_sign_records([record.id for record in records])
+        records = [record for record in records if record.id in claimed]
+        if not records:
+            return []
+
+        batches = SignService.generate_batch_give_commands(
+            [(record.ku_id, record.reward_items or []) for record in records],
+            self.max_command_length,
+        )
+        delivered: List[PendingSignRecord] = []
+        failed: List[PendingSignRecord] = []
+        uncertain: List[PendingSignRecord] = []
+        for command, indexes in batches:
+            try:
+                result = await self.api_client.execute_console_command(room_id, None, command)
+            except Exception as exc:
+                result = {"success": False, "error": str(exc), "uncertain": True}
             if result and result.get("success"):
-                await update_sign_record_status(record.id, 1)
-                logger.info(
-                    "成功发放签到奖励，record_id={} qq_id={} ku_id={} room_id={}",
-                    record.id,
-                    record.qq_id,
-                    record.ku_id,
+                delivered.extend(records[index] for index in indexes)
+            elif is_delivery_uncertain(result):
+                # 命令可能已执行，退回待发放会导致重复发放
+                uncertain.extend(records[index] for index in indexes)
+                logger.warning(
+                    "签到奖励发放结果未知，按已发放处理，room_id={} record_ids={} error={}",
                     room_id,
+                    [records[index].id for index in indexes],
+                    result.get("error") if isinstance(result, dict) else "未知错误",
                 )
             else:
+                failed.extend(records[index] for index in indexes)
                 logger.warning(
-                    "发放签到奖励失败，record_id={} room_id={} error={}",
-                    record.id,
+                    "发放签到奖励失败，room_id={} record_ids={} error={}",
                     room_id,
+                    [records[index].id for index in indexes],
                     result.get("error") if isinstance(result, dict) else "未知错误",
                 )
 
+        await mark_sign_records_delivered(
+            [record.id for record in (*delivered, *uncertain)],
+            release_ids=[record.id for record in failed],
+        )
+        if delivered:
+            logger.info(
+                "成功发放签到奖励，room_id={} records={} commands={}",
+                room_id,
+                len(delivered),
+                len(batches),
+            )
+        return delivered
+
+    async def drain(self, timeout: float = DEFAULT_DRAIN_TIMEOUT) -> bool:
+        """
+        等待后台检查与进行中的发放完成（关闭前调用）。
+
+        Returns:
+            是否在 timeout 秒内全部完成
+        """
+        pending = {*self._tasks, *self._deliveries}
+        if not pending:
+            return True
+        _, not_done = await asyncio.wait(pending, timeout=timeout)
+        if not_done:
+            logger.warning("仍有 {} 个签到奖励发放任务未完成", len(not_done))
+        return not not_done
+
+    async def reconcile_claims(self, force: bool = False) -> int:
+        """
+        将超时未完成的认领退回待发放（每个 claim_timeout 周期最多执行一次）。
+
+        Returns:
+            退回的记录数
+        """
+        now = time.monotonic()
+        if (
+            not force
+            and self._reconciled_at is not None
+            and now - self._reconciled_at < self.claim_timeout
+        ):
+            return 0
+        self._reconciled_at = now
+        released = await release_stale_sign_claims(self.claim_timeout)
+        if released:
+            logger.warning("{} 条签到奖励认领超时，已退回待发放", released)
+        return released
+
     async def check_user_pending_rewards(self, qq_id: str, ku_id: str, room_id: int) -> bool:
         """
         检查指定用户的待发放奖励。
@@ -89,51 +273,126 @@ class SignMonitor:
         Returns:
             是否成功发放了奖励
         """
-        pending_records = await list_pending_sign_records()
+        await self.reconcile_claims()
         user_records = [
-            r
-            for r in pending_records
-            if r.qq_id == qq_id and r.ku_id == ku_id and r.room_id == room_id
+            r for r in await list_user_pending_sign_records(qq_id, room_id) if r.ku_id == ku_id
         ]
         if not user_records:
             return False
 
         # 检查玩家是否在线
-        online_result = await self.api_client.get_online_players(room_id)
-        if not online_result.get("success"):
+        players = await self.fetch_online_players(room_id)
+        if players is None:
             return False
 
-        players = online_result.get("data") or []
         online_ids = {player.get("uid") for player in players if player.get("uid")}
         if ku_id not in online_ids:
             return False
 
         # 发放所有待发放奖励
-        success_count = 0
-        for record in user_records:
-            rewards = record.reward_items or []
-            command = SignService.generate_give_command(ku_id, rewards)
-            result = await self.api_client.execute_console_command(room_id, None, command)
-
-            if result and result.get("success"):
-                await update_sign_record_status(record.id, 1)
-                success_count += 1
-                logger.info(
-                    "成功补发签到奖励，record_id={} qq_id={} ku_id={} room_id={}",
-                    record.id,
-                    qq_id,
-                    ku_id,
-                    room_id,
-                )
-            else:
-                logger.warning(
-                    "补发签到奖励失败，record_id={} room_id={} error={}",
-                    record.id,
-                    room_id,
-                    result.get("error") if isinstance(result, dict) else "未知错误",
-                )
+        delivered = await self._deliver(room_id, user_records)
+        return bool(delivered)
+
+
+class PendingRewardSweeper:
+    """
+    待发放奖励后台巡检
+
+    每轮只读取存在待发放记录的房间，到期的房间各获取一次在线玩家（并发数受限）后批量发放。
+    有玩家新上线的房间下次按 interval 检查，否则检查间隔翻倍，直至 max_interval。
+
+    Attributes:
+        interval: 巡检间隔与房间最短检查间隔（秒）
+        max_interval: 房间退避后的最长检查间隔（秒）
+        concurrency: 同时检查的房间数上限
+    """
+
+    def __init__(
+        self,
+        monitor: SignMonitor,
+        *,
+        interval: float = 30.0,
+        max_interval: float = 600.0,
+        concurrency: int = 4,
+    ) -> None:
+        self.monitor = monitor
+        self.interval = interval
+        self.max_interval = max(interval, max_interval)
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        # 房间 -> (下次检查时间, 当前间隔, 上次看到的在线玩家)
+        self._rooms: Dict[int, Tuple[float, float, Set[str]]] = {}
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info("签到奖励后台巡检已启动")
 
-        return success_count > 0
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sweep_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("签到奖励巡检失败：{}", exc)
+            await asyncio.sleep(self.interval)
+
+    def next_check(self, room_id: int) -> Optional[float]:
+        """房间下次检查时间（monotonic），未在调度中时返回 None。"""
+        state = self._rooms.get(room_id)
+        return state[0] if state is not None else None
+
+    async def sweep_once(self, now: Optional[float] = None) -> List[int]:
+        """执行一轮巡检，返回本轮检查的房间。"""
+        now = now if now is not None else time.monotonic()
+        await self.monitor.reconcile_claims()
+        rooms = await list_pending_reward_rooms()
+        # 已无待发放记录的房间不再调度
+        for room_id in [room_id for room_id in self._rooms if room_id not in rooms]:
+            del self._rooms[room_id]
+
+        due = [
+            room_id
+            for room_id in rooms
+            if now >= self._rooms.get(room_id, (0.0, 0.0, set()))[0]
+        ]
+        if due:
+            await asyncio.gather(*(self._sweep_room(room_id, now) for room_id in due))
+        return due
+
+    async def _sweep_room(self, room_id: int, now: float) -> None:
+        _, delay, seen = self._rooms.get(room_id, (0.0, 0.0, set()))
+        async with self._semaphore:
+            players = await self.monitor.fetch_online_players(room_id)
+            if players:
+                # 与命令触发的检查共用同一房间任务
+                task = self.monitor.schedule_room_check(room_id, players)
+                if task is not None:
+                    # 巡检被取消时不中断房间检查，由 SignMonitor.drain() 等待其完成
+                    await asyncio.shield(task)
+
+        online = seen if players is None else {str(p["uid"]) for p in players if p.get("uid")}
+        if delay <= 0 or online - seen:
+            delay = self.interval
+        else:
+            delay = min(delay * 2, self.max_interval)
+        self._rooms[room_id] = (now + delay, delay, online)
 
 
 # 全局单例（用于命令触发）
@@ -145,13 +404,55 @@ def get_sign_monitor() -> Optional[SignMonitor]:
     return _monitor
 
 
-def init_sign_monitor(api_client: DSTApiClient) -> SignMonitor:
+def init_sign_monitor(
+    api_client: DSTApiClient,
+    max_command_length: int = DEFAULT_MAX_COMMAND_LENGTH,
+    claim_timeout: float = DEFAULT_CLAIM_TIMEOUT,
+) -> SignMonitor:
     """初始化签到监视器（不需要启动后台任务）。"""
     global _monitor
     if _monitor is None:
-        _monitor = SignMonitor(api_client)
+        _monitor = SignMonitor(api_client, max_command_length, claim_timeout)
         logger.info("签到触发式发放监视器已初始化")
     return _monitor
 
 
-__all__ = ["SignMonitor", "get_sign_monitor", "init_sign_monitor"]
+async def drain_sign_monitor(timeout: float = DEFAULT_DRAIN_TIMEOUT) -> bool:
+    """等待签到监视器进行中的发放完成（未初始化时直接返回 True）。"""
+    if _monitor is None:
+        return True
+    return await _monitor.drain(timeout)
+
+
+_sweeper: Optional[PendingRewardSweeper] = None
+
+
+def get_reward_sweeper() -> Optional[PendingRewardSweeper]:
+    return _sweeper
+
+
+def init_reward_sweeper(monitor: SignMonitor, **kwargs: Any) -> PendingRewardSweeper:
+    """初始化后台巡检（需调用 start() 开始巡检）。"""
+    global _sweeper
+    if _sweeper is None:
+        _sweeper = PendingRewardSweeper(monitor, **kwargs)
+    return _sweeper
+
+
+async def shutdown_reward_sweeper() -> None:
+    global _sweeper
+    if _sweeper is not None:
+        await _sweeper.stop()
+    _sweeper = None
+
+
+__all__ = [
+    "PendingRewardSweeper",
+    "SignMonitor",
+    "drain_sign_monitor",
+    "get_reward_sweeper",
+    "get_sign_monitor",
+    "init_reward_sweeper",
+    "init_sign_monitor",
+    "shutdown_reward_sweeper",
+]
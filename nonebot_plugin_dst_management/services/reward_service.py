@@ -6,10 +6,11 @@
 
 from __future__ import annotations
 
+from bisect import bisect_right
 from dataclasses import dataclass
-from typing import Any, Iterable, Optional
+from typing import Any, Dict, Iterable, Optional, Tuple
 
-from ..database import list_sign_rewards
+from ..database import get_sign_rewards_version, list_sign_rewards
 
 
 @dataclass(frozen=True)
@@ -118,11 +119,94 @@ def merge_reward_items(items: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
     return [{"prefab": prefab, "amount": merged[prefab]} for prefab in sorted(merged)]
 
 
+class CompiledRewardTable:
+    """
+    预编译的奖励表
+
+    等级与连续签到额外奖励按天数阈值排序，用 bisect 定位；
+    合并后的物品列表按 (等级, 额外奖励档位, 首签, 满月) 记忆，重复计算只做查表。
+    """
+
+    def __init__(self, tiers: list[RewardTier]) -> None:
+        self.tiers: list[RewardTier] = sorted(tiers, key=lambda item: item.continuous_days)
+        self.thresholds: list[int] = [tier.continuous_days for tier in self.tiers]
+        self.bonus_thresholds: list[int] = sorted(CONTINUOUS_BONUS)
+        self._merged: Dict[
+            Tuple[int, int, bool, bool], Tuple[list[dict[str, Any]], list[str]]
+        ] = {}
+
+    def calculate(
+        self,
+        continuous_days: int,
+        is_first_sign: bool = False,
+        is_full_moon: bool = False,
+    ) -> RewardResult:
+        continuous_days = max(0, int(continuous_days))
+        if self.tiers:
+            # 未达到最低阈值时仍按最低等级发放
+            tier_index = max(0, bisect_right(self.thresholds, continuous_days) - 1)
+            selected = self.tiers[tier_index]
+        else:
+            tier_index = -1
+            selected = DEFAULT_LEVEL_REWARDS[0]
+        bonus_count = bisect_right(self.bonus_thresholds, continuous_days)
+
+        key = (tier_index, bonus_count, is_first_sign, is_full_moon)
+        merged = self._merged.get(key)
+        if merged is None:
+            merged = self._merge(selected, bonus_count, is_first_sign, is_full_moon)
+            self._merged[key] = merged
+        items, descriptions = merged
+
+        return RewardResult(
+            level=selected.level,
+            continuous_days=continuous_days,
+            items=[dict(item) for item in items],
+            bonus_points=selected.bonus_points,
+            descriptions=list(descriptions),
+            is_first_sign=is_first_sign,
+            is_full_moon=is_full_moon,
+        )
+
+    def _merge(
+        self,
+        selected: RewardTier,
+        bonus_count: int,
+        is_first_sign: bool,
+        is_full_moon: bool,
+    ) -> Tuple[list[dict[str, Any]], list[str]]:
+        items: list[dict[str, Any]] = list(selected.reward_items)
+        descriptions: list[str] = []
+        if selected.description:
+            descriptions.append(selected.description)
+
+        for threshold in self.bonus_thresholds[:bonus_count]:
+            items.extend(CONTINUOUS_BONUS[threshold])
+            descriptions.append(f"连续{threshold}天额外奖励")
+
+        if is_first_sign:
+            items.extend(SPECIAL_REWARDS["first_sign"])
+            descriptions.append("首次签到奖励")
+
+        if is_full_moon:
+            items.extend(SPECIAL_REWARDS["full_moon"])
+            descriptions.append("满月签到奖励")
+
+        return merge_reward_items(items), descriptions
+
+
+# 数据库奖励配置的预编译结果：(奖励配置版本号, 奖励表)
+_db_table: Optional[Tuple[int, CompiledRewardTable]] = None
+
+
 class RewardService:
     """奖励计算服务。"""
 
     def __init__(self, tiers: Optional[list[RewardTier]] = None) -> None:
         self._tiers_override = tiers
+        self._override_table = CompiledRewardTable(tiers) if tiers is not None else None
+        # 最近一次按传入奖励档位编译的表：(档位, 奖励表)，档位按对象身份比较
+        self._tiers_table: Optional[Tuple[Tuple[RewardTier, ...], CompiledRewardTable]] = None
 
     async def load_reward_tiers(self) -> list[RewardTier]:
         if self._tiers_override is not None:
@@ -143,15 +227,27 @@ class RewardService:
             )
         return tiers
 
+    async def get_reward_table(self) -> CompiledRewardTable:
+        """获取预编译奖励表（奖励配置变更后才重新加载）。"""
+        global _db_table
+        if self._override_table is not None:
+            return self._override_table
+        version = get_sign_rewards_version()
+        if _db_table is not None and _db_table[0] == version:
+            return _db_table[1]
+        # 先记录版本号，加载期间若有变更，下次调用会再次加载
+        table = CompiledRewardTable(await self.load_reward_tiers())
+        _db_table = (version, table)
+        return table
+
     async def calculate_reward(
         self,
         continuous_days: int,
         is_first_sign: bool = False,
         is_full_moon: bool = False,
     ) -> RewardResult:
-        tiers = await self.load_reward_tiers()
-        return self._calculate_from_tiers(
-            tiers,
+        table = await self.get_reward_table()
+        return table.calculate(
             continuous_days=continuous_days,
             is_first_sign=is_first_sign,
             is_full_moon=is_full_moon,
@@ -164,43 +260,25 @@ class RewardService:
         is_first_sign: bool,
         is_full_moon: bool,
     ) -> RewardResult:
-        continuous_days = max(0, int(continuous_days))
-        tiers_sorted = sorted(tiers, key=lambda item: item.continuous_days)
-        selected = tiers_sorted[0] if tiers_sorted else DEFAULT_LEVEL_REWARDS[0]
-        for tier in tiers_sorted:
-            if continuous_days >= tier.continuous_days:
-                selected = tier
-        items: list[dict[str, Any]] = list(selected.reward_items)
-        descriptions: list[str] = []
-        if selected.description:
-            descriptions.append(selected.description)
-
-        bonus_points = selected.bonus_points
-
-        for threshold in sorted(CONTINUOUS_BONUS):
-            if continuous_days >= threshold:
-                items.extend(CONTINUOUS_BONUS[threshold])
-                descriptions.append(f"连续{threshold}天额外奖励")
-
-        if is_first_sign:
-            items.extend(SPECIAL_REWARDS["first_sign"])
-            descriptions.append("首次签到奖励")
-
-        if is_full_moon:
-            items.extend(SPECIAL_REWARDS["full_moon"])
-            descriptions.append("满月签到奖励")
-
-        merged_items = merge_reward_items(items)
-        return RewardResult(
-            level=selected.level,
+        return self._compile_tiers(tiers).calculate(
             continuous_days=continuous_days,
-            items=merged_items,
-            bonus_points=bonus_points,
-            descriptions=descriptions,
             is_first_sign=is_first_sign,
             is_full_moon=is_full_moon,
         )
 
+    def _compile_tiers(self, tiers: list[RewardTier]) -> CompiledRewardTable:
+        """获取传入奖励档位的预编译表，档位未变化时复用。"""
+        if tiers is self._tiers_override and self._override_table is not None:
+            return self._override_table
+        cached = self._tiers_table
+        if (
+            cached is None
+            or len(cached[0]) != len(tiers)
+            or any(old is not new for old, new in zip(cached[0], tiers))
+        ):
+            cached = self._tiers_table = (tuple(tiers), CompiledRewardTable(tiers))
+        return cached[1]
+
 
 def format_reward_items(items: Iterable[dict[str, Any]]) -> str:
     """格式化奖励物品列表。"""
@@ -215,6 +293,7 @@ def format_reward_items(items: Iterable[dict[str, Any]]) -> str:
 
 
 __all__ = [
+    "CompiledRewardTable",
     "RewardTier",
     "RewardResult",
     "RewardService",
@@ -8,24 +8,39 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date, timedelta
-from typing import Any, Optional
+from typing import Any, Dict, Optional, Sequence, Tuple
 
 from loguru import logger
 
 from ..client.api_client import DSTApiClient
 from ..database import (
+    SIGN_STATUS_DELIVERING,
+    SIGN_STATUS_PENDING,
     SignUser,
-    create_sign_record,
     create_user_binding,
     delete_user_binding,
+    finish_sign_in_delivery,
     get_sign_record,
     get_user_binding,
-    update_user_sign_stats,
+    record_sign_in,
 )
 from ..helpers.commands import escape_console_string
 from ..services.reward_service import RewardResult, RewardService, format_reward_items
 
 
+# 单条控制台命令的最大长度（字符），批量发放时按此拆分
+DEFAULT_MAX_COMMAND_LENGTH = 4000
+
+
+def is_delivery_uncertain(result: Any) -> bool:
+    """
+    控制台命令是否可能已执行但结果未知（超时、连接中断、调用异常等）
+
+    这类发放不能退回待发放，否则补发会导致重复发放。
+    """
+    return not isinstance(result, dict) or bool(result.get("uncertain"))
+
+
 @dataclass(frozen=True)
 class SignResult:
     success: bool
@@ -99,7 +114,8 @@ class SignService:
             is_full_moon=is_full_moon,
         )
 
-        reward_status = 1
+        # 玩家在线时记录以认领状态写入，避免发放期间被补发流程重复发放
+        reward_status = SIGN_STATUS_DELIVERING
         pending_reason: Optional[str] = None
         try:
             online_result = await self.api_client.get_room_players(room_id)
@@ -108,23 +124,55 @@ class SignService:
             logger.warning("获取房间玩家列表失败，room_id={} error={}", room_id, exc)
 
         if not online_result.get("success"):
-            reward_status = 0
+            reward_status = SIGN_STATUS_PENDING
             pending_reason = online_result.get("error") or "获取在线玩家失败"
         else:
             players = online_result.get("data") or []
             online_ids = {player.get("uid") for player in players if player.get("uid")}
             if user.ku_id not in online_ids:
-                reward_status = 0
+                reward_status = SIGN_STATUS_PENDING
                 pending_reason = "玩家当前不在线"
                 logger.info("玩家不在线，签到奖励改为待发放，qq_id={} ku_id={}", qq_id, user.ku_id)
-        if reward_status == 1:
+
+        # 先在单个事务内落库（同时防止并发重复签到），成功后再发放奖励
+        outcome = await record_sign_in(
+            qq_id,
+            room_id,
+            today,
+            continuous_days=continuous_days,
+            level=reward.level,
+            bonus_points=reward.bonus_points,
+            reward_items=reward.items,
+            status=reward_status,
+        )
+        updated_user = outcome.user
+        if updated_user is None:
+            if outcome.already_signed:
+                return SignResult(False, "今天已经签到过了哦")
+            # 绑定在签到期间被解除
+            return SignResult(False, "请先使用 /dst sign bind <KU_ID> 绑定账号")
+
+        if reward_status == SIGN_STATUS_DELIVERING:
             command = self.generate_give_command(user.ku_id, reward.items)
             try:
                 result = await self.api_client.execute_console_command(room_id, None, command)
             except Exception as exc:
-                result = {"success": False, "error": str(exc)}
-            if not result or not result.get("success"):
-                reward_status = 0
+                result = {"success": False, "error": str(exc), "uncertain": True}
+            delivered = bool(result and result.get("success"))
+            uncertain = not delivered and is_delivery_uncertain(result)
+            # 确定未执行的奖励退回待发放，由签到监视器补发；结果未知的按已发放处理，避免重复发放
+            await finish_sign_in_delivery(qq_id, room_id, today, delivered or uncertain)
+            if uncertain:
+                pending_reason = "发放结果未知，如未收到奖励请联系管理员"
+                logger.warning(
+                    "签到奖励发放结果未知，按已发放处理，qq_id={} ku_id={} room_id={} error={}",
+                    qq_id,
+                    user.ku_id,
+                    room_id,
+                    result.get("error") if isinstance(result, dict) else "未知错误",
+                )
+            elif not delivered:
+                reward_status = SIGN_STATUS_PENDING
                 pending_reason = result.get("error") if isinstance(result, dict) else "未知错误"
                 logger.warning(
                     "签到奖励发放失败，qq_id={} ku_id={} room_id={} error={}",
@@ -136,33 +184,16 @@ class SignService:
             else:
                 logger.info("签到奖励发放成功，qq_id={} ku_id={} room_id={}", qq_id, user.ku_id, room_id)
 
-        sign_count = user.sign_count + 1
-        total_points = user.total_points + reward.bonus_points
-        await update_user_sign_stats(
-            qq_id=qq_id,
-            room_id=room_id,
-            last_sign_time=today,
-            sign_count=sign_count,
-            continuous_days=continuous_days,
-            level=reward.level,
-            total_points=total_points,
-        )
-        await create_sign_record(
-            qq_id=qq_id,
-            room_id=room_id,
-            sign_date=today,
-            reward_level=reward.level,
-            reward_items=reward.items,
-            status=reward_status,
-        )
-
+        sign_count = updated_user.sign_count
         message = self.format_sign_message(reward, sign_count, continuous_days)
-        if reward_status == 0:
+        if reward_status == SIGN_STATUS_PENDING:
             note = "奖励将在你上线后自动发放"
             if pending_reason:
                 note = f"奖励未即时发放（{pending_reason}），上线后将自动发放"
             message = f"{message}\n{note}"
-        return SignResult(True, message, reward=reward, user=user)
+        elif pending_reason:
+            message = f"{message}\n{pending_reason}"
+        return SignResult(True, message, reward=reward, user=updated_user)
 
     @staticmethod
     def _is_valid_ku_id(ku_id: str) -> bool:
@@ -181,13 +212,8 @@ class SignService:
         return 1
 
     @staticmethod
-    def generate_give_command(ku_id: str, rewards: list[dict[str, Any]]) -> str:
-        """生成给予物品的控制台命令。"""
-        safe_ku_id = escape_console_string(ku_id)
-        lines = [
-            "for i, v in ipairs(AllPlayers) do",
-            f"    if v.userid == \"{safe_ku_id}\" then",
-        ]
+    def _give_lines(rewards: Sequence[dict[str, Any]]) -> list[str]:
+        lines = []
         for reward in rewards:
             prefab = reward.get("prefab")
             amount = reward.get("amount")
@@ -200,11 +226,76 @@ class SignService:
                 continue
             if amount_value <= 0:
                 continue
-            lines.append(f"        c_give(\"{safe_prefab}\", {amount_value})")
+            lines.append(f"c_give(\"{safe_prefab}\", {amount_value})")
+        return lines
+
+    @staticmethod
+    def generate_give_command(ku_id: str, rewards: list[dict[str, Any]]) -> str:
+        """生成给予物品的控制台命令。"""
+        safe_ku_id = escape_console_string(ku_id)
+        lines = [
+            "for i, v in ipairs(AllPlayers) do",
+            f"    if v.userid == \"{safe_ku_id}\" then",
+        ]
+        lines.extend(f"        {line}" for line in SignService._give_lines(rewards))
         lines.append("    end")
         lines.append("end")
         return "\n".join(lines)
 
+    @staticmethod
+    def generate_batch_give_commands(
+        grants: Sequence[Tuple[str, Sequence[dict[str, Any]]]],
+        max_length: int = DEFAULT_MAX_COMMAND_LENGTH,
+    ) -> list[Tuple[str, list[int]]]:
+        """
+        将多条发放合并为尽量少的控制台命令。
+
+        每条命令遍历一次 AllPlayers，以 if/elseif 按 KU_ID 分支发放；同一玩家的多条发放合并到同一分支。
+        命令长度不超过 max_length（单条发放本身超长时独占一条命令）。
+
+        Args:
+            grants: (KU_ID, 奖励物品) 列表
+
+        Returns:
+            (命令, 包含的 grants 下标) 列表
+        """
+        header = "for i, v in ipairs(AllPlayers) do"
+        footer = "    end\nend"
+        batches: list[Tuple[str, list[int]]] = []
+        # 当前命令：KU_ID -> 物品行，保持插入顺序
+        branches: Dict[str, list[str]] = {}
+        indexes: list[int] = []
+        length = len(header) + len(footer) + 1
+
+        def flush() -> None:
+            nonlocal branches, indexes, length
+            if not indexes:
+                return
+            lines = [header]
+            for position, (ku_id, give_lines) in enumerate(branches.items()):
+                keyword = "if" if position == 0 else "elseif"
+                lines.append(f"    {keyword} v.userid == \"{escape_console_string(ku_id)}\" then")
+                lines.extend(f"        {line}" for line in give_lines)
+            lines.append(footer)
+            batches.append(("\n".join(lines), indexes))
+            branches, indexes = {}, []
+            length = len(header) + len(footer) + 1
+
+        for index, (ku_id, rewards) in enumerate(grants):
+            give_lines = SignService._give_lines(rewards)
+            # 每行缩进 8 个字符加换行；新分支另计 elseif 行
+            cost = sum(len(line) + 9 for line in give_lines)
+            branch_cost = len(escape_console_string(ku_id)) + 32
+            if indexes and length + cost + (0 if ku_id in branches else branch_cost) > max_length:
+                flush()
+            if ku_id not in branches:
+                cost += branch_cost
+            branches.setdefault(ku_id, []).extend(give_lines)
+            indexes.append(index)
+            length += cost
+        flush()
+        return batches
+
     @staticmethod
     def format_sign_message(reward: RewardResult, sign_count: int, continuous_days: int) -> str:
         items_text = format_reward_items(reward.items)
@@ -216,4 +307,4 @@ class SignService:
         )
 
 
-__all__ = ["SignService", "SignResult"]
+__all__ = ["SignService", "SignResult", "is_delivery_uncertain"]
@@ -4,8 +4,8 @@ DMP API Mock 服务器 - 用于本地测试
 模拟 DMP API 的响应，不需要真实的服务器。
 """
 
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
 from typing import Dict, Any, List
 import uvicorn
 
@@ -216,6 +216,32 @@ async def restore_backup(request: dict):
     })
 
 
+# 存档下载内容（约 256KB 的伪 ZIP 数据）
+MOCK_ARCHIVE_BYTES = b"PK\x03\x04" + b"\0" * (256 * 1024)
+
+
+@app.get("/v3/tools/archive/download")
+async def download_archive(roomID: int):
+    """下载存档"""
+    return Response(
+        content=MOCK_ARCHIVE_BYTES,
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="cluster_{roomID}.zip"'},
+    )
+
+
+@app.post("/v3/tools/archive/upload")
+@app.post("/v3/tools/archive/replace")
+async def upload_archive(request: Request):
+    """上传/替换存档（仅统计请求体大小）"""
+    body = await request.body()
+    return JSONResponse({
+        "code": 200,
+        "message": "存档上传成功",
+        "data": {"size": len(body)}
+    })
+
+
 @app.post("/v3/dashboard/console")
 async def execute_console(request: dict):
     """执行控制台命令"""
@@ -1,6 +1,7 @@
 import pytest
 
 import nonebot_plugin_dst_management.ai.base as ai_base
+import nonebot_plugin_dst_management.client.resilience as resilience
 from nonebot_plugin_dst_management.ai.base import (
     AIAuthError,
     AIError,
@@ -56,8 +57,8 @@ async def test_run_with_retry_jitter(monkeypatch: pytest.MonkeyPatch) -> None:
     async def fake_sleep(delay: float) -> None:
         delays.append(delay)
 
-    monkeypatch.setattr(ai_base.random, "random", lambda: 0.0)
-    monkeypatch.setattr(ai_base.asyncio, "sleep", fake_sleep)
+    monkeypatch.setattr(resilience.random, "random", lambda: 0.0)
+    monkeypatch.setattr(resilience.asyncio, "sleep", fake_sleep)
 
     attempts = 0
 
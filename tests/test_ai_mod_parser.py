@@ -124,3 +124,32 @@ return {
     options = parsed.mods[0]["configuration_options"]
     assert options["flag"] is True
     assert options["list"] == ["x", 2, False]
+
+
+class LinkApiClient:
+    """DMP 返回下载链接的客户端：记录链接下载的大小上限"""
+
+    def __init__(self, content: bytes):
+        self.content = content
+        self.max_bytes: list = []
+
+    async def download_archive(self, room_id: int):
+        return {"success": True, "data": {"url": "http://cdn.example/a.zip"}}
+
+    async def download_url_to_file(self, url: str, path, *, max_bytes=None):
+        self.max_bytes.append(max_bytes)
+        with open(path, "wb") as file_handle:
+            file_handle.write(self.content)
+        return {"success": True, "data": {"path": str(path), "size": len(self.content)}}
+
+
+@pytest.mark.asyncio
+async def test_fetch_modoverrides_downloads_link_with_size_cap() -> None:
+    config = AIConfig(enabled=True, provider="mock")
+    ai_client = AIClient(config, provider=MockProvider(config, response="{}"))
+    api_client = LinkApiClient(_make_archive_bytes("return {}"))
+
+    parser = ModConfigParser(api_client, ai_client, max_bytes=1024 * 1024)
+
+    assert await parser.fetch_modoverrides(1, "Master") == "return {}"
+    assert api_client.max_bytes == [1024 * 1024]
@@ -0,0 +1,297 @@
+import httpx
+import pytest
+
+from nonebot_plugin_dst_management.client.api_client import DSTApiClient
+
+
+def _make_client(handler, **kwargs) -> DSTApiClient:
+    client = DSTApiClient("http://mock", "token", **kwargs)
+    client.client = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler),
+        base_url="http://mock/v3",
+        headers={"X-DMP-TOKEN": "token"},
+    )
+    return client
+
+
+@pytest.mark.asyncio
+async def test_upload_archive_uses_pooled_client_with_multipart(tmp_path):
+    archive = tmp_path / "cluster.zip"
+    archive.write_bytes(b"PK\x03\x04data")
+    seen: dict[str, str] = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen["path"] = request.url.path
+        seen["content_type"] = request.headers.get("content-type", "")
+        seen["token"] = request.headers.get("x-dmp-token", "")
+        body = request.read()
+        assert b'name="roomID"' in body
+        assert b"PK\x03\x04data" in body
+        return httpx.Response(200, json={"code": 200, "data": None})
+
+    client = _make_client(handler)
+    pooled = client.client
+
+    result = await client.upload_archive(1, str(archive))
+
+    assert result["success"] is True
+    assert seen["path"] == "/v3/tools/archive/upload"
+    assert seen["content_type"].startswith("multipart/form-data; boundary=")
+    assert seen["token"] == "token"
+    assert client.client is pooled and not pooled.is_closed
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_download_archive_uses_pooled_client():
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/v3/tools/archive/download"
+        assert request.url.params["roomID"] == "3"
+        return httpx.Response(200, content=b"PK", headers={"content-type": "application/zip"})
+
+    client = _make_client(handler)
+    result = await client.download_archive(3)
+
+    assert result["success"] is True
+    assert result["data"]["content"] == b"PK"
+    await client.close()
+
+
+def test_http2_falls_back_without_h2(monkeypatch):
+    from nonebot_plugin_dst_management.client import api_client
+
+    monkeypatch.setattr(api_client, "_h2_available", lambda: False)
+    client = DSTApiClient(
+        "http://mock",
+        "token",
+        limits=httpx.Limits(max_connections=5, max_keepalive_connections=2),
+        http2=True,
+    )
+    assert "content-type" not in client.client.headers
+
+
+@pytest.mark.asyncio
+async def test_download_archive_to_file_streams_with_progress(tmp_path):
+    payload = b"PK" + b"x" * 300_000
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            content=payload,
+            headers={
+                "content-type": "application/zip",
+                "content-disposition": 'attachment; filename="../cluster_3.zip"',
+            },
+        )
+
+    progress: list[tuple[int, int | None]] = []
+    client = _make_client(handler)
+    result = await client.download_archive_to_file(
+        3, tmp_path, progress=lambda done, total: progress.append((done, total)), chunk_size=65536
+    )
+
+    assert result["success"] is True
+    saved = tmp_path / "cluster_3.zip"
+    assert result["data"] == {"path": str(saved), "filename": "cluster_3.zip", "size": len(payload)}
+    assert saved.read_bytes() == payload
+    assert len(progress) > 1
+    assert progress[-1] == (len(payload), len(payload))
+    assert [p.name for p in tmp_path.iterdir()] == ["cluster_3.zip"]
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_download_archive_to_file_enforces_size_cap(tmp_path):
+    async def chunks():
+        for _ in range(10):
+            yield b"y" * 1024
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        # 无 Content-Length 的分块响应，只能在写入过程中发现超限
+        return httpx.Response(200, content=chunks(), headers={"content-type": "application/zip"})
+
+    client = _make_client(handler)
+    result = await client.download_archive_to_file(1, tmp_path, max_bytes=4096)
+
+    assert result["success"] is False
+    assert result["code"] == 413
+    assert list(tmp_path.iterdir()) == []
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_download_archive_to_file_passes_json_through(tmp_path):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"code": 200, "data": {"url": "http://x/a.zip"}})
+
+    client = _make_client(handler)
+    result = await client.download_archive_to_file(1, tmp_path)
+
+    assert result["success"] is True
+    assert result["data"] == {"url": "http://x/a.zip"}
+    await client.close()
+
+
+def test_parse_content_disposition_rejects_non_filenames():
+    from nonebot_plugin_dst_management.client.transfer import parse_content_disposition
+
+    assert parse_content_disposition('attachment; filename="..\\a\\b.zip"') == "b.zip"
+    assert parse_content_disposition("attachment; filename*=UTF-8''%E5%AD%98.zip") == "存.zip"
+    for header in (
+        'attachment; filename=".."',
+        'attachment; filename="."',
+        'attachment; filename="a/.."',
+        "attachment; filename*=UTF-8''..",
+        'attachment; filename="dir/"',
+    ):
+        assert parse_content_disposition(header) is None
+
+
+@pytest.mark.asyncio
+async def test_download_url_to_file_caps_size_and_scopes_token(tmp_path):
+    seen: list[tuple[str, str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append((request.url.host, request.headers.get("x-dmp-token", "")))
+        size = 10_000 if request.url.path.endswith("big.zip") else 100
+        return httpx.Response(200, content=b"x" * size)
+
+    client = _make_client(handler)
+    ok = await client.download_url_to_file("http://cdn.example/a.zip", tmp_path / "a.zip")
+    assert ok == {"success": True, "data": {"path": str(tmp_path / "a.zip"), "size": 100}}
+
+    too_large = await client.download_url_to_file(
+        "http://mock/v3/big.zip", tmp_path / "big.zip", max_bytes=4096
+    )
+    assert too_large["code"] == 413
+    assert not (tmp_path / "big.zip").exists()
+    # 只有发往 DMP 的请求携带 token
+    assert seen == [("cdn.example", ""), ("mock", "token")]
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_upload_archive_streams_body_with_progress(tmp_path):
+    archive = tmp_path / "cluster.zip"
+    payload = b"PK" + b"z" * 200_000
+    archive.write_bytes(payload)
+    seen: dict[str, object] = {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        seen["length"] = request.headers.get("content-length")
+        seen["body_size"] = len(body)
+        boundary = request.headers["content-type"].split("boundary=", 1)[1].encode()
+        assert body.startswith(b"--" + boundary)
+        assert body.endswith(b"--" + boundary + b"--\r\n")
+        assert b'name="roomID"\r\n\r\n2\r\n' in body
+        assert b'filename="cluster.zip"' in body
+        assert payload in body
+        return httpx.Response(200, json={"code": 200, "data": None})
+
+    progress: list[tuple[int, int | None]] = []
+    client = _make_client(handler)
+    result = await client.replace_archive(
+        2,
+        str(archive),
+        progress=lambda done, total: progress.append((done, total)),
+        chunk_size=32 * 1024,
+    )
+
+    assert result["success"] is True
+    assert seen["length"] == str(seen["body_size"])
+    assert len(progress) > 2
+    assert progress[-1] == (len(payload), len(payload))
+    assert all(done <= total for done, total in progress)
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_upload_archive_rate_limit_throttles(tmp_path, monkeypatch):
+    from nonebot_plugin_dst_management.client import transfer
+
+    archive = tmp_path / "cluster.zip"
+    archive.write_bytes(b"a" * 4096)
+    sleeps: list[float] = []
+
+    async def fake_sleep(delay: float) -> None:
+        sleeps.append(delay)
+
+    monkeypatch.setattr(transfer.asyncio, "sleep", fake_sleep)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        return httpx.Response(200, json={"code": 200, "data": None})
+
+    client = _make_client(handler)
+    result = await client.upload_archive(1, str(archive), rate_limit=1024, chunk_size=1024)
+
+    assert result["success"] is True
+    # 4KB 以 1KB/s 发送：第 n 块发出后应累计耗时约 n 秒（sleep 被替换，时间不前进）
+    assert len(sleeps) == 4
+    assert [round(delay) for delay in sleeps] == [1, 2, 3, 4]
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_upload_archive_missing_file(tmp_path):
+    client = _make_client(lambda request: httpx.Response(500))
+    result = await client.upload_archive(1, str(tmp_path / "missing.zip"))
+
+    assert result == {"success": False, "error": "存档文件不存在", "code": 404}
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_transfer_file_io_runs_off_the_event_loop(tmp_path, monkeypatch):
+    import asyncio
+    import threading
+
+    from nonebot_plugin_dst_management.client import transfer
+
+    archive = tmp_path / "cluster.zip"
+    archive.write_bytes(b"a" * 10_000)
+    threads: set[str] = set()
+    to_thread = asyncio.to_thread
+
+    async def tracking_to_thread(func, *args):
+        def call():
+            threads.add(threading.current_thread().name)
+            return func(*args)
+
+        return await to_thread(call)
+
+    monkeypatch.setattr(transfer.asyncio, "to_thread", tracking_to_thread)
+
+    stream = transfer.MultipartFileStream(str(archive), chunk_size=4096)
+    body = b"".join([chunk async for chunk in stream])
+    assert b"a" * 10_000 in body
+
+    async def chunks():
+        for _ in range(3):
+            yield b"b" * 10
+
+    written = await transfer.write_chunks(chunks(), tmp_path / "out.bin")
+    assert written == 30
+    assert (tmp_path / "out.bin").read_bytes() == b"b" * 30
+    assert threads and threading.current_thread().name not in threads
+
+
+@pytest.mark.asyncio
+async def test_multipart_stream_escapes_filename(tmp_path):
+    from nonebot_plugin_dst_management.client.transfer import MultipartFileStream
+
+    archive = tmp_path / "cluster.zip"
+    archive.write_bytes(b"zip")
+    stream = MultipartFileStream(
+        str(archive), {"roomID": "1"}, filename='evil"\r\nX-Injected: 1\\.zip'
+    )
+    body = b"".join([chunk async for chunk in stream])
+    assert len(body) == stream.content_length
+
+    headers = body.split(b"\r\n\r\n")[1].split(b"\r\n")
+    assert headers[2] == (
+        b'Content-Disposition: form-data; name="file"; '
+        b'filename="evil%22%0D%0AX-Injected: 1\\\\.zip"'
+    )
+    assert not any(line.startswith(b"X-Injected") for line in headers)
@@ -0,0 +1,259 @@
+import asyncio
+
+import httpx
+import pytest
+
+from nonebot_plugin_dst_management.client.api_client import DSTApiClient
+from nonebot_plugin_dst_management.client.cache import (
+    ResponseCache,
+    extract_room_id,
+    make_cache_key,
+    normalize_endpoint,
+)
+
+
+def _make_client(handler, **kwargs) -> DSTApiClient:
+    client = DSTApiClient("http://mock", "token", **kwargs)
+    client.client = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler),
+        base_url="http://mock/v3",
+    )
+    return client
+
+
+def test_normalize_endpoint_and_room_extraction():
+    assert normalize_endpoint("/room/12") == "/room/{id}"
+    assert normalize_endpoint("room/world/list") == "/room/world/list"
+    assert extract_room_id("/room/7") == 7
+    assert extract_room_id("/room/player/online", params={"roomID": 3}) == 3
+    assert extract_room_id("/dashboard/startup", data={"roomID": "5"}) == 5
+    assert extract_room_id("/room/list") is None
+    assert make_cache_key("/room/list", {"pageSize": 10, "page": 1}) == make_cache_key(
+        "room/list", {"page": 1, "pageSize": 10}
+    )
+
+
+def test_response_cache_ttl_and_failures(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("nonebot_plugin_dst_management.client.cache.time.monotonic", lambda: now[0])
+
+    cache = ResponseCache({"/room/player/online": 2})
+    key = make_cache_key("/room/player/online", {"roomID": 1})
+
+    cache.set(key, {"success": False, "error": "x"}, room_id=1)
+    assert cache.get(key) is None
+
+    cache.set(key, {"success": True, "data": []}, room_id=1)
+    assert cache.get(key) == {"success": True, "data": []}
+
+    now[0] += 2.5
+    assert cache.get(key) is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_response_cache_isolates_nested_payload():
+    cache = ResponseCache({"/room/player/online": 2})
+    key = make_cache_key("/room/player/online", {"roomID": 1})
+    payload = {"success": True, "data": [{"uid": "KU_1"}]}
+
+    cache.set(key, payload, room_id=1)
+    payload["data"].append({"uid": "KU_2"})
+    first = cache.get(key)
+    assert first is not None
+    first["data"][0]["uid"] = "changed"
+
+    assert cache.get(key) == {"success": True, "data": [{"uid": "KU_1"}]}
+
+
+@pytest.mark.asyncio
+async def test_get_requests_are_cached_and_mutations_invalidate():
+    calls: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(f"{request.method} {request.url.path}")
+        return httpx.Response(200, json={"code": 200, "data": [{"uid": "KU_1"}]})
+
+    client = _make_client(handler, enable_cache=True)
+
+    first = await client.get_online_players(1)
+    second = await client.get_online_players(1)
+    await client.get_online_players(2)
+
+    assert first == second
+    assert calls.count("GET /v3/room/player/online") == 2
+
+    await client.restart_room(1)
+    await client.get_online_players(1)
+    await client.get_online_players(2)
+
+    assert calls.count("GET /v3/room/player/online") == 3
+    assert calls.count("POST /v3/dashboard/restart") == 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_cache_disabled_by_default():
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(200, json={"code": 200, "data": {"rows": []}})
+
+    client = _make_client(handler)
+    await client.get_world_list(1)
+    await client.get_world_list(1)
+
+    assert client.cache is None
+    assert calls == 2
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_gets_are_coalesced():
+    calls = 0
+    release = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return httpx.Response(200, json={"code": 200, "data": {"id": 1}})
+
+    client = _make_client(handler)
+    tasks = [asyncio.create_task(client.get_room_info(1)) for _ in range(10)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert calls == 1
+    assert all(result["data"] == {"id": 1} for result in results)
+    # 每个调用方拿到独立的信封
+    assert len({id(result) for result in results}) == 10
+    stats = client.get_request_stats()
+    assert stats["issued"] == 1
+    assert stats["coalesced"] == 9
+    assert stats["inflight"] == 0
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_get_after_mutation_does_not_join_stale_inflight_request():
+    calls = 0
+    release = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        if request.method == "GET":
+            calls += 1
+            await release.wait()
+        return httpx.Response(200, json={"code": 200, "data": calls})
+
+    client = _make_client(handler, enable_cache=True)
+    before = asyncio.create_task(client.get_room_info(1))
+    await asyncio.sleep(0)
+    await client.activate_room(1)
+    after = asyncio.create_task(client.get_room_info(1))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(before, after)
+
+    assert calls == 2
+    assert client.get_request_stats()["coalesced"] == 0
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_get_during_inflight_mutation_is_not_cached():
+    state = {"status": "stopped"}
+    gets = 0
+    release = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal gets
+        if request.method == "POST":
+            await release.wait()
+            state["status"] = "running"
+            return httpx.Response(200, json={"code": 200, "data": None})
+        gets += 1
+        return httpx.Response(200, json={"code": 200, "data": dict(state)})
+
+    client = _make_client(handler, enable_cache=True)
+    mutation = asyncio.create_task(client.activate_room(1))
+    await asyncio.sleep(0.01)
+    # 写操作进行期间的读取拿到写之前的状态
+    during = await client.get_room_info(1)
+    assert during["data"] == {"status": "stopped"}
+    release.set()
+    await mutation
+
+    # 写完成后不再命中写进行期间缓存的旧状态
+    after = await client.get_room_info(1)
+    assert after["data"] == {"status": "running"}
+    assert gets == 2
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_online_players_snapshot_ttl_and_invalidation(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("nonebot_plugin_dst_management.client.api_client.time.monotonic", lambda: now[0])
+    calls: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(f"{request.method} {request.url.path}")
+        return httpx.Response(200, json={"code": 200, "data": [{"uid": "KU_1"}]})
+
+    client = _make_client(handler, players_ttl=3)
+
+    results = await asyncio.gather(*(client.get_online_players(1) for _ in range(20)))
+    results.append(await client.get_room_players(1))
+    assert all(result["data"] == [{"uid": "KU_1"}] for result in results)
+    assert calls.count("GET /v3/room/player/online") == 1
+    assert client.get_request_stats()["players"] == {"hits": 1, "coalesced": 19, "rooms": 1}
+
+    # 调用方改写返回值不影响快照
+    results[0]["data"].clear()
+    assert (await client.get_online_players(1))["data"] == [{"uid": "KU_1"}]
+    assert calls.count("GET /v3/room/player/online") == 1
+
+    now[0] += 3.5
+    await client.get_online_players(1)
+    assert calls.count("GET /v3/room/player/online") == 2
+
+    # 写操作后该房间的快照失效
+    await client.restart_room(1)
+    await client.get_online_players(1)
+    assert calls.count("GET /v3/room/player/online") == 3
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_players_snapshot_taken_during_mutation_is_dropped():
+    online = ["KU_OLD"]
+    fetches = 0
+    release = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal fetches
+        if request.method == "POST":
+            await release.wait()
+            online[:] = ["KU_NEW"]
+            return httpx.Response(200, json={"code": 200, "data": None})
+        fetches += 1
+        data = [{"uid": uid} for uid in online]
+        return httpx.Response(200, json={"code": 200, "data": data})
+
+    client = _make_client(handler, players_ttl=3)
+    mutation = asyncio.create_task(client.restart_room(1))
+    await asyncio.sleep(0.01)
+    during = await client.get_room_players(1)
+    assert during["data"] == [{"uid": "KU_OLD"}]
+    release.set()
+    await mutation
+
+    # 写完成后快照与飞行中的合并请求一并作废，重新获取重启后的玩家
+    after = await client.get_room_players(1)
+    assert after["data"] == [{"uid": "KU_NEW"}]
+    assert fetches == 2
+    await client.close()
@@ -0,0 +1,130 @@
+import httpx
+import pytest
+
+from nonebot_plugin_dst_management.client import resilience
+from nonebot_plugin_dst_management.client.api_client import DSTApiClient
+from nonebot_plugin_dst_management.client.resilience import CircuitBreaker, RetryPolicy
+
+
+def _make_client(handler, **kwargs) -> DSTApiClient:
+    client = DSTApiClient("http://mock", "token", **kwargs)
+    client.client = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler),
+        base_url="http://mock/v3",
+    )
+    return client
+
+
+@pytest.fixture(autouse=True)
+def _no_sleep(monkeypatch):
+    async def fake_sleep(delay: float) -> None:
+        return None
+
+    monkeypatch.setattr(resilience.asyncio, "sleep", fake_sleep)
+
+
+@pytest.mark.asyncio
+async def test_get_retries_on_timeout_then_succeeds():
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if calls < 3:
+            raise httpx.ReadTimeout("slow", request=request)
+        return httpx.Response(200, json={"code": 200, "data": []})
+
+    client = _make_client(handler, retry_policy=RetryPolicy(retries=3, backoff=0.1))
+    result = await client.get_online_players(1)
+
+    assert result["success"] is True
+    assert calls == 3
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_unsafe_post_is_not_retried_after_request_sent():
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        raise httpx.ReadTimeout("slow", request=request)
+
+    client = _make_client(handler, retry_policy=RetryPolicy(retries=3))
+    result = await client.execute_console_command(1, None, "c_save()")
+
+    assert result["code"] == 408
+    assert calls == 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_post_retried_on_connect_error_and_idempotent_post_on_gateway_error():
+    attempts: dict[str, int] = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        attempts[path] = attempts.get(path, 0) + 1
+        if path.endswith("/dashboard/restart") and attempts[path] == 1:
+            raise httpx.ConnectError("refused", request=request)
+        if path.endswith("/mod/download") and attempts[path] == 1:
+            return httpx.Response(503, text="busy")
+        return httpx.Response(200, json={"code": 200, "data": None})
+
+    client = _make_client(handler, retry_policy=RetryPolicy(retries=2))
+
+    assert (await client.restart_room(1))["success"] is True
+    assert (await client.download_mod("123"))["success"] is True
+    assert attempts == {"/v3/dashboard/restart": 2, "/v3/mod/download": 2}
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens_and_recovers(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    healthy = [False]
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if not healthy[0]:
+            raise httpx.ConnectError("down", request=request)
+        return httpx.Response(200, json={"code": 200, "data": {}})
+
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10)
+    client = _make_client(handler, circuit_breaker=breaker)
+
+    await client.get_room_info(1)
+    await client.get_room_info(1)
+    assert client.get_breaker_state()["state"] == "open"
+
+    rejected = await client.get_room_info(1)
+    assert rejected["code"] == 503
+    assert calls == 2
+
+    now[0] += 10
+    assert breaker.state == "half_open"
+    healthy[0] = True
+    assert (await client.get_room_info(1))["success"] is True
+    state = client.get_request_stats()["breaker"]
+    assert state["state"] == "closed"
+    assert state["rejected"] == 1
+    await client.close()
+
+
+def test_half_open_allows_single_probe(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=5)
+
+    breaker.record_failure()
+    now[0] = 5
+    assert breaker.allow() is True
+    assert breaker.allow() is False
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.snapshot()["opened_count"] == 2
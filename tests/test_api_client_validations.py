@@ -144,6 +144,10 @@ async def test_request_error_handling(monkeypatch):
     client = DSTApiClient("http://mock", "token")
 
     class DummyResponse:
+        status_code = 200
+        content = b"{}"
+        request = httpx.Request("GET", "http://mock/v3/room/list")
+
         def __init__(self, payload):
             self._payload = payload
 
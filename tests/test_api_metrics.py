@@ -0,0 +1,120 @@
+import httpx
+import pytest
+
+from nonebot_plugin_dst_management.client.api_client import DSTApiClient
+from nonebot_plugin_dst_management.client.metrics import ApiMetrics
+
+
+def _make_client(handler, **kwargs) -> DSTApiClient:
+    client = DSTApiClient("http://mock", "token", **kwargs)
+    client.client = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler),
+        base_url="http://mock/v3",
+    )
+    return client
+
+
+def test_histogram_percentiles_and_counters():
+    metrics = ApiMetrics()
+    for _ in range(90):
+        metrics.record("GET", "/room/1", 0.008, 200, bytes_in=100)
+    for _ in range(9):
+        metrics.record("GET", "/room/2", 0.2, 200, bytes_in=100)
+    metrics.record("GET", "/room/3", 3.0, timeout=True)
+
+    (row,) = metrics.snapshot()
+    assert row["endpoint"] == "/room/{id}"
+    assert row["count"] == 100
+    assert 5 <= row["p50_ms"] <= 10
+    assert 100 <= row["p95_ms"] <= 250
+    assert row["p99_ms"] <= 250
+    assert row["max_ms"] == pytest.approx(3000)
+    assert row["statuses"] == {"200": 99, "timeout": 1}
+    assert row["timeouts"] == 1
+    assert row["bytes_in"] == 9900
+
+
+def test_record_normalizes_each_path_once(monkeypatch):
+    from nonebot_plugin_dst_management.client import metrics as metrics_module
+
+    calls = []
+    original = metrics_module.normalize_endpoint
+
+    def counting(path):
+        calls.append(path)
+        return original(path)
+
+    monkeypatch.setattr(metrics_module, "normalize_endpoint", counting)
+    metrics = ApiMetrics()
+    for _ in range(5):
+        metrics.record("GET", "/room/1", 0.01, 200)
+        metrics.record("GET", "/room/2", 0.01, 500)
+    metrics.record("POST", "/room/1", 0.01, 200)
+
+    assert calls == ["/room/1", "/room/2", "/room/1"]
+    rows = {(row["method"], row["endpoint"]): row for row in metrics.snapshot()}
+    assert rows[("GET", "/room/{id}")]["statuses"] == {"200": 5, "500": 5}
+    assert rows[("POST", "/room/{id}")]["count"] == 1
+
+    metrics.reset()
+    metrics.record("GET", "/room/1", 0.01, 200)
+    assert len(calls) == 4
+
+
+@pytest.mark.asyncio
+async def test_client_records_per_endpoint_metrics():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/room/world/list"):
+            raise httpx.ReadTimeout("slow", request=request)
+        if request.method == "POST":
+            return httpx.Response(500, json={"code": 500, "message": "boom"})
+        return httpx.Response(200, json={"code": 200, "data": []})
+
+    client = _make_client(handler)
+    await client.get_online_players(1)
+    await client.get_online_players(2)
+    await client.get_world_list(1)
+    await client.restart_room(1)
+
+    rows = {(row["method"], row["endpoint"]): row for row in client.get_api_metrics()}
+    assert rows[("GET", "/room/player/online")]["count"] == 2
+    assert rows[("GET", "/room/player/online")]["bytes_in"] > 0
+    assert rows[("GET", "/room/world/list")]["timeouts"] == 1
+    assert rows[("POST", "/dashboard/restart")]["statuses"] == {"500": 1}
+    assert rows[("POST", "/dashboard/restart")]["bytes_out"] > 0
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_archive_transfers_are_recorded(tmp_path):
+    archive = tmp_path / "cluster.zip"
+    archive.write_bytes(b"PK" * 100)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "POST":
+            await request.aread()
+            return httpx.Response(200, json={"code": 200, "data": None})
+        return httpx.Response(200, content=b"PK" * 50, headers={"content-type": "application/zip"})
+
+    client = _make_client(handler)
+    await client.upload_archive(1, str(archive))
+    await client.download_archive_to_file(1, tmp_path / "out")
+
+    rows = {row["endpoint"]: row for row in client.get_api_metrics()}
+    assert rows["/tools/archive/upload"]["bytes_out"] > 200
+    assert rows["/tools/archive/download"]["bytes_in"] == 100
+    await client.close()
+
+
+def test_format_api_stats():
+    from nonebot_plugin_dst_management.commands.stats import format_api_stats
+
+    metrics = ApiMetrics()
+    metrics.record("GET", "/room/list", 0.02, 200, bytes_in=2048)
+    text = format_api_stats(metrics.snapshot(), {"issued": 1, "coalesced": 3})
+
+    assert "GET /room/list ×1" in text
+    assert "p95" in text and "p99" in text
+    assert "状态 200:1" in text
+    assert "合并 3" in text
+    assert "暂无请求记录" in format_api_stats([])
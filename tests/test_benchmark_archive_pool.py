@@ -0,0 +1,97 @@
+"""
+存档传输连接池基准测试
+
+对比「每次新建 httpx.AsyncClient」与「复用 DSTApiClient 连接池」下载存档的延迟。
+需要真实 TCP 连接，默认跳过；设置 RUN_BENCHMARKS=1 后运行：
+
+    RUN_BENCHMARKS=1 pytest tests/test_benchmark_archive_pool.py -s --no-cov
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import statistics
+import threading
+import time
+
+import httpx
+import pytest
+
+from nonebot_plugin_dst_management.client.api_client import DSTApiClient
+
+pytestmark = [
+    pytest.mark.slow,
+    pytest.mark.skipif(
+        os.getenv("RUN_BENCHMARKS") != "1",
+        reason="benchmarks are disabled by default",
+    ),
+]
+
+ROUNDS = 30
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def mock_server_url():
+    import uvicorn
+
+    from tests.mock_api import app
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            pytest.fail("mock DMP server failed to start")
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+async def _download_with_fresh_client(base_url: str, room_id: int) -> bytes:
+    # 旧实现：每次下载都新建客户端（新的 TCP 握手，不复用连接池）
+    async with httpx.AsyncClient(base_url=f"{base_url}/v3", headers={"X-DMP-TOKEN": "t"}) as client:
+        response = await client.get("/tools/archive/download", params={"roomID": room_id})
+    return response.content
+
+
+def _summary(samples: list[float]) -> str:
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    return f"mean={statistics.mean(samples) * 1000:.2f}ms p50={statistics.median(samples) * 1000:.2f}ms p95={p95 * 1000:.2f}ms"
+
+
+@pytest.mark.asyncio
+async def test_pooled_archive_download_latency(mock_server_url):
+    fresh: list[float] = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        content = await _download_with_fresh_client(mock_server_url, 1)
+        fresh.append(time.perf_counter() - start)
+        assert content.startswith(b"PK")
+
+    client = DSTApiClient(mock_server_url, "t")
+    pooled: list[float] = []
+    try:
+        # 预热一次，建立 keep-alive 连接
+        await client.download_archive(1)
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            result = await client.download_archive(1)
+            pooled.append(time.perf_counter() - start)
+            assert result["success"] is True
+    finally:
+        await client.close()
+
+    print(f"\nfresh client : {_summary(fresh)}")
+    print(f"pooled client: {_summary(pooled)}")
+    assert statistics.median(pooled) <= statistics.median(fresh)
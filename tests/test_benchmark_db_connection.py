@@ -0,0 +1,96 @@
+"""
+SQLite 连接复用基准测试
+
+对比「每次查询新建连接」与「长连接 + WAL」下签到相关读写的吞吐（ops/sec）。
+默认跳过；设置 RUN_BENCHMARKS=1 后运行：
+
+    RUN_BENCHMARKS=1 pytest tests/test_benchmark_db_connection.py -s --no-cov
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import pytest
+
+from nonebot_plugin_dst_management.database import (
+    close_db,
+    create_user_binding,
+    execute,
+    fetch_one,
+    init_db,
+    set_db_path,
+)
+from nonebot_plugin_dst_management.database.connection import get_db_path
+
+pytestmark = [
+    pytest.mark.slow,
+    pytest.mark.skipif(
+        os.getenv("RUN_BENCHMARKS") != "1",
+        reason="benchmarks are disabled by default",
+    ),
+]
+
+OPS = 2000
+
+READ_SQL = "SELECT * FROM sign_users WHERE qq_id = ? AND room_id = ?"
+WRITE_SQL = "UPDATE sign_users SET sign_count = sign_count + 1 WHERE qq_id = ? AND room_id = ?"
+
+
+@pytest.fixture
+async def db_paths(tmp_path):
+    original = get_db_path()
+    legacy_file = tmp_path / "legacy.db"
+    managed_file = tmp_path / "managed.db"
+    for db_file in (legacy_file, managed_file):
+        set_db_path(db_file)
+        await init_db()
+        await create_user_binding("10000", "KU_BENCH", 1, "bench")
+    await close_db()
+    # 旧实现使用默认的 rollback journal
+    with closing(sqlite3.connect(legacy_file)) as conn:
+        conn.execute("PRAGMA journal_mode = DELETE")
+    set_db_path(managed_file)
+    yield legacy_file, managed_file
+    set_db_path(original)
+
+
+def _open_per_query(db_file, query: str, params: tuple, write: bool) -> None:
+    """旧实现：每次查询打开并关闭连接。"""
+    with closing(sqlite3.connect(db_file, check_same_thread=False)) as conn:
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        cursor = conn.execute(query, params)
+        if write:
+            conn.commit()
+        else:
+            cursor.fetchone()
+
+
+@pytest.mark.asyncio
+async def test_benchmark_open_per_query_vs_managed_connection(db_paths):
+    legacy_file, _ = db_paths
+    params = ("10000", 1)
+
+    started = time.perf_counter()
+    for index in range(OPS):
+        write = index % 2 == 0
+        _open_per_query(legacy_file, WRITE_SQL if write else READ_SQL, params, write)
+    legacy = OPS / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for index in range(OPS):
+        if index % 2 == 0:
+            await execute(WRITE_SQL, params)
+        else:
+            await fetch_one(READ_SQL, params)
+    managed = OPS / (time.perf_counter() - started)
+
+    print(
+        f"\nopen-per-query: {legacy:,.0f} ops/s | managed WAL connection: {managed:,.0f} ops/s"
+        f" | speedup ×{managed / legacy:.1f}"
+    )
+    assert managed > legacy
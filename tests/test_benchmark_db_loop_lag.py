@@ -0,0 +1,86 @@
+"""
+数据库调用事件循环延迟基准测试
+
+在执行较慢的 SQLite 写入时，用一个 5ms 周期的心跳协程测量事件循环最大延迟，
+对比「在事件循环中直接调用 sqlite3」与「提交到数据库执行器」。
+默认跳过；设置 RUN_BENCHMARKS=1 后运行：
+
+    RUN_BENCHMARKS=1 pytest tests/test_benchmark_db_loop_lag.py -s --no-cov
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from nonebot_plugin_dst_management.database import execute, init_db, set_db_path
+from nonebot_plugin_dst_management.database.connection import _execute, get_db_path
+
+pytestmark = [
+    pytest.mark.slow,
+    pytest.mark.skipif(
+        os.getenv("RUN_BENCHMARKS") != "1",
+        reason="benchmarks are disabled by default",
+    ),
+]
+
+ROUNDS = 5
+TICK = 0.005
+# 递归生成大量行，写入耗时约数十到数百毫秒
+SLOW_WRITE = """
+INSERT INTO lag_probe (value)
+WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < 200000)
+SELECT n FROM seq
+"""
+
+
+@pytest.fixture
+async def db_path(tmp_path):
+    original = get_db_path()
+    db_file = tmp_path / "lag.db"
+    set_db_path(db_file)
+    await init_db()
+    await execute("CREATE TABLE lag_probe (value INTEGER)")
+    yield db_file
+    set_db_path(original)
+
+
+async def _measure_lag(work) -> float:
+    """执行 work 期间事件循环的最大延迟（毫秒）。"""
+    max_lag = 0.0
+    stop = asyncio.Event()
+
+    async def heartbeat() -> None:
+        nonlocal max_lag
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(TICK)
+            max_lag = max(max_lag, time.perf_counter() - started - TICK)
+
+    ticker = asyncio.create_task(heartbeat())
+    await asyncio.sleep(TICK * 2)
+    await work()
+    stop.set()
+    await ticker
+    return max_lag * 1000
+
+
+@pytest.mark.asyncio
+async def test_benchmark_event_loop_lag(db_path):
+    async def inline() -> None:
+        _execute(SLOW_WRITE, ())
+
+    async def offloaded() -> None:
+        await execute(SLOW_WRITE, ())
+
+    inline_lag = [await _measure_lag(inline) for _ in range(ROUNDS)]
+    offloaded_lag = [await _measure_lag(offloaded) for _ in range(ROUNDS)]
+
+    print(
+        f"\nmax loop lag — inline sqlite3: {max(inline_lag):.1f}ms"
+        f" | db executor: {max(offloaded_lag):.1f}ms"
+    )
+    assert max(offloaded_lag) < max(inline_lag)
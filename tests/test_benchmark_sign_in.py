@@ -0,0 +1,95 @@
+"""
+签到写入路径基准测试
+
+并发执行多个用户的签到，对比「分步自动提交」（读用户、查记录、更新统计、写记录）
+与 record_sign_in 单事务写入的吞吐（sign-ins/sec）。
+默认跳过；设置 RUN_BENCHMARKS=1 后运行：
+
+    RUN_BENCHMARKS=1 pytest tests/test_benchmark_sign_in.py -s --no-cov
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from nonebot_plugin_dst_management.database import (
+    create_sign_record,
+    create_user_binding,
+    get_sign_record,
+    get_user_binding,
+    init_db,
+    record_sign_in,
+    set_db_path,
+    update_user_sign_stats,
+)
+from nonebot_plugin_dst_management.database.connection import get_db_path
+
+pytestmark = [
+    pytest.mark.slow,
+    pytest.mark.skipif(
+        os.getenv("RUN_BENCHMARKS") != "1",
+        reason="benchmarks are disabled by default",
+    ),
+]
+
+USERS = 200
+DAYS = 5
+
+
+@pytest.fixture
+async def db_path(tmp_path):
+    original = get_db_path()
+    db_file = tmp_path / "sign_bench.db"
+    set_db_path(db_file)
+    await init_db()
+    for index in range(USERS):
+        await create_user_binding(str(index), f"KU_{index}", 1)
+        await create_user_binding(str(index), f"KU_{index}", 2)
+    yield db_file
+    set_db_path(original)
+
+
+async def _legacy_sign_in(qq_id: str, room_id: int, today: date) -> bool:
+    user = await get_user_binding(qq_id, room_id)
+    if user is None or await get_sign_record(qq_id, today, room_id=room_id):
+        return False
+    await update_user_sign_stats(
+        qq_id, room_id, today, user.sign_count + 1, user.continuous_days + 1, 1, user.total_points
+    )
+    await create_sign_record(qq_id, room_id, today, 1, [{"prefab": "log", "amount": 1}])
+    return True
+
+
+async def _transactional_sign_in(qq_id: str, room_id: int, today: date) -> bool:
+    outcome = await record_sign_in(
+        qq_id, room_id, today, continuous_days=1, level=1,
+        reward_items=[{"prefab": "log", "amount": 1}],
+    )
+    return outcome.user is not None
+
+
+async def _run(sign_in, room_id: int) -> float:
+    started = time.perf_counter()
+    total = 0
+    for day in range(DAYS):
+        today = date(2026, 2, 1) + timedelta(days=day)
+        results = await asyncio.gather(*(sign_in(str(index), room_id, today) for index in range(USERS)))
+        total += sum(results)
+    assert total == USERS * DAYS
+    return total / (time.perf_counter() - started)
+
+
+@pytest.mark.asyncio
+async def test_benchmark_sign_in_write_path(db_path):
+    legacy = await _run(_legacy_sign_in, 1)
+    transactional = await _run(_transactional_sign_in, 2)
+    print(
+        f"\nlegacy multi-statement: {legacy:,.0f} sign-ins/s"
+        f" | single transaction: {transactional:,.0f} sign-ins/s"
+    )
+    assert transactional > legacy
@@ -1,3 +1,5 @@
+import asyncio
+import threading
 from datetime import date
 
 import pytest
@@ -15,6 +17,13 @@ from nonebot_plugin_dst_management.database import (
     set_db_path,
     update_user_sign_stats,
 )
+from nonebot_plugin_dst_management.database import close_db, execute, fetch_all, fetch_one
+from nonebot_plugin_dst_management.database import (
+    LATEST_VERSION,
+    get_schema_version,
+    run_with_connection,
+)
+from nonebot_plugin_dst_management.database.connection import run_write
 from nonebot_plugin_dst_management.database.connection import get_db_path
 
 
@@ -101,3 +110,90 @@ async def test_sign_reward_crud(db_path):
 
     rewards = await list_sign_rewards()
     assert len(rewards) == 1
+
+
+@pytest.mark.asyncio
+async def test_connection_is_reused_and_reopened_on_path_change(db_path, tmp_path):
+    row = await fetch_one("PRAGMA journal_mode")
+    assert row[0] == "wal"
+
+    await create_user_binding("345", "KU_A", 3, "player3")
+    assert await get_user_binding("345", 3) is not None
+
+    set_db_path(tmp_path / "other.db")
+    await init_db()
+    assert await get_user_binding("345", 3) is None
+
+    set_db_path(db_path)
+    await close_db()
+    # 关闭后再次查询会自动重连
+    assert await get_user_binding("345", 3) is not None
+
+
+@pytest.mark.asyncio
+async def test_writes_run_off_loop_in_submission_order(db_path):
+    await execute("CREATE TABLE ordering (seq INTEGER)")
+    thread_names = await asyncio.gather(
+        *(run_write(lambda: threading.current_thread().name) for _ in range(3))
+    )
+    assert all(name.startswith("dst-db-write") for name in thread_names)
+
+    await asyncio.gather(*(execute("INSERT INTO ordering (seq) VALUES (?)", (index,)) for index in range(50)))
+    rows, count = await asyncio.gather(
+        fetch_all("SELECT seq FROM ordering ORDER BY rowid"),
+        fetch_one("SELECT COUNT(*) FROM ordering"),
+    )
+    assert [row["seq"] for row in rows] == list(range(50))
+    assert count[0] == 50
+
+
+@pytest.mark.asyncio
+async def test_init_db_sets_schema_version_and_warm_start_reads_once(db_path):
+    assert await get_schema_version() == LATEST_VERSION
+
+    statements = []
+    await run_with_connection(lambda conn: conn.set_trace_callback(statements.append))
+    try:
+        await init_db()
+    finally:
+        await run_with_connection(lambda conn: conn.set_trace_callback(None))
+    assert statements == ["SELECT MAX(version) FROM schema_version"]
+
+
+@pytest.mark.asyncio
+async def test_init_db_migrates_legacy_database(tmp_path):
+    import sqlite3
+
+    legacy = tmp_path / "legacy.db"
+    with sqlite3.connect(legacy) as conn:
+        conn.executescript(
+            """
+            CREATE TABLE sign_records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                qq_id TEXT NOT NULL,
+                room_id INTEGER NOT NULL,
+                sign_date DATE NOT NULL,
+                reward_level INTEGER NOT NULL,
+                reward_items TEXT,
+                sign_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE TABLE user_settings (qq_id TEXT PRIMARY KEY, default_room_id INTEGER);
+            INSERT INTO sign_records (qq_id, room_id, sign_date, reward_level) VALUES ('1', 1, '2026-02-05', 1);
+            INSERT INTO user_settings (qq_id, default_room_id) VALUES ('1', 3);
+            """
+        )
+    conn.close()
+
+    original = get_db_path()
+    set_db_path(legacy)
+    try:
+        await init_db()
+        assert await get_schema_version() == LATEST_VERSION
+        record = await fetch_one("SELECT status FROM sign_records")
+        assert record["status"] == 1
+        settings = await fetch_one("SELECT default_room_id, last_room_id, ui_mode FROM user_settings")
+        assert tuple(settings) == (3, None, None)
+        indexes = {row["name"] for row in await fetch_all("PRAGMA index_list(sign_records)")}
+        assert "idx_sign_records_pending" in indexes
+    finally:
+        set_db_path(original)
@@ -1,19 +1,33 @@
 from __future__ import annotations
 
+import asyncio
 from datetime import date
 
 import pytest
 
 from nonebot_plugin_dst_management.database import (
+    claim_sign_records,
     create_sign_record,
     create_user_binding,
     get_sign_record,
     init_db,
+    execute,
+    fetch_all,
     list_pending_sign_records,
+    list_room_pending_sign_records,
+    list_user_pending_sign_records,
+    mark_sign_records_delivered,
+    record_sign_in,
+    release_stale_sign_claims,
     set_db_path,
     update_sign_record_status,
 )
 from nonebot_plugin_dst_management.database.connection import get_db_path
+from nonebot_plugin_dst_management.database.models import (
+    PENDING_BY_ROOM_QUERY,
+    PENDING_BY_USER_QUERY,
+    PENDING_ROOMS_QUERY,
+)
 
 
 @pytest.fixture
@@ -63,3 +77,91 @@ async def test_pending_sign_records_and_status_update(db_path):
 
     pending_after = await list_pending_sign_records()
     assert not pending_after
+
+
+@pytest.mark.asyncio
+async def test_room_and_user_pending_queries(db_path):
+    await create_user_binding("400", "KU_A", 1, "a")
+    await create_user_binding("401", "KU_B", 1, "b")
+    await create_user_binding("400", "KU_A2", 2, "a2")
+    first = await create_sign_record("400", 1, date(2026, 2, 5), 1, status=0)
+    second = await create_sign_record("401", 1, date(2026, 2, 5), 1, status=0)
+    await create_sign_record("400", 2, date(2026, 2, 5), 1, status=0)
+    await create_sign_record("401", 1, date(2026, 2, 4), 1, status=1)
+
+    room_records = await list_room_pending_sign_records(1)
+    assert {record.id for record in room_records} == {first, second}
+
+    user_records = await list_user_pending_sign_records("400", 1)
+    assert [record.id for record in user_records] == [first]
+    assert user_records[0].ku_id == "KU_A"
+
+    assert await list_room_pending_sign_records(3) == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("query", "params"),
+    [(PENDING_BY_ROOM_QUERY, (1,)), (PENDING_BY_USER_QUERY, (1, "400")), (PENDING_ROOMS_QUERY, ())],
+)
+async def test_pending_queries_use_partial_index(db_path, query, params):
+    plan = await fetch_all("EXPLAIN QUERY PLAN " + query, params)
+    details = " ".join(row["detail"] for row in plan)
+    assert "idx_sign_records_pending" in details
+    assert "SCAN r" not in details
+
+
+@pytest.mark.asyncio
+async def test_record_sign_in_is_atomic(db_path):
+    await create_user_binding("500", "KU_C", 1, "c")
+    sign_day = date(2026, 2, 5)
+
+    outcome = await record_sign_in(
+        "500", 1, sign_day, continuous_days=2, level=1, bonus_points=5,
+        reward_items=[{"prefab": "log", "amount": 3}], status=0,
+    )
+    user = outcome.user
+    assert user is not None
+    assert user.sign_count == 1
+    assert user.continuous_days == 2
+    assert user.total_points == 5
+    assert user.last_sign_time == sign_day
+
+    record = await get_sign_record("500", sign_day, room_id=1)
+    assert record is not None
+    assert record.status == 0
+    assert record.reward_items == [{"prefab": "log", "amount": 3}]
+
+    # 同日重复签到与未绑定用户均不写入，并分别返回
+    repeated = await record_sign_in("500", 1, sign_day, continuous_days=2, level=1)
+    assert repeated.user is None and repeated.already_signed
+    unbound = await record_sign_in("501", 1, sign_day, continuous_days=1, level=1)
+    assert unbound.user is None and not unbound.already_signed
+    assert await get_sign_record("501", sign_day, room_id=1) is None
+
+
+@pytest.mark.asyncio
+async def test_claims_are_exclusive_and_stale_claims_are_released(db_path):
+    await create_user_binding("700", "KU_CLAIM", 1, "claimer")
+    ids = [
+        await create_sign_record("700", 1, date(2026, 2, day), 1, [], status=0)
+        for day in (1, 2, 3)
+    ]
+
+    first, second = await asyncio.gather(claim_sign_records(ids), claim_sign_records(ids))
+    assert first | second == set(ids)
+    assert not first & second
+    assert not await list_user_pending_sign_records("700", 1)
+
+    await mark_sign_records_delivered([ids[0]], release_ids=[ids[1]])
+    statuses = {row["id"]: row["status"] for row in await fetch_all("SELECT id, status FROM sign_records")}
+    assert statuses == {ids[0]: 1, ids[1]: 0, ids[2]: 2}
+
+    # 未超时的认领保留，超时后退回待发放
+    assert await release_stale_sign_claims(600) == 0
+    await execute(
+        "UPDATE sign_records SET claimed_at = datetime('now', '-20 minutes') WHERE id = ?",
+        (ids[2],),
+    )
+    assert await release_stale_sign_claims(600) == 1
+    assert {record.id for record in await list_user_pending_sign_records("700", 1)} == {ids[1], ids[2]}
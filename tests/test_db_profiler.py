@@ -0,0 +1,110 @@
+import pytest
+
+from nonebot_plugin_dst_management.database import (
+    claim_sign_records,
+    configure_query_profiler,
+    create_sign_record,
+    create_user_binding,
+    get_query_profiler,
+    init_db,
+    list_user_pending_sign_records,
+    set_db_path,
+)
+from nonebot_plugin_dst_management.database.connection import get_db_path
+from nonebot_plugin_dst_management.database.profiler import QueryProfiler, normalize_sql
+
+
+@pytest.fixture
+async def profiler(tmp_path):
+    original = get_db_path()
+    set_db_path(tmp_path / "profile.db")
+    await init_db()
+    profiler = get_query_profiler()
+    threshold = profiler.slow_threshold_ms
+    profiler.reset()
+    yield profiler
+    configure_query_profiler(False, threshold)
+    profiler.reset()
+    set_db_path(original)
+
+
+def test_normalize_sql_folds_literals_and_in_lists():
+    sql = """
+        SELECT * FROM user_settings
+        WHERE qq_id IN (?, ?,?) AND ui_mode = 'text' AND room_id = 12
+    """
+    assert normalize_sql(sql) == (
+        "SELECT * FROM user_settings WHERE qq_id IN (...) AND ui_mode = ? AND room_id = ?"
+    )
+    assert normalize_sql("SELECT 1;") == normalize_sql("SELECT 2")
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = QueryProfiler()
+    assert not profiler.enabled
+    assert profiler.snapshot() == []
+
+
+@pytest.mark.asyncio
+async def test_profiler_aggregates_and_logs_slow_queries_with_plan(profiler):
+    await create_user_binding("10001", "KU_A", 1, "A")
+
+    configure_query_profiler(True, 0)
+    for _ in range(3):
+        await list_user_pending_sign_records("10001", 1)
+    await create_user_binding("10002", "KU_B", 1, "B")
+    configure_query_profiler(False)
+    await list_user_pending_sign_records("10001", 1)
+
+    rows = {row["sql"]: row for row in profiler.snapshot()}
+    pending = next(row for sql, row in rows.items() if "FROM sign_records" in sql)
+    assert pending["count"] == 3
+    assert pending["max_ms"] >= pending["avg_ms"] > 0
+    assert any(sql.startswith("INSERT INTO sign_users") for sql in rows)
+
+    slow = profiler.slow_queries()
+    assert slow and slow[0]["sql"].startswith("INSERT INTO sign_users")
+    pending_slow = next(entry for entry in slow if "FROM sign_records" in entry["sql"])
+    assert any("idx_sign_records_pending" in step for step in pending_slow["plan"])
+
+
+@pytest.mark.asyncio
+async def test_profiler_times_statements_inside_transactions(profiler):
+    from datetime import date
+
+    record_id = await create_sign_record("10003", 1, date(2026, 6, 1), 1, [], status=0)
+
+    configure_query_profiler(True, 0)
+    assert await claim_sign_records([record_id]) == {record_id}
+    configure_query_profiler(False)
+
+    rows = {row["sql"]: row for row in profiler.snapshot()}
+    assert "TRANSACTION _claim_sign_records" in rows
+    claim = next(sql for sql in rows if sql.startswith("UPDATE sign_records"))
+    assert rows[claim]["count"] == 1
+    # 事务内的语句同样获取查询计划，EXPLAIN 本身不计入统计
+    assert any(entry["sql"] == claim and entry["plan"] for entry in profiler.slow_queries())
+    assert not any(sql.startswith("EXPLAIN") for sql in rows)
+
+
+def test_format_db_stats():
+    from nonebot_plugin_dst_management.commands.stats import format_db_stats
+
+    profiler = QueryProfiler(enabled=True, slow_threshold_ms=50)
+    profiler.record("SELECT * FROM sign_users WHERE qq_id = ?", 0.002)
+    profiler.record("SELECT * FROM sign_users WHERE qq_id = ?", 0.004)
+    profiler.record("UPDATE sign_users SET sign_count = 1", 0.08)
+
+    text = format_db_stats(
+        profiler.snapshot(),
+        profiler.slow_queries(),
+        enabled=True,
+        threshold_ms=50,
+        settings_cache={"hits": 9, "misses": 1, "entries": 1, "max_entries": 1024},
+        last_room_writes={"queued": 2, "skipped": 5, "flushes": 1},
+    )
+    assert "SELECT * FROM sign_users WHERE qq_id = ?" in text
+    assert "×2" in text
+    assert "最近慢查询" in text and "UPDATE sign_users" in text
+    assert "命中 9" in text and "跳过 5" in text
+    assert "未开启" in format_db_stats([], [], enabled=False, threshold_ms=100)
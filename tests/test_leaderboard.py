@@ -0,0 +1,114 @@
+from datetime import date
+
+import pytest
+
+from nonebot_plugin_dst_management.database import (
+    create_user_binding,
+    fetch_all,
+    init_db,
+    list_sign_leaderboard,
+    record_sign_in,
+    set_db_path,
+    update_user_sign_stats,
+)
+from nonebot_plugin_dst_management.database.connection import get_db_path
+from nonebot_plugin_dst_management.database.models import leaderboard_query
+from nonebot_plugin_dst_management.services.leaderboard_service import (
+    LeaderboardService,
+    format_leaderboard,
+    resolve_metric,
+)
+
+TODAY = date(2026, 2, 10)
+
+
+@pytest.fixture
+async def db_path(tmp_path):
+    original = get_db_path()
+    db_file = tmp_path / "rank.db"
+    set_db_path(db_file)
+    await init_db()
+    yield db_file
+    set_db_path(original)
+
+
+async def _seed() -> None:
+    # (qq, 最后签到, 累计, 连续, 积分)
+    users = [
+        ("1", date(2026, 2, 10), 10, 10, 50),
+        ("2", date(2026, 2, 9), 20, 4, 80),
+        ("3", date(2026, 2, 1), 30, 25, 10),  # 已断签
+        ("4", date(2026, 2, 10), 5, 5, 80),
+    ]
+    for qq_id, last_sign, count, continuous, points in users:
+        await create_user_binding(qq_id, f"KU_{qq_id}", 1, f"player{qq_id}")
+        await update_user_sign_stats(qq_id, 1, last_sign, count, continuous, 1, points)
+    await create_user_binding("9", "KU_9", 2, "other-room")
+    await update_user_sign_stats("9", 2, TODAY, 99, 99, 1, 999)
+
+
+def test_resolve_metric_aliases():
+    assert resolve_metric(None) == "continuous_days"
+    assert resolve_metric("积分") == "total_points"
+    assert resolve_metric("COUNT") == "sign_count"
+    assert resolve_metric("unknown") is None
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_orders_and_filters(db_path):
+    await _seed()
+
+    streak = await list_sign_leaderboard(1, "continuous_days", active_since=date(2026, 2, 9))
+    assert [(entry.rank, entry.qq_id, entry.value) for entry in streak] == [(1, "1", 10), (2, "4", 5), (3, "2", 4)]
+
+    points = await list_sign_leaderboard(1, "total_points", limit=2, offset=1)
+    assert [(entry.rank, entry.qq_id) for entry in points] == [(2, "4"), (3, "1")]
+
+    with pytest.raises(ValueError):
+        await list_sign_leaderboard(1, "level")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("metric", "index"),
+    [
+        ("continuous_days", "idx_sign_users_rank_continuous"),
+        ("total_points", "idx_sign_users_rank_points"),
+        ("sign_count", "idx_sign_users_rank_count"),
+    ],
+)
+async def test_leaderboard_uses_covering_index(db_path, metric, index):
+    active_since = TODAY if metric == "continuous_days" else None
+    params = (1, TODAY.isoformat(), 10, 0) if active_since else (1, 10, 0)
+    plan = await fetch_all("EXPLAIN QUERY PLAN " + leaderboard_query(metric, active_since), params)
+    details = " ".join(row["detail"] for row in plan)
+    assert f"COVERING INDEX {index}" in details
+    assert "TEMP B-TREE" not in details
+
+
+@pytest.mark.asyncio
+async def test_top_n_cache_refreshes_after_sign_in(db_path):
+    await _seed()
+    service = LeaderboardService(top_n=3)
+
+    page = await service.get_page(1, "sign_count", page_size=3, today=TODAY)
+    assert [entry.qq_id for entry in page.entries] == ["3", "2", "1"]
+    assert page.total == 4
+    await service.get_page(1, "sign_count", page_size=3, today=TODAY)
+    assert service.stats()["hits"] == 1
+
+    # 其他房间写入不影响缓存
+    await record_sign_in("9", 2, TODAY + date.resolution, continuous_days=100, level=1)
+    await service.get_page(1, "sign_count", page_size=3, today=TODAY)
+    assert service.stats()["hits"] == 2
+
+    await record_sign_in("4", 1, TODAY + date.resolution, continuous_days=6, level=1, bonus_points=100)
+    page = await service.get_page(1, "total_points", page=1, page_size=2, today=TODAY)
+    assert page.entries[0].qq_id == "4"
+    assert page.entries[0].value == 180
+
+    # 超出缓存范围的页面直接查询
+    second = await service.get_page(1, "sign_count", page=2, page_size=2, today=TODAY)
+    assert [entry.rank for entry in second.entries] == [3, 4]
+    assert second.total_pages == 2
+    assert "累计签到排行榜" in format_leaderboard(second, 1)
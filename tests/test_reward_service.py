@@ -2,7 +2,17 @@ from __future__ import annotations
 
 import pytest
 
+from nonebot_plugin_dst_management.database import (
+    create_sign_reward,
+    delete_sign_reward,
+    init_db,
+    set_db_path,
+)
+from nonebot_plugin_dst_management.database.connection import get_db_path
+from nonebot_plugin_dst_management.services import reward_service as reward_module
 from nonebot_plugin_dst_management.services.reward_service import (
+    DEFAULT_LEVEL_REWARDS,
+    CompiledRewardTable,
     RewardService,
     RewardTier,
     format_reward_items,
@@ -75,3 +85,79 @@ def test_format_reward_items():
         {"prefab": "twigs", "amount": None},
     ]
     assert format_reward_items(items) == "goldnuggetx10、cutgrassx3"
+
+
+@pytest.fixture
+async def db_path(tmp_path):
+    original = get_db_path()
+    db_file = tmp_path / "rewards.db"
+    set_db_path(db_file)
+    await init_db()
+    yield db_file
+    set_db_path(original)
+
+
+def test_compiled_table_matches_linear_selection():
+    table = CompiledRewardTable(DEFAULT_LEVEL_REWARDS)
+    for days in range(0, 40):
+        expected = DEFAULT_LEVEL_REWARDS[0]
+        for tier in DEFAULT_LEVEL_REWARDS:
+            if days >= tier.continuous_days:
+                expected = tier
+        result = table.calculate(days)
+        assert result.level == expected.level
+        bonus = [threshold for threshold in (3, 7, 30) if days >= threshold]
+        assert result.descriptions == [expected.description] + [f"连续{t}天额外奖励" for t in bonus]
+
+    # 返回值可安全修改，不影响记忆的结果
+    first = table.calculate(7, is_first_sign=True)
+    first.items.clear()
+    assert table.calculate(7, is_first_sign=True).items
+
+
+def test_calculate_from_tiers_reuses_compiled_table(monkeypatch):
+    compiled = []
+    original = CompiledRewardTable.__init__
+
+    def counting_init(self, tiers):
+        compiled.append(len(tiers))
+        original(self, tiers)
+
+    monkeypatch.setattr(CompiledRewardTable, "__init__", counting_init)
+    service = RewardService()
+    tiers = list(DEFAULT_LEVEL_REWARDS)
+    for days in (0, 3, 7, 30):
+        assert service._calculate_from_tiers(tiers, days, False, False).level >= 1
+    assert compiled == [5]
+
+    # 档位变化后重新编译
+    service._calculate_from_tiers(tiers[:2], 7, False, False)
+    assert compiled == [5, 2]
+
+
+@pytest.mark.asyncio
+async def test_reward_table_reloads_only_after_reward_crud(db_path, monkeypatch):
+    calls = 0
+    original_list = reward_module.list_sign_rewards
+
+    async def counting_list():
+        nonlocal calls
+        calls += 1
+        return await original_list()
+
+    monkeypatch.setattr(reward_module, "list_sign_rewards", counting_list)
+    service = RewardService()
+
+    assert (await service.calculate_reward(1)).level == 1
+    await service.calculate_reward(5)
+    await RewardService().calculate_reward(10)
+    assert calls == 1
+
+    await create_sign_reward(9, 2, [{"prefab": "rope", "amount": 1}], description="自定义")
+    result = await service.calculate_reward(3)
+    assert calls == 2
+    assert result.level == 9
+
+    await delete_sign_reward(9)
+    assert (await service.calculate_reward(3)).level == 2
+    assert calls == 3
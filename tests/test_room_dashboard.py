@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from nonebot_plugin_dst_management.commands.room import (
+    collect_dashboard,
+    fetch_all_rooms,
+    format_dashboard,
+)
+
+
+class DashboardClient:
+    def __init__(self, room_count: int, delay: float = 0.01) -> None:
+        self.rooms = [
+            {"id": i, "gameName": f"房间{i}", "status": i % 2 == 0, "maxPlayer": 6}
+            for i in range(1, room_count + 1)
+        ]
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def _hit(self):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+
+    async def get_room_list(self, page: int = 1, page_size: int = 10):
+        await self._hit()
+        start = (page - 1) * page_size
+        rows = self.rooms[start:start + page_size]
+        return {"success": True, "data": {"rows": rows, "totalCount": len(self.rooms)}}
+
+    async def get_online_players(self, room_id: int):
+        await self._hit()
+        if room_id == 3:
+            return {"success": False, "error": "timeout"}
+        return {"success": True, "data": [{"uid": f"KU_{room_id}"}] * (room_id % 3)}
+
+    async def get_world_list(self, room_id: int):
+        await self._hit()
+        return {"success": True, "data": {"rows": [{"id": 1}, {"id": 2}]}}
+
+
+@pytest.mark.asyncio
+async def test_dashboard_fetches_all_pages_with_bounded_fanout():
+    client = DashboardClient(room_count=40)
+    semaphore = asyncio.Semaphore(4)
+
+    rooms, error = await fetch_all_rooms(client, semaphore, page_size=15)
+    assert error is None
+    assert [room["id"] for room in rooms] == list(range(1, 41))
+
+    client.peak = 0
+    rows = await collect_dashboard(client, rooms, semaphore)
+
+    assert len(rows) == 40
+    # 每个请求占用一个名额，同时在途的请求不超过并发上限
+    assert client.peak == 4
+    assert rows[2]["players"] is None
+    assert rows[0]["worlds"] == [{"id": 1}, {"id": 2}]
+
+
+def test_format_dashboard_marks_failures():
+    text = format_dashboard(
+        [
+            {"id": 2, "name": "B", "status": False, "max_players": 6, "players": None, "worlds": []},
+            {"id": 1, "name": "A", "status": True, "max_players": 6, "players": [{}, {}], "worlds": [{}]},
+        ]
+    )
+    lines = text.splitlines()
+    assert "房间: 2 个（运行中 1） | 在线玩家: 2 人" in lines[1]
+    assert lines[4] == "1 | A | 🟢 运行中 | 2/6 | 1"
+    assert lines[5] == "2 | B | 🔴 已停止 | ?/6 | 0"
+    assert "? 表示该项获取失败" in text
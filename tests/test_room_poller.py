@@ -0,0 +1,198 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from nonebot_plugin_dst_management.client.api_client import DSTApiClient
+
+from nonebot_plugin_dst_management.services.monitors import room_poller
+from nonebot_plugin_dst_management.services.monitors.room_poller import (
+    RoomPoller,
+    RoomSnapshotStore,
+    format_snapshot_age,
+)
+
+
+class PollClient:
+    def __init__(self) -> None:
+        self.rooms = [
+            {"id": 1, "gameName": "热闹", "status": True},
+            {"id": 2, "gameName": "冷清", "status": True},
+            {"id": 3, "gameName": "停服", "status": False},
+        ]
+        self.players = {1: [{"uid": "KU_1"}], 2: []}
+        self.calls: list[tuple[str, int]] = []
+        self.active = 0
+        self.peak = 0
+
+    async def _hit(self, name: str, arg: int) -> None:
+        self.calls.append((name, arg))
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0)
+        self.active -= 1
+
+    async def get_room_list(self, page: int = 1, page_size: int = 10):
+        await self._hit("list", page)
+        return {"success": True, "data": {"rows": self.rooms, "totalCount": len(self.rooms)}}
+
+    async def get_online_players(self, room_id: int):
+        await self._hit("players", room_id)
+        return {"success": True, "data": self.players[room_id]}
+
+    async def get_platform_metrics(self, minutes: int = 60):
+        await self._hit("metrics", 0)
+        return {"success": True, "data": {"cpu": 12}}
+
+
+@pytest.mark.asyncio
+async def test_poller_adapts_interval_to_room_activity(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(room_poller.time, "monotonic", lambda: now[0])
+
+    client = PollClient()
+    store = RoomSnapshotStore()
+    seen: list[int] = []
+    poller = RoomPoller(
+        client,
+        store,
+        active_interval=10,
+        idle_interval=60,
+        room_list_interval=30,
+        metrics_interval=60,
+        concurrency=1,
+        on_players=lambda room_id, players: seen.append(room_id),
+    )
+
+    delay = await poller.poll_once(now[0])
+    assert delay == 10
+    # 已停止的房间不请求在线玩家
+    assert ("players", 3) not in client.calls
+    assert client.peak == 1
+    assert store.get_players(1, max_age=5) == [{"uid": "KU_1"}]
+    assert store.get_players(3, max_age=5) == []
+    assert store.metrics == {"cpu": 12}
+    assert seen == [1]
+
+    client.calls.clear()
+    now[0] += 10
+    await poller.poll_once(now[0])
+    assert client.calls == [("players", 1)]
+
+    now[0] += 25
+    assert store.get_players(1, max_age=20) is None
+    assert store.get_players(1, max_age=30) == [{"uid": "KU_1"}]
+
+
+@pytest.mark.asyncio
+async def test_room_list_refresh_drops_removed_rooms():
+    client = PollClient()
+    store = RoomSnapshotStore()
+    poller = RoomPoller(client, store, metrics_interval=0)
+
+    await poller.poll_once(0.0)
+    client.rooms = client.rooms[:1]
+    await poller.poll_once(31.0)
+
+    assert sorted(store.rooms) == [1]
+    assert [row["id"] for row in store.list_rooms(max_age=1e9)] == [1]
+    assert ("metrics", 0) not in client.calls
+
+
+@pytest.mark.asyncio
+async def test_poller_start_and_stop():
+    client = PollClient()
+    poller = RoomPoller(client, RoomSnapshotStore(), metrics_interval=0)
+    poller.start()
+    await asyncio.sleep(0.01)
+    assert poller.running
+    await poller.stop()
+    assert not poller.running
+    assert client.calls
+
+
+@pytest.mark.asyncio
+async def test_room_actions_invalidate_snapshot():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"code": 200, "data": None})
+
+    client = DSTApiClient("http://mock", "token")
+    client.client = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler), base_url="http://mock/v3"
+    )
+    poller = room_poller.init_room_poller(client, metrics_interval=0)
+    store = room_poller.get_snapshot_store()
+    try:
+        store.update_rooms([{"id": 1, "status": True}, {"id": 2, "status": True}])
+        store.update_players(1, [{"uid": "KU_1"}])
+        store.update_players(2, [{"uid": "KU_2"}])
+        poller._room_list_due = 1e12
+
+        # 控制台命令不改变房间状态
+        await client.announce(1, "hi")
+        assert store.list_rooms(max_age=60) is not None
+
+        await client.deactivate_room(1)
+        assert store.list_rooms(max_age=60) is None
+        assert store.get_players(1, max_age=60) is None
+        assert store.get_players(2, max_age=60) == [{"uid": "KU_2"}]
+        assert poller._room_list_due == 0.0
+    finally:
+        await room_poller.shutdown_room_poller()
+        await client.close()
+    assert client._mutation_listeners == []
+
+
+@pytest.mark.asyncio
+async def test_poll_during_mutation_does_not_restore_stale_snapshot():
+    state = {"status": True}
+    release_post = asyncio.Event()
+    release_get = asyncio.Event()
+    release_get.set()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "POST":
+            await release_post.wait()
+            state["status"] = False
+            return httpx.Response(200, json={"code": 200, "data": None})
+        status = state["status"]
+        await release_get.wait()
+        if request.url.path.endswith("/room/list"):
+            rows = [{"id": 1, "status": status}]
+            return httpx.Response(200, json={"code": 200, "data": {"rows": rows, "totalCount": 1}})
+        return httpx.Response(200, json={"code": 200, "data": [{"uid": "KU_1"}]})
+
+    client = DSTApiClient("http://mock", "token")
+    client.client = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler), base_url="http://mock/v3"
+    )
+    poller = room_poller.init_room_poller(client, metrics_interval=0)
+    store = room_poller.get_snapshot_store()
+    try:
+        mutation = asyncio.create_task(client.deactivate_room(1))
+        await asyncio.sleep(0.01)
+        # 写进行期间完成的轮询：写完成后再次失效
+        await poller.poll_once(time.monotonic())
+        assert store.list_rooms(max_age=60) == [{"id": 1, "status": True}]
+        # 写进行期间发起、写完成后才返回的轮询：结果被丢弃
+        release_get.clear()
+        poll = asyncio.create_task(poller.poll_once(time.monotonic() + 100))
+        await asyncio.sleep(0.01)
+        release_post.set()
+        await mutation
+        release_get.set()
+        await poll
+
+        assert store.list_rooms(max_age=60) is None
+        await poller.poll_once(time.monotonic())
+        assert store.list_rooms(max_age=60) == [{"id": 1, "status": False}]
+    finally:
+        await room_poller.shutdown_room_poller()
+        await client.close()
+
+
+def test_format_snapshot_age():
+    assert format_snapshot_age(None) == ""
+    assert format_snapshot_age(4.6) == "（数据更新于 4 秒前）"
+    assert format_snapshot_age(125) == "（数据更新于 2 分钟前）"
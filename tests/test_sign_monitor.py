@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 from datetime import date
 
 import httpx
@@ -11,12 +12,17 @@ from nonebot_plugin_dst_management.client.api_client import DSTApiClient
 from nonebot_plugin_dst_management.database import (
     create_sign_record,
     create_user_binding,
+    fetch_all,
     get_sign_record,
     init_db,
+    list_room_pending_sign_records,
     set_db_path,
 )
 from nonebot_plugin_dst_management.database.connection import get_db_path
-from nonebot_plugin_dst_management.services.monitors.sign_monitor import SignMonitor
+from nonebot_plugin_dst_management.services.monitors.sign_monitor import (
+    PendingRewardSweeper,
+    SignMonitor,
+)
 
 
 @pytest.fixture
@@ -132,3 +138,208 @@ async def test_check_user_pending_rewards_offline(db_path, api_client):
     record = await get_sign_record("201", sign_day, room_id=1)
     assert record is not None
     assert record.status == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduled_room_check_reuses_players(db_path, api_client, monkeypatch):
+    await create_user_binding("300", "KU_OFF", 1, "player3")
+    sign_day = date(2026, 2, 5)
+    await create_sign_record(
+        "300",
+        1,
+        sign_day,
+        1,
+        [{"prefab": "goldnugget", "amount": 10}],
+        status=0,
+    )
+
+    async def fail_fetch(room_id: int):
+        raise AssertionError("在线玩家列表应由调用方传入")
+
+    monkeypatch.setattr(api_client, "get_online_players", fail_fetch)
+
+    monitor = SignMonitor(api_client)
+    task = monitor.schedule_room_check(1, [{"uid": "KU_OFF", "nickname": "player3"}])
+    # 同一房间已有检查在进行时不重复调度
+    assert monitor.schedule_room_check(1, []) is task
+    await task
+
+    record = await get_sign_record("300", sign_day, room_id=1)
+    assert record is not None
+    assert record.status == 1
+    assert not monitor._tasks
+
+
+@pytest.mark.asyncio
+async def test_room_rewards_are_delivered_in_batched_commands(db_path, api_client, monkeypatch):
+    players = []
+    for index in range(30):
+        ku_id = f"KU_BATCH{index}"
+        await create_user_binding(str(400 + index), ku_id, 1, f"p{index}")
+        players.append({"uid": ku_id})
+        for day in (4, 5):
+            await create_sign_record(
+                str(400 + index), 1, date(2026, 2, day), 1, [{"prefab": "goldnugget", "amount": 10}], status=0
+            )
+
+    commands = []
+
+    async def record_command(room_id, world_id, command):
+        commands.append(command)
+        return {"success": True}
+
+    monkeypatch.setattr(api_client, "execute_console_command", record_command)
+
+    monitor = SignMonitor(api_client, max_command_length=1500)
+    await monitor.check_room_pending_rewards(1, players=players)
+
+    assert 1 < len(commands) < 10
+    assert all(len(command) <= 1500 for command in commands)
+    assert not await list_room_pending_sign_records(1)
+
+
+@pytest.mark.asyncio
+async def test_sweeper_checks_only_pending_rooms_and_backs_off(db_path, api_client, monkeypatch):
+    await create_user_binding("600", "KU_SWEEP", 5, "sweeper")
+    sign_day = date(2026, 2, 5)
+    await create_sign_record("600", 5, sign_day, 1, [{"prefab": "goldnugget", "amount": 1}], status=0)
+
+    online = {5: []}
+    fetched = []
+
+    async def fake_players(room_id: int):
+        fetched.append(room_id)
+        return {"success": True, "data": [{"uid": uid} for uid in online[room_id]]}
+
+    monkeypatch.setattr(api_client, "get_online_players", fake_players)
+    sweeper = PendingRewardSweeper(SignMonitor(api_client), interval=10, max_interval=40)
+
+    # 玩家离线：按 10 -> 20 -> 40 -> 40 秒退避
+    now = 1000.0
+    delays = []
+    for _ in range(4):
+        assert await sweeper.sweep_once(now) == [5]
+        delays.append(sweeper.next_check(5) - now)
+        now = sweeper.next_check(5)
+    assert delays == [10, 20, 40, 40]
+    # 未到期的房间不检查
+    assert await sweeper.sweep_once(now - 1) == []
+    assert fetched == [5, 5, 5, 5]
+
+    # 玩家上线后立即恢复最短间隔并发放
+    online[5] = ["KU_SWEEP"]
+    assert await sweeper.sweep_once(now) == [5]
+    assert sweeper.next_check(5) - now == 10
+    record = await get_sign_record("600", sign_day, room_id=5)
+    assert record is not None and record.status == 1
+
+    # 已无待发放记录的房间不再查询在线玩家
+    assert await sweeper.sweep_once(now + 10) == []
+    assert sweeper.next_check(5) is None
+    assert len(fetched) == 5
+
+
+@pytest.mark.asyncio
+async def test_concurrent_user_and_room_checks_deliver_each_record_once(db_path, api_client, monkeypatch):
+    await create_user_binding("800", "KU_RACE", 1, "racer")
+    for day in (3, 4, 5):
+        await create_sign_record("800", 1, date(2026, 2, day), 1, [{"prefab": "goldnugget", "amount": 1}], status=0)
+
+    gives = []
+
+    async def slow_command(room_id, world_id, command):
+        await asyncio.sleep(0.05)
+        gives.append(command.count("c_give"))
+        return {"success": True}
+
+    monkeypatch.setattr(api_client, "execute_console_command", slow_command)
+    players = [{"uid": "KU_RACE"}]
+    monitor = SignMonitor(api_client)
+    other = SignMonitor(api_client)
+
+    async def user_check():
+        monkeypatch.setattr(monitor, "fetch_online_players", _async_return(players))
+        return await monitor.check_user_pending_rewards("800", "KU_RACE", 1)
+
+    await asyncio.gather(
+        user_check(),
+        other.check_room_pending_rewards(1, players=players),
+        other.check_room_pending_rewards(1, players=players),
+    )
+
+    assert sum(gives) == 3
+    assert not await list_room_pending_sign_records(1)
+    rows = await fetch_all("SELECT status, claimed_at FROM sign_records")
+    assert [(row["status"], row["claimed_at"]) for row in rows] == [(1, None)] * 3
+
+
+@pytest.mark.asyncio
+async def test_stopping_sweeper_does_not_abandon_claimed_rewards(db_path, api_client, monkeypatch):
+    await create_user_binding("900", "KU_STOP", 7, "stopper")
+    sign_day = date(2026, 2, 5)
+    await create_sign_record("900", 7, sign_day, 1, [{"prefab": "goldnugget", "amount": 1}], status=0)
+
+    started = asyncio.Event()
+    gives = []
+
+    async def slow_command(room_id, world_id, command):
+        started.set()
+        await asyncio.sleep(0.05)
+        gives.append(command)
+        return {"success": True}
+
+    monkeypatch.setattr(api_client, "execute_console_command", slow_command)
+    monkeypatch.setattr(
+        api_client, "get_online_players", _async_return({"success": True, "data": [{"uid": "KU_STOP"}]})
+    )
+    monitor = SignMonitor(api_client)
+    sweeper = PendingRewardSweeper(monitor, interval=10)
+    sweeper.start()
+    await asyncio.wait_for(started.wait(), 1)
+
+    # 控制台命令已发出时停止巡检，认领的记录仍完成标记
+    await sweeper.stop()
+    assert await monitor.drain(1)
+
+    record = await get_sign_record("900", sign_day, room_id=7)
+    assert record is not None and record.status == 1
+    assert len(gives) == 1
+
+
+@pytest.mark.asyncio
+async def test_only_definite_failures_are_released(db_path, api_client, monkeypatch):
+    sign_day = date(2026, 2, 5)
+    results = {
+        "KU_TIMEOUT": {"success": False, "error": "请求超时", "code": 408, "uncertain": True},
+        "KU_REJECT": {"success": False, "error": "房间未运行", "code": 400},
+        "KU_RAISE": None,
+    }
+    for index, ku_id in enumerate(results):
+        await create_user_binding(str(910 + index), ku_id, 8, ku_id)
+        await create_sign_record(
+            str(910 + index), 8, sign_day, 1, [{"prefab": "goldnugget", "amount": 1}], status=0
+        )
+
+    async def fake_command(room_id, world_id, command):
+        ku_id = next(ku_id for ku_id in results if ku_id in command)
+        if results[ku_id] is None:
+            raise RuntimeError("boom")
+        return results[ku_id]
+
+    monkeypatch.setattr(api_client, "execute_console_command", fake_command)
+    monitor = SignMonitor(api_client, max_command_length=1)
+    await monitor.check_room_pending_rewards(8, players=[{"uid": ku_id} for ku_id in results])
+
+    statuses = {
+        ku_id: (await get_sign_record(str(910 + index), sign_day, room_id=8)).status
+        for index, ku_id in enumerate(results)
+    }
+    # 结果未知的按已发放处理，避免退回后重复发放；确定未执行的退回待发放
+    assert statuses == {"KU_TIMEOUT": 1, "KU_REJECT": 0, "KU_RAISE": 1}
+
+
+def _async_return(value):
+    async def inner(*args, **kwargs):
+        return value
+
+    return inner
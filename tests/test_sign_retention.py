@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pytest
+
+from nonebot_plugin_dst_management.database import (
+    SignRecordRetention,
+    archive_sign_records,
+    count_sign_records,
+    create_sign_record,
+    fetch_one,
+    init_db,
+    list_sign_record_summaries,
+    list_sign_records,
+    set_db_path,
+    update_sign_record_status,
+)
+from nonebot_plugin_dst_management.database.connection import get_db_path
+
+TODAY = date(2026, 6, 15)
+
+
+@pytest.fixture
+async def db_path(tmp_path):
+    original = get_db_path()
+    db_file = tmp_path / "sign_retention.db"
+    set_db_path(db_file)
+    await init_db()
+    yield db_file
+    set_db_path(original)
+
+
+async def _seed(qq_id: str, room_id: int, days: int) -> list[int]:
+    ids = []
+    for offset in range(days):
+        record_id = await create_sign_record(qq_id, room_id, TODAY - timedelta(days=offset), offset % 3 + 1, [])
+        ids.append(record_id)
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_archive_rolls_old_delivered_records_into_monthly_summaries(db_path):
+    ids = await _seed("500", 1, 120)
+    await _seed("501", 1, 10)
+    # 保留期外但尚未发放的记录不归档
+    pending_id = ids[-1]
+    await update_sign_record_status(pending_id, 0)
+
+    archived = await archive_sign_records(30, today=TODAY, batch_size=7)
+
+    # 早于 30 天前的记录（offset 31..119）减去 1 条未发放记录
+    assert archived == 120 - 31 - 1
+    assert await count_sign_records("500", 1) == 32
+    assert await count_sign_records("501", 1) == 10
+
+    summaries = await list_sign_record_summaries("500", 1)
+    assert sum(summary.sign_count for summary in summaries) == archived
+    assert [summary.month for summary in summaries] == sorted(
+        {summary.month for summary in summaries}, reverse=True
+    )
+    may = next(summary for summary in summaries if summary.month == "2026-05")
+    assert may.first_sign_date <= may.last_sign_date
+    assert may.max_reward_level == 3
+
+    # 再次执行只补充新的过期记录，汇总累加而不重复
+    assert await archive_sign_records(29, today=TODAY) == 1
+    assert sum(summary.sign_count for summary in await list_sign_record_summaries("500", 1)) == archived + 1
+
+
+@pytest.mark.asyncio
+async def test_list_sign_records_pages_newest_first(db_path):
+    await _seed("510", 2, 25)
+
+    first = await list_sign_records("510", 2, limit=10)
+    second = await list_sign_records("510", 2, limit=10, offset=10)
+
+    assert [record.sign_date for record in first][:2] == [TODAY, TODAY - timedelta(days=1)]
+    assert len(first) == len(second) == 10
+    assert first[-1].sign_date > second[0].sign_date
+
+
+@pytest.mark.asyncio
+async def test_retention_job_frees_pages_on_new_database(db_path):
+    row = await fetch_one("PRAGMA auto_vacuum")
+    assert row[0] == 2
+
+    await _seed("520", 3, 400)
+    job = SignRecordRetention(retention_days=7, batch_size=50)
+    result = await job.run_once(today=TODAY)
+
+    assert result["archived"] == 400 - 8
+    assert result["pages_freed"] is not None
+    assert job.stats()["archived"] == 400 - 8
+    row = await fetch_one("PRAGMA freelist_count")
+    assert row[0] == 0
+
+
+@pytest.mark.asyncio
+async def test_existing_database_keeps_auto_vacuum_mode(tmp_path):
+    import sqlite3
+
+    original = get_db_path()
+    db_file = tmp_path / "legacy.db"
+    legacy = sqlite3.connect(db_file)
+    legacy.execute("CREATE TABLE legacy (id INTEGER PRIMARY KEY)")
+    legacy.commit()
+    legacy.close()
+
+    set_db_path(db_file)
+    try:
+        await init_db()
+        row = await fetch_one("PRAGMA auto_vacuum")
+        assert row[0] == 0
+        # 未开启增量模式时只归档，不回收空间
+        await _seed("530", 4, 20)
+        result = await SignRecordRetention(retention_days=7).run_once(today=TODAY)
+        assert result == {"archived": 20 - 8, "pages_freed": None}
+    finally:
+        set_db_path(original)
+
+
+def test_retention_is_disabled_by_default():
+    from nonebot_plugin_dst_management.config import DSTConfig
+    from nonebot_plugin_dst_management.database import start_sign_retention
+
+    assert DSTConfig().dst_sign_retention_days == 0
+    assert start_sign_retention(0) is None
@@ -1,7 +1,10 @@
+import asyncio
 from datetime import date, timedelta
 
+import httpx
 import pytest
 
+from nonebot_plugin_dst_management.client.api_client import DSTApiClient
 from nonebot_plugin_dst_management.database import (
     create_user_binding,
     get_user_binding,
@@ -87,3 +90,122 @@ async def test_sign_continuous_days(db_path):
     assert user is not None
     assert user.continuous_days == 3
     assert user.sign_count == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sign_in_delivers_once(db_path):
+    api_client = FakeApiClient()
+    service = SignService(api_client)
+    await create_user_binding("300", "KU_TEST", 3)
+
+    results = await asyncio.gather(
+        *(service.sign_in("300", 3, sign_date=date(2026, 2, 5)) for _ in range(5))
+    )
+
+    assert sum(result.success for result in results) == 1
+    assert len(api_client.commands) == 1
+    user = await get_user_binding("300", 3)
+    assert user is not None
+    assert user.sign_count == 1
+    winner = next(result for result in results if result.success)
+    assert winner.user is not None
+    assert winner.user.sign_count == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("result", "status"),
+    [
+        ({"success": False, "error": "请求超时", "code": 408, "uncertain": True}, 1),
+        ({"success": False, "error": "房间未运行", "code": 400}, 0),
+    ],
+)
+async def test_sign_in_keeps_uncertain_delivery_out_of_pending(db_path, result, status):
+    from nonebot_plugin_dst_management.database import get_sign_record
+
+    api_client = FakeApiClient()
+
+    async def console(room_id, world_id, command):
+        return result
+
+    api_client.execute_console_command = console
+    service = SignService(api_client)
+    await create_user_binding("400", "KU_TEST", 4)
+
+    sign_result = await service.sign_in("400", 4, sign_date=date(2026, 2, 5))
+
+    assert sign_result.success
+    record = await get_sign_record("400", date(2026, 2, 5), room_id=4)
+    # 结果未知的不退回待发放，避免签到监视器重复发放
+    assert record is not None and record.status == status
+
+
+@pytest.mark.asyncio
+async def test_sign_in_reports_binding_removed_concurrently(db_path):
+    from nonebot_plugin_dst_management.database import delete_user_binding
+
+    api_client = FakeApiClient()
+    fetch_players = api_client.get_room_players
+
+    async def unbind_while_fetching(room_id: int):
+        await delete_user_binding("410", room_id)
+        return await fetch_players(room_id)
+
+    api_client.get_room_players = unbind_while_fetching
+    service = SignService(api_client)
+    await create_user_binding("410", "KU_TEST", 4)
+
+    result = await service.sign_in("410", 4, sign_date=date(2026, 2, 5))
+
+    assert not result.success
+    assert "绑定" in result.message
+    assert not api_client.commands
+
+
+def test_batch_give_commands_merge_players_and_respect_max_length():
+    grants = [
+        ("KU_A", [{"prefab": "goldnugget", "amount": 10}]),
+        ("KU_B", [{"prefab": "cutgrass", "amount": 5}]),
+        ("KU_A", [{"prefab": "log", "amount": 3}]),
+    ]
+    (batch,) = SignService.generate_batch_give_commands(grants)
+    command, indexes = batch
+    assert indexes == [0, 1, 2]
+    assert command.count("ipairs(AllPlayers)") == 1
+    assert command.count('v.userid == "KU_A"') == 1
+    assert 'elseif v.userid == "KU_B"' in command
+    assert 'c_give("log", 3)' in command
+
+    many = [(f"KU_{i}", [{"prefab": "goldnugget", "amount": i + 1}]) for i in range(200)]
+    batches = SignService.generate_batch_give_commands(many, max_length=1000)
+    assert len(batches) > 1
+    assert all(len(command) <= 1000 for command, _ in batches)
+    assert [index for _, indexes in batches for index in indexes] == list(range(200))
+
+
+@pytest.mark.asyncio
+async def test_sign_in_burst_fetches_online_players_once(db_path):
+    online_calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/room/player/online"):
+            online_calls.append(request.url.params["roomID"])
+            players = [{"uid": f"KU_BURST{i}"} for i in range(20)]
+            return httpx.Response(200, json={"code": 200, "data": players})
+        return httpx.Response(200, json={"code": 200, "data": None})
+
+    api_client = DSTApiClient("http://mock", "token", players_ttl=5)
+    api_client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://mock/v3")
+    service = SignService(api_client)
+    for i in range(20):
+        await create_user_binding(str(900 + i), f"KU_BURST{i}", 4)
+
+    results = await asyncio.gather(
+        *(service.sign_in(str(900 + i), 4, sign_date=date(2026, 2, 5)) for i in range(10))
+    )
+    for i in range(10, 20):
+        results.append(await service.sign_in(str(900 + i), 4, sign_date=date(2026, 2, 5)))
+
+    assert all(result.success for result in results)
+    assert online_calls == ["4"]
+    await api_client.close()
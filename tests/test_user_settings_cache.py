@@ -0,0 +1,280 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from nonebot_plugin_dst_management.database import (
+    close_db,
+    execute,
+    fetch_all,
+    fetch_one,
+    flush_last_room_writes,
+    get_last_room_buffer,
+    get_user_default_room,
+    get_user_last_room,
+    get_user_settings_cache_stats,
+    get_user_settings_many,
+    get_user_ui_mode,
+    init_db,
+    set_db_path,
+    set_user_default_room,
+    set_user_last_room,
+    set_user_ui_mode,
+)
+from nonebot_plugin_dst_management.database.connection import get_db_path
+from nonebot_plugin_dst_management.database.settings_cache import (
+    UserSettings,
+    UserSettingsCache,
+    get_user_settings_cache,
+)
+from nonebot_plugin_dst_management.helpers.room_context import (
+    RoomSource,
+    remember_room,
+    resolve_room_id,
+)
+
+
+@pytest.fixture
+async def db_path(tmp_path):
+    original = get_db_path()
+    db_file = tmp_path / "settings.db"
+    set_db_path(db_file)
+    await init_db()
+    yield db_file
+    set_db_path(original)
+
+
+def test_lru_evicts_oldest_and_counts():
+    cache = UserSettingsCache(max_entries=2)
+    cache.put(UserSettings("a"))
+    cache.put(UserSettings("b"))
+    assert set(cache.get_many(["a"])) == {"a"}
+    cache.put(UserSettings("c"))
+
+    assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+    assert cache.stats() == {"hits": 3, "misses": 1, "entries": 2, "max_entries": 2}
+
+
+def test_stale_load_is_discarded_after_write():
+    cache = UserSettingsCache()
+    generation = cache.generation
+    cache.update("a", last_room_id=2)
+    cache.put(UserSettings("a", last_room_id=1), generation)
+    assert cache.get_many(["a"]) == {}
+
+
+@pytest.mark.asyncio
+async def test_getters_hit_cache_and_setters_write_through(db_path):
+    before = get_user_settings_cache_stats()
+    assert await get_user_default_room("600") is None
+    assert await get_user_ui_mode("600") is None
+    after = get_user_settings_cache_stats()
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
+
+    await set_user_default_room("600", 7)
+    await set_user_ui_mode("600", "markdown")
+    await set_user_last_room("600", 8)
+    # 绕过 setter 修改数据库，读取仍应来自缓存
+    await execute("UPDATE user_settings SET default_room_id = 99 WHERE qq_id = ?", ("600",))
+    assert await get_user_default_room("600") == 7
+    assert await get_user_ui_mode("600") == "markdown"
+    assert await get_user_last_room("600") == 8
+
+
+@pytest.mark.asyncio
+async def test_cache_is_cleared_when_db_path_changes(db_path, tmp_path):
+    await set_user_default_room("601", 3)
+    assert await get_user_default_room("601") == 3
+
+    set_db_path(tmp_path / "other.db")
+    await init_db()
+    assert get_user_settings_cache().stats()["entries"] == 0
+    assert await get_user_default_room("601") is None
+
+
+@pytest.mark.asyncio
+async def test_close_callbacks_run_only_on_event_loop_thread(db_path, tmp_path, monkeypatch):
+    import threading
+
+    from nonebot_plugin_dst_management.database import connection
+
+    threads = []
+    record = [lambda: threads.append(threading.get_ident())]
+    monkeypatch.setattr(connection, "_close_callbacks", record)
+
+    # 数据库线程检测到路径变化时只重连，不触发回调
+    monkeypatch.setenv("DST_SIGN_DB_PATH", str(tmp_path / "env.db"))
+    await init_db()
+    assert threads == []
+
+    monkeypatch.delenv("DST_SIGN_DB_PATH")
+    set_db_path(db_path)
+    await close_db()
+    assert threads == [threading.get_ident()] * 2
+
+
+@pytest.mark.asyncio
+async def test_multi_key_fetch_and_resolve_room_id(db_path):
+    await set_user_last_room("group:10", 4)
+    await set_user_default_room("602", 5)
+
+    settings = await get_user_settings_many(["group:10", "602", "missing"])
+    assert settings["group:10"].last_room_id == 4
+    assert settings["602"].default_room_id == 5
+    assert settings["missing"] == UserSettings("missing")
+
+    group_event = SimpleNamespace(group_id=10, user_id=602)
+    resolved = await resolve_room_id(group_event, None)
+    assert resolved is not None
+    assert (resolved.room_id, resolved.source, resolved.context_key) == (4, RoomSource.LAST, "group:10")
+
+    private_event = SimpleNamespace(user_id=602)
+    resolved = await resolve_room_id(private_event, None)
+    assert resolved is not None
+    assert (resolved.room_id, resolved.source) == (5, RoomSource.DEFAULT)
+
+    assert await resolve_room_id(SimpleNamespace(user_id=603), None) is None
+
+
+@pytest.mark.asyncio
+async def test_resolve_room_id_falls_back_per_source_on_read_errors(db_path, monkeypatch):
+    from nonebot_plugin_dst_management.helpers import room_context
+
+    await set_user_last_room("group:11", 4)
+    await set_user_last_room("604", 6)
+    await set_user_default_room("605", 7)
+    original = room_context.get_user_settings
+
+    async def broken_many(keys):
+        raise RuntimeError("database is locked")
+
+    async def flaky_single(key):
+        if key.startswith("group:"):
+            raise RuntimeError("database is locked")
+        return await original(key)
+
+    monkeypatch.setattr(room_context, "get_user_settings_many", broken_many)
+    monkeypatch.setattr(room_context, "get_user_settings", flaky_single)
+
+    resolved = await resolve_room_id(SimpleNamespace(group_id=11, user_id=604), None)
+    assert resolved is not None
+    assert (resolved.room_id, resolved.source, resolved.context_key) == (6, RoomSource.LAST, "604")
+
+    resolved = await resolve_room_id(SimpleNamespace(group_id=11, user_id=605), None)
+    assert resolved is not None
+    assert (resolved.room_id, resolved.source) == (7, RoomSource.DEFAULT)
+
+
+@pytest.mark.asyncio
+async def test_remember_room_skips_unchanged_and_batches_writes(db_path):
+    buffer = get_last_room_buffer()
+    buffer.flush_interval = 60
+    try:
+        event = SimpleNamespace(group_id=20, user_id=604)
+        await resolve_room_id(event, None)  # 预热缓存
+        before = buffer.stats()
+
+        await remember_room(event, 9)
+        await remember_room(event, 9)
+        await remember_room(event, 9)
+        stats = buffer.stats()
+        assert stats["queued"] - before["queued"] == 2
+        assert stats["skipped"] - before["skipped"] == 4
+        assert stats["pending"] == 2
+
+        # 尚未落库，但读取已可见
+        assert await fetch_one("SELECT 1 FROM user_settings WHERE qq_id = ?", ("604",)) is None
+        assert await get_user_last_room("604") == 9
+        get_user_settings_cache().clear()
+        assert await get_user_last_room("group:20") == 9
+
+        await flush_last_room_writes()
+        stats = buffer.stats()
+        assert stats["pending"] == 0
+        assert stats["flushes"] - before["flushes"] == 1
+        rows = await fetch_all("SELECT qq_id, last_room_id FROM user_settings ORDER BY qq_id")
+        assert [tuple(row) for row in rows] == [("604", 9), ("group:20", 9)]
+    finally:
+        buffer.flush_interval = 0.5
+
+
+@pytest.mark.asyncio
+async def test_remember_room_flushes_after_interval(db_path):
+    buffer = get_last_room_buffer()
+    buffer.flush_interval = 0.01
+    try:
+        await remember_room(SimpleNamespace(user_id=605), 11)
+        await asyncio.sleep(0.1)
+        row = await fetch_one("SELECT last_room_id FROM user_settings WHERE qq_id = ?", ("605",))
+        assert row is not None and row[0] == 11
+    finally:
+        buffer.flush_interval = 0.5
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_is_retried_with_backoff(db_path, monkeypatch):
+    from nonebot_plugin_dst_management.database import write_behind
+
+    attempts: list[float] = []
+    real_execute_many = write_behind.execute_many
+
+    async def flaky_execute_many(query, params):
+        attempts.append(asyncio.get_running_loop().time())
+        if len(attempts) <= 2:
+            raise RuntimeError("database is locked")
+        return await real_execute_many(query, params)
+
+    monkeypatch.setattr(write_behind, "execute_many", flaky_execute_many)
+    buffer = write_behind.LastRoomWriteBuffer(flush_interval=0.01)
+    await buffer.remember("606", 12)
+
+    for _ in range(100):
+        if buffer.stats()["flushes"]:
+            break
+        await asyncio.sleep(0.01)
+
+    # 无需新的 remember() 即自动重试，间隔逐次翻倍
+    assert len(attempts) == 3
+    assert attempts[2] - attempts[1] >= 0.015
+    assert buffer.stats()["pending"] == 0
+    row = await fetch_one("SELECT last_room_id FROM user_settings WHERE qq_id = ?", ("606",))
+    assert row is not None and row[0] == 12
+    await buffer.close()
+
+
+@pytest.mark.asyncio
+async def test_overlapping_flushes_keep_in_flight_values(db_path, monkeypatch):
+    from nonebot_plugin_dst_management.database import write_behind
+
+    release = asyncio.Event()
+    batches: list[list] = []
+    real_execute_many = write_behind.execute_many
+
+    async def slow_execute_many(query, params):
+        batches.append(list(params))
+        if len(batches) == 1:
+            await release.wait()
+            raise RuntimeError("database is locked")
+        return await real_execute_many(query, params)
+
+    monkeypatch.setattr(write_behind, "execute_many", slow_execute_many)
+    buffer = write_behind.LastRoomWriteBuffer(flush_interval=60)
+    await buffer.remember("607", 13)
+    first = asyncio.create_task(buffer.flush(retry=False))
+    await asyncio.sleep(0)
+    await buffer.remember("608", 14)
+    second = asyncio.create_task(buffer.flush(retry=False))
+    await asyncio.sleep(0.01)
+
+    # 第一批写入期间，后续 flush 不替换其读取覆盖值
+    assert buffer.pending_value("607") == 13
+    release.set()
+    await asyncio.gather(first, second)
+
+    # 第一批失败放回的值由排在其后的 flush 一并写入
+    assert batches[1] == [("608", 14), ("607", 13)]
+    assert buffer.stats()["pending"] == 0
+    rows = await fetch_all("SELECT qq_id, last_room_id FROM user_settings ORDER BY qq_id")
+    assert [tuple(row) for row in rows] == [("607", 13), ("608", 14)]
+    await buffer.close()